@@ -1,23 +1,131 @@
+import io
+import json
 import os
+import threading
+import time
 import traceback
-from flask import Flask, request, jsonify
-import pandas as pd
-import joblib
-from src.utils import classify_planet_type, load_artifacts
+from flask import Flask, Response, request, jsonify, stream_with_context
+from src.utils import artifacts_fingerprint, load_artifacts, model_version
+from src.pipeline import (
+    CompiledPipeline, chunked, extract_records, format_prediction, iter_csv_records, iter_ndjson_records,
+    score_records, validate_record,
+)
+from src.microbatch import MicroBatcher, MicroBatchQueueFull
+from src.cache import PredictionCache, feature_key
 
 ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", "artifacts")
+# "xgboost" (native booster) or "numpy" (compiled tree ensemble from the bundle, no xgboost import)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "xgboost")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 10000))
+# Rows scored per vectorised call on /predict/stream
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", 1000))
+
+# Opt-in micro-batching of concurrent /predict calls
+MICROBATCH_ENABLED = os.environ.get("MICROBATCH_ENABLED", "False").lower() == "true"
+MICROBATCH_MAX_BATCH_SIZE = int(os.environ.get("MICROBATCH_MAX_BATCH_SIZE", 64))
+MICROBATCH_MAX_WAIT_MS = float(os.environ.get("MICROBATCH_MAX_WAIT_MS", 2.0))
+MICROBATCH_MAX_QUEUE_DEPTH = int(os.environ.get("MICROBATCH_MAX_QUEUE_DEPTH", 1024))
+
+# Load and warm the model at import time (i.e. before a worker accepts traffic)
+EAGER_LOAD = os.environ.get("EAGER_LOAD", "False").lower() == "true"
+# How often (seconds) to stat the artifacts and hot-reload them if they changed; 0 disables
+ARTIFACTS_CHECK_INTERVAL = float(os.environ.get("ARTIFACTS_CHECK_INTERVAL", 30))
+
+# /predict result cache keyed on (model version, ordered feature vector); size 0 disables
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 10000))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
 
 app = Flask(__name__)
 
-# Lazy load artifacts on first request
-after_first_load = {"loaded": False, "objects": None}
+# Artifacts are loaded once per process, guarded by a lock. "objects" is published
+# last, so a non-None value means the pipeline (and batcher) are ready to use.
+# "scoring" holds the (pipeline, version) pair as one value, so a request never
+# pairs one model's pipeline with another's version across a hot reload.
+model_state = {
+    "objects": None, "scoring": None, "batcher": None, "timings": None, "error": None,
+    "version": None, "fingerprint": None, "checked_at": 0.0,
+}
+_load_lock = threading.Lock()
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+
+
+def _load_model():
+    started = time.perf_counter()
+    fingerprint = artifacts_fingerprint(ARTIFACTS_DIR)
+    objects = load_artifacts(ARTIFACTS_DIR, backend=INFERENCE_BACKEND)
+    loaded = time.perf_counter()
+    pipeline = CompiledPipeline.from_artifacts(objects)
+    compiled = time.perf_counter()
+
+    # Warm-up: one dummy (all-imputed) prediction so the first real request is not cold
+    pipeline.predict_one([None] * len(pipeline.feature_columns))
+    warmed = time.perf_counter()
+
+    if MICROBATCH_ENABLED and model_state["batcher"] is None:
+        # Always scores with the current pipeline, so it survives artifact reloads
+        model_state["batcher"] = MicroBatcher(
+            lambda X: model_state["scoring"][0].predict_matrix(X),
+            max_batch_size=MICROBATCH_MAX_BATCH_SIZE,
+            max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+            max_queue_depth=MICROBATCH_MAX_QUEUE_DEPTH,
+        )
+    model_state["timings"] = {
+        "load_ms": round((loaded - started) * 1000, 3),
+        "compile_ms": round((compiled - loaded) * 1000, 3),
+        "warmup_ms": round((warmed - compiled) * 1000, 3),
+        "total_ms": round((warmed - started) * 1000, 3),
+        "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    version = model_version(objects, fingerprint)
+    if prediction_cache is not None and model_state["version"] not in (None, version):
+        # Entries keyed on the old version can never hit again; free them
+        prediction_cache.clear()
+    model_state["scoring"] = (pipeline, version)
+    model_state["version"] = version
+    model_state["fingerprint"] = fingerprint
+    model_state["checked_at"] = time.monotonic()
+    model_state["error"] = None
+    model_state["objects"] = objects
+    print(f"Model {model_state['version'][:12]} loaded from {ARTIFACTS_DIR} in {model_state['timings']['total_ms']} ms "
+          f"(load {model_state['timings']['load_ms']} ms, warm-up {model_state['timings']['warmup_ms']} ms)")
+
+
+def _artifacts_changed() -> bool:
+    if ARTIFACTS_CHECK_INTERVAL <= 0 or time.monotonic() - model_state["checked_at"] < ARTIFACTS_CHECK_INTERVAL:
+        return False
+    model_state["checked_at"] = time.monotonic()
+    return artifacts_fingerprint(ARTIFACTS_DIR) != model_state["fingerprint"]
 
 
 def get_artifacts():
-    if not after_first_load["loaded"]:
-        after_first_load["objects"] = load_artifacts(ARTIFACTS_DIR)
-        after_first_load["loaded"] = True
-    return after_first_load["objects"]
+    if model_state["objects"] is None:
+        with _load_lock:
+            if model_state["objects"] is None:
+                try:
+                    _load_model()
+                except Exception as e:
+                    model_state["error"] = str(e)
+                    raise
+    elif _artifacts_changed():
+        with _load_lock:
+            if artifacts_fingerprint(ARTIFACTS_DIR) != model_state["fingerprint"]:
+                try:
+                    _load_model()
+                except Exception:
+                    # Keep serving the model already in memory
+                    traceback.print_exc()
+    return model_state["objects"]
+
+
+def get_pipeline():
+    """The current ``(pipeline, model version)`` pair, loading the artifacts if needed."""
+    get_artifacts()
+    return model_state["scoring"]
+
+
+def get_microbatcher():
+    get_artifacts()
+    return model_state["batcher"]
 
 
 @app.route("/health", methods=["GET"])
@@ -25,6 +133,40 @@ def health():
     return {"status": "ok"}
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness probe: 200 once the model is loaded and warmed, 503 otherwise.
+
+    In lazy mode the first probe triggers the load, so a load balancer can warm
+    a fresh instance before routing traffic to it.
+    """
+    try:
+        get_artifacts()
+    except Exception:
+        traceback.print_exc()
+        return jsonify({"status": "unavailable", "error": model_state["error"]}), 503
+    return jsonify({
+        "status": "ready",
+        "eagerLoad": EAGER_LOAD,
+        "backend": INFERENCE_BACKEND,
+        "modelVersion": model_state["version"],
+        "timings": model_state["timings"],
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    batcher = model_state["batcher"]
+    return jsonify({
+        "microbatch": {"enabled": MICROBATCH_ENABLED, **(batcher.metrics() if batcher else {})},
+        "predictionCache": {
+            "enabled": prediction_cache is not None,
+            "modelVersion": model_state["version"],
+            **(prediction_cache.stats() if prediction_cache else {}),
+        },
+    })
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
@@ -32,49 +174,106 @@ def predict():
         if not payload:
             return jsonify({"error": "Empty JSON payload"}), 400
 
+        pipeline, version = get_pipeline()
+        feature_columns = pipeline.feature_columns
+
+        # Reject non-numeric features before the row can join a micro-batch with other requests
+        row, row_error = validate_record(payload, feature_columns)
+        if row_error:
+            return jsonify({"error": row_error}), 400
         custom_identifier = payload.get("customIdentifier") or payload.get("candidateIdentifier")
+        values = [row[col] for col in feature_columns]
 
-        artifacts = get_artifacts()
-        model = artifacts['model']
-        imputer = artifacts['imputer']
-        scaler = artifacts['scaler']
-        feature_columns = artifacts['feature_columns']
-
-        # Build single-row DataFrame preserving order
-        row = {col: payload.get(col, None) for col in feature_columns}
-        df = pd.DataFrame([row], columns=feature_columns)
-
-        # Impute & scale
-        X_imputed = imputer.transform(df)
-        X_scaled = scaler.transform(X_imputed)
-
-        proba = model.predict_proba(X_scaled)[0, 1]
-        pred = int(proba >= 0.5)
-
-        # Derive details
-        radius_earth = row.get('koi_prad')
-        planet_type = classify_planet_type(radius_earth)
-        teq = row.get('koi_teq')
-        period = row.get('koi_period')
-
-        response = {
-            "candidateIdentifier": custom_identifier,
-            "isExoplanet": bool(pred),
-            "confidence": round(float(proba if pred == 1 else 1 - proba), 6),
-            "details": {
-                "planetName": None,  # placeholder (could be filled if naming logic added)
-                "planetType": planet_type,
-                "radiusEarth": radius_earth,
-                "orbitalPeriodDays": period,
-                "equilibriumTempKelvin": teq,
-            }
-        }
+        # Identical feature vectors under the same model version skip the model entirely
+        cache_key = feature_key(version, values) if prediction_cache is not None else None
+        proba = prediction_cache.get(cache_key) if cache_key is not None else None
+        if proba is None:
+            batcher = get_microbatcher()
+            proba = batcher.submit(values) if batcher else pipeline.predict_one(values)
+            # The batcher scores with whichever model is current by then; only cache a score
+            # made by the model the key names
+            if cache_key is not None and model_state["scoring"][1] == version:
+                prediction_cache.put(cache_key, proba)
+        response = format_prediction(custom_identifier, row, proba)
         return jsonify(response)
+    except MicroBatchQueueFull as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    try:
+        payload = request.get_json(force=True)
+        records, error = extract_records(payload)
+        if error:
+            return jsonify({"error": error}), 400
+        if len(records) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large: {len(records)} rows (max {MAX_BATCH_SIZE})"}), 413
+
+        # Validate every row up front, then impute, scale and predict once over the valid rows
+        pipeline, _ = get_pipeline()
+        results = score_records(pipeline, records)
+        n_errors = sum(1 for result in results if "error" in result)
+
+        return jsonify({
+            "count": len(records),
+            "errors": n_errors,
+            "results": results,
+        })
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """Score a streamed CSV (``text/csv``) or NDJSON body, streaming NDJSON results back.
+
+    The body is consumed ``STREAM_CHUNK_ROWS`` rows at a time and each chunk is
+    scored with one vectorised call, so memory stays flat regardless of input
+    size. Output lines are in input order, in the ``/predict/batch`` result format.
+    ``?id_column=kepoi_name`` picks the identifier column (default
+    ``customIdentifier`` / ``candidateIdentifier``).
+    """
+    try:
+        chunk_rows = max(1, min(int(request.args.get("chunk_rows", STREAM_CHUNK_ROWS)), MAX_BATCH_SIZE))
+    except ValueError:
+        return jsonify({"error": "chunk_rows must be an integer"}), 400
+    try:
+        pipeline, _ = get_pipeline()
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+    id_column = request.args.get("id_column")
+    text = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+    if request.mimetype == "text/csv":
+        records = iter_csv_records(text, pipeline.feature_columns)
+    else:
+        records = iter_ndjson_records(text)
+
+    def generate():
+        start = 0
+        try:
+            for chunk in chunked(records, chunk_rows):
+                results = score_records(pipeline, chunk, start_index=start, id_column=id_column)
+                start += len(chunk)
+                yield "".join(json.dumps(result) + "\n" for result in results)
+        except Exception as e:
+            # Headers are already sent; report the failure in-band and stop
+            traceback.print_exc()
+            yield json.dumps({"index": start, "error": f"Stream aborted: {e}"}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+
+if EAGER_LOAD:
+    get_artifacts()
+
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 5000))
     app.run(host='0.0.0.0', port=port)
@@ -0,0 +1,46 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+from src.tree_ensemble import TreeEnsemble
+from src.utils import load_artifacts
+
+
+def time_call(fn, X, repeat: int) -> float:
+    """Best-of-``repeat`` wall time in milliseconds."""
+    fn(X)  # warm-up
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(X)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare native XGBoost and compiled NumPy tree evaluation')
+    parser.add_argument('--data', type=str, default='data/NASA Exoplanet 2.csv')
+    parser.add_argument('--artifacts', type=str, default='artifacts')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.artifacts)
+    booster = artifacts['model'].get_booster()
+    trees = TreeEnsemble.from_booster(booster)
+
+    X = pd.read_csv(args.data)[artifacts['feature_columns']].to_numpy(dtype=np.float64)
+    np.copyto(X, artifacts['medians'], where=np.isnan(X))
+    X = ((X - artifacts['mean']) / artifacts['scale']).astype(np.float32)
+    X = np.resize(X, (args.rows, X.shape[1]))
+
+    print(f"{trees.n_trees} trees, max depth {trees.max_depth}")
+    for label, batch in (('1 row', X[:1]), (f'{args.rows} rows', X)):
+        native = time_call(booster.inplace_predict, batch, args.repeat)
+        compiled = time_call(trees.predict_proba, batch, args.repeat)
+        print(f"{label:>12}: native {native:9.3f} ms | numpy {compiled:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+import os
+import pytest
+
+from src.utils import load_artifacts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(BASE_DIR, 'data', 'NASA Exoplanet 2.csv')
+
+
+@pytest.fixture(scope='session')
+def artifacts_dir(tmp_path_factory):
+    """Use trained artifacts if present, otherwise train a fresh set from the bundled CSV."""
+    artifacts_dir = os.environ.get('ARTIFACTS_DIR', os.path.join(BASE_DIR, 'artifacts'))
+    if not os.path.exists(os.path.join(artifacts_dir, 'exoplanet_model.joblib')):
+        from train_model import build_datasets, load_and_filter_dataset, preprocess_and_train
+
+        artifacts_dir = str(tmp_path_factory.mktemp('artifacts'))
+        X_train, X_test, y_train, y_test = build_datasets(load_and_filter_dataset(DATA_PATH))
+        preprocess_and_train(X_train, X_test, y_train, y_test, artifacts_dir)
+    return artifacts_dir
+
+
+@pytest.fixture(scope='session')
+def artifacts(artifacts_dir):
+    """Legacy joblib artifacts, including the fitted sklearn imputer and scaler."""
+    return load_artifacts(artifacts_dir, prefer_bundle=False)
+
+
+@pytest.fixture(scope='session')
+def catalogue():
+    import pandas as pd
+
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.fixture
+def scoring_app(artifacts_dir, monkeypatch):
+    """The ML service module on the test artifacts, with nothing loaded yet and no micro-batching or cache."""
+    import app as model_app
+
+    monkeypatch.setattr(model_app, 'ARTIFACTS_DIR', artifacts_dir)
+    monkeypatch.setattr(model_app, 'MICROBATCH_ENABLED', False)
+    monkeypatch.setattr(model_app, 'prediction_cache', None)
+    monkeypatch.setattr(model_app, 'model_state', {key: None for key in model_app.model_state} | {'checked_at': 0.0})
+    return model_app
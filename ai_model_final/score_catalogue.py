@@ -0,0 +1,123 @@
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+READ_BLOCK_BYTES = 64 * 1024
+
+
+def iter_file_blocks(path: str):
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(READ_BLOCK_BYTES), b''):
+            yield block
+
+
+def _send_chunked(sock, path, upload):
+    """Send ``path`` as a chunked request body; runs on its own thread while results are read."""
+    try:
+        for block in iter_file_blocks(path):
+            sock.sendall(b'%X\r\n%s\r\n' % (len(block), block))
+        sock.sendall(b'0\r\n\r\n')
+    except OSError as e:
+        # The server may answer (e.g. with an error) and close before reading the whole body
+        upload['error'] = e
+    upload['done_at'] = time.perf_counter()
+
+
+def score_file(url: str, input_path: str, out, input_format: str = None, id_column: str = None,
+               chunk_rows: int = None):
+    """Stream ``input_path`` to ``/predict/stream`` and write the NDJSON results to ``out`` as they arrive.
+
+    The body is uploaded from a separate thread: the server streams results
+    while it is still reading, so sending everything before reading back would
+    deadlock once the socket buffers fill. Returns a dict of row/error counts
+    and timings.
+    """
+    input_format = input_format or ('csv' if input_path.lower().endswith('.csv') else 'ndjson')
+    content_type = 'text/csv' if input_format == 'csv' else 'application/x-ndjson'
+
+    url = urlsplit(url)
+    params = {}
+    if id_column:
+        params['id_column'] = id_column
+    if chunk_rows:
+        params['chunk_rows'] = chunk_rows
+    query = '&'.join(part for part in (url.query, urlencode(params)) if part)
+    path = (url.path or '/') + ('?' + query if query else '')
+    connection_cls = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_cls(url.netloc)
+
+    started = time.perf_counter()
+    # Chunked upload: the file is never held in memory on either side
+    connection.putrequest('POST', path)
+    connection.putheader('Content-Type', content_type)
+    connection.putheader('Transfer-Encoding', 'chunked')
+    connection.endheaders()
+    upload = {'error': None, 'done_at': None}
+    # Write to the socket itself: getresponse() detaches it from `connection` when the server
+    # answers with "Connection: close", and connection.send() would then open a new connection
+    sender = threading.Thread(target=_send_chunked, args=(connection.sock, input_path, upload), daemon=True)
+    sender.start()
+
+    count = errors = 0
+    first_result_at = None
+    try:
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {response.read()[:500]!r}")
+        for line in response:
+            if first_result_at is None:
+                first_result_at = time.perf_counter()
+            out.write(line.decode('utf-8'))
+            count += 1
+            errors += 'error' in json.loads(line)
+        sender.join()
+        if upload['error'] is not None:
+            raise RuntimeError(f"Upload failed: {upload['error']}")
+    finally:
+        connection.close()
+
+    finished = time.perf_counter()
+    return {
+        'rows': count,
+        'errors': errors,
+        'elapsed_ms': (finished - started) * 1000,
+        'first_result_ms': (first_result_at - started) * 1000 if first_result_at is not None else None,
+        'upload_ms': (upload['done_at'] - started) * 1000,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Stream a CSV/NDJSON catalogue through /predict/stream')
+    parser.add_argument('--input', type=str, required=True, help='CSV or NDJSON file to score')
+    parser.add_argument('--url', type=str, default='http://localhost:5000/predict/stream')
+    parser.add_argument('--output', type=str, default='-', help='NDJSON output file (default: stdout)')
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help='Input format (default: from file extension)')
+    parser.add_argument('--id-column', type=str, help='Column holding the candidate identifier, e.g. kepoi_name')
+    parser.add_argument('--chunk-rows', type=int, help='Rows per server-side scoring chunk')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    out = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        stats = score_file(args.url, args.input, out, input_format=args.format, id_column=args.id_column,
+                           chunk_rows=args.chunk_rows)
+    except RuntimeError as e:
+        print(f"Request failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Scored {stats['rows']} rows ({stats['errors']} errors) in {stats['elapsed_ms'] / 1000:.2f}s; "
+          f"first result after {stats['first_result_ms'] or 0:.0f} ms, upload finished after "
+          f"{stats['upload_ms']:.0f} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""Single-file model bundle.
+
+Layout (all integers little-endian)::
+
+    b"EXOBNDL1" | uint64 manifest length | manifest JSON | padding | data region
+
+Every section in the data region starts on a 64-byte boundary. The booster is
+stored in XGBoost's native UBJSON format and the preprocessing vectors as raw
+float64 arrays, so they can be ``np.memmap``'d and shared between workers
+through the page cache instead of each worker unpickling its own copy.
+Bundles may also carry the booster compiled to flat ``trees.*`` arrays (see
+``src.tree_ensemble``), which lets the ``numpy`` backend score without xgboost.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Optional, Sequence
+import hashlib
+import json
+import os
+import struct
+import time
+import numpy as np
+
+from src.tree_ensemble import ARRAY_NAMES as TREE_ARRAYS, TreeEnsemble
+
+MAGIC = b"EXOBNDL1"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+_HEADER = struct.Struct("<8sQ")
+ARRAY_SECTIONS = ("medians", "mean", "scale")
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _align(n: int) -> int:
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _data_start(manifest_len: int) -> int:
+    return _align(_HEADER.size + manifest_len)
+
+
+def _sha256_file(path: str, start: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_bundle(path: str, model, medians, mean, scale, feature_columns: Sequence[str],
+                training: Optional[Dict[str, Any]] = None, trees=None) -> Dict[str, Any]:
+    """Write ``model`` (an XGBClassifier) and preprocessing vectors to ``path``; returns the manifest.
+
+    ``trees`` is an optional compiled :class:`~src.tree_ensemble.TreeEnsemble` of the same model.
+    """
+    if not np.isnan(model.missing):
+        raise BundleError("Only models using NaN as the missing value can be bundled")
+
+    blobs = {"booster": bytes(model.get_booster().save_raw("ubj"))}
+    sections: Dict[str, Dict[str, Any]] = {"booster": {"encoding": "ubj"}}
+    for name, values in zip(ARRAY_SECTIONS, (medians, mean, scale)):
+        array = np.ascontiguousarray(values, dtype="<f8")
+        if array.shape != (len(feature_columns),):
+            raise BundleError(f"Section '{name}' has shape {array.shape}, expected ({len(feature_columns)},)")
+        blobs[name] = array.tobytes()
+        sections[name] = {"dtype": "<f8", "shape": list(array.shape)}
+    if trees is not None:
+        for name, array in trees.arrays().items():
+            array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+            blobs[f"trees.{name}"] = array.tobytes()
+            sections[f"trees.{name}"] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+
+    offset = 0
+    data = bytearray()
+    for name, blob in blobs.items():
+        padding = _align(offset) - offset
+        data += b"\0" * padding
+        offset += padding
+        sections[name].update({"offset": offset, "nbytes": len(blob)})
+        data += blob
+        offset += len(blob)
+
+    manifest = {
+        "format": "exoplanet-model-bundle",
+        "format_version": FORMAT_VERSION,
+        "feature_columns": list(feature_columns),
+        "sections": sections,
+        "checksum": {"algorithm": "sha256", "value": hashlib.sha256(data).hexdigest()},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "training": training or {},
+    }
+    if trees is not None:
+        manifest["tree_ensemble"] = {
+            "base_margin": trees.base_margin, "max_depth": trees.max_depth, "n_trees": trees.n_trees,
+        }
+    manifest_bytes = json.dumps(manifest, sort_keys=True).encode("utf-8")
+    header = _HEADER.pack(MAGIC, len(manifest_bytes)) + manifest_bytes
+    header += b"\0" * (_data_start(len(manifest_bytes)) - len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as fh:
+        fh.write(header)
+        fh.write(data)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as fh:
+        header = fh.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise BundleError(f"{path} is not a model bundle (truncated header)")
+        magic, manifest_len = _HEADER.unpack(header)
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not a model bundle (bad magic)")
+        manifest = json.loads(fh.read(manifest_len).decode("utf-8"))
+    manifest["_data_start"] = _data_start(manifest_len)
+    return manifest
+
+
+def validate_manifest(path: str, manifest: Dict[str, Any], feature_columns: Sequence[str],
+                      verify_checksum: bool = True, required: Sequence[str] = ("booster",) + ARRAY_SECTIONS):
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise BundleError(f"Unsupported bundle format version: {manifest.get('format_version')}")
+    if manifest.get("feature_columns") != list(feature_columns):
+        raise BundleError("Bundle feature order does not match FEATURE_COLUMNS")
+
+    for name in required:
+        if name not in manifest["sections"]:
+            raise BundleError(f"Bundle is missing section '{name}'")
+    data_size = os.path.getsize(path) - manifest["_data_start"]
+    for name, section in manifest["sections"].items():
+        if section["offset"] % ALIGNMENT or section["offset"] + section["nbytes"] > data_size:
+            raise BundleError(f"Bundle section '{name}' is misaligned or out of bounds")
+    for name in ARRAY_SECTIONS:
+        if manifest["sections"][name]["shape"] != [len(feature_columns)]:
+            raise BundleError(f"Bundle section '{name}' does not match the number of features")
+
+    if verify_checksum:
+        checksum = manifest["checksum"]
+        if checksum.get("algorithm") != "sha256" or _sha256_file(path, manifest["_data_start"]) != checksum.get("value"):
+            raise BundleError(f"Checksum mismatch for {path}")
+
+
+def _memmap_section(path: str, manifest: Dict[str, Any], name: str) -> np.memmap:
+    section = manifest["sections"][name]
+    return np.memmap(path, dtype=section.get("dtype", np.uint8), mode="r",
+                     offset=manifest["_data_start"] + section["offset"],
+                     shape=tuple(section.get("shape", [section["nbytes"]])))
+
+
+def load_bundle(path: str, feature_columns: Sequence[str], verify_checksum: bool = True,
+                backend: str = "xgboost") -> Dict[str, Any]:
+    """Load a bundle written by :func:`save_bundle`.
+
+    Preprocessing vectors (and compiled tree arrays) are returned as read-only
+    memmaps. With ``backend="xgboost"`` the booster is copied into XGBoost's own
+    memory and returned as ``model``; with ``backend="numpy"`` the compiled
+    ensemble is returned as ``trees`` and xgboost is never imported.
+    """
+    if backend not in ("xgboost", "numpy"):
+        raise BundleError(f"Unknown inference backend: {backend}")
+    tree_sections = tuple(f"trees.{name}" for name in TREE_ARRAYS)
+    required = ARRAY_SECTIONS + (tree_sections if backend == "numpy" else ("booster",))
+
+    manifest = read_manifest(path)
+    validate_manifest(path, manifest, feature_columns, verify_checksum=verify_checksum, required=required)
+    artifacts = {
+        "feature_columns": list(manifest["feature_columns"]),
+        "manifest": manifest,
+        **{name: _memmap_section(path, manifest, name) for name in ARRAY_SECTIONS},
+    }
+
+    if backend == "numpy":
+        params = manifest["tree_ensemble"]
+        artifacts["trees"] = TreeEnsemble(
+            {name: _memmap_section(path, manifest, f"trees.{name}") for name in TREE_ARRAYS},
+            base_margin=params["base_margin"], max_depth=params["max_depth"],
+        )
+    else:
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier()
+        model.load_model(bytearray(_memmap_section(path, manifest, "booster")))
+        artifacts["model"] = model
+    return artifacts
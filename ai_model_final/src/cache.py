@@ -0,0 +1,78 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence
+import hashlib
+import threading
+import time
+import numpy as np
+
+
+def feature_key(model_version: str, values: Sequence[Any]) -> bytes:
+    """Content address of an ordered feature vector under a given model version.
+
+    Values are canonicalised through float64 so ``2`` and ``2.0`` (and ``-0.0``
+    and ``0.0``) share a key, and every missing value hashes the same way.
+    """
+    vector = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    vector[np.isnan(vector)] = np.nan
+    vector += 0.0
+    return hashlib.blake2b(model_version.encode("utf-8") + vector.tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a per-entry TTL for model probabilities."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: bytes) -> Optional[float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
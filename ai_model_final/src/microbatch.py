@@ -0,0 +1,135 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Callable, Dict, List, Sequence
+import queue
+import threading
+import time
+import numpy as np
+
+
+class MicroBatchQueueFull(RuntimeError):
+    pass
+
+
+class _Pending:
+    __slots__ = ("values", "enqueued_at", "event", "result", "error")
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.enqueued_at = time.perf_counter()
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _percentile(samples: Sequence[float], q: float) -> float | None:
+    if not samples:
+        return None
+    return float(np.percentile(np.fromiter(samples, dtype=np.float64), q))
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-row requests into one model call.
+
+    Request threads call :meth:`submit` and block; a single worker thread drains
+    the queue, waiting at most ``max_wait_ms`` after the first queued row (or
+    until ``max_batch_size`` rows are collected), scores the batch with
+    ``score_fn`` and hands each caller its own probability.
+    """
+
+    def __init__(self, score_fn: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 64,
+                 max_wait_ms: float = 2.0, max_queue_depth: int = 1024, window: int = 1024):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[_Pending]" = queue.Queue(maxsize=max_queue_depth)
+        self._lock = threading.Lock()
+        self._batch_sizes = deque(maxlen=window)
+        self._wait_times_ms = deque(maxlen=window)
+        self._batches = 0
+        self._rows = 0
+        self._rejected = 0
+        self._max_queue_depth_seen = 0
+        self._worker = threading.Thread(target=self._run, name="microbatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, values: Sequence[Any]) -> float:
+        """Queue one row of raw feature values (``None`` = missing) and wait for its probability.
+
+        The row is converted to float64 here, on the caller's thread, so a
+        non-numeric value fails only its own request and never the batch it
+        would have joined.
+        """
+        pending = _Pending(np.array([np.nan if value is None else value for value in values], dtype=np.float64))
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise MicroBatchQueueFull("Prediction queue is full")
+        with self._lock:
+            self._max_queue_depth_seen = max(self._max_queue_depth_seen, self._queue.qsize())
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _collect(self) -> List[_Pending]:
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # Always take what is already queued, even past the deadline
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                X = np.vstack([pending.values for pending in batch])
+                probas = self.score_fn(X)
+                for pending, proba in zip(batch, probas):
+                    pending.result = proba
+            except Exception as e:
+                for pending in batch:
+                    pending.error = e
+            finally:
+                with self._lock:
+                    self._batches += 1
+                    self._rows += len(batch)
+                    self._batch_sizes.append(len(batch))
+                    self._wait_times_ms.extend((started - p.enqueued_at) * 1000.0 for p in batch)
+                for pending in batch:
+                    pending.event.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            batch_sizes = list(self._batch_sizes)
+            wait_times = list(self._wait_times_ms)
+            return {
+                "config": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_wait * 1000.0,
+                    "max_queue_depth": self._queue.maxsize,
+                },
+                "batches": self._batches,
+                "rows": self._rows,
+                "rejected": self._rejected,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth_seen": self._max_queue_depth_seen,
+                "batch_size": {
+                    "mean": float(np.mean(batch_sizes)) if batch_sizes else None,
+                    "p50": _percentile(batch_sizes, 50),
+                    "max": max(batch_sizes) if batch_sizes else None,
+                },
+                "wait_ms": {
+                    "p50": _percentile(wait_times, 50),
+                    "p99": _percentile(wait_times, 99),
+                    "max": max(wait_times) if wait_times else None,
+                },
+            }
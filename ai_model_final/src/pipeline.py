@@ -0,0 +1,238 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+import csv
+import json
+import threading
+import numpy as np
+
+from src.utils import classify_planet_type
+
+
+def get_identifier(record: Dict[str, Any], id_column: Optional[str] = None) -> Any:
+    if id_column:
+        return record.get(id_column)
+    return record.get("customIdentifier") or record.get("candidateIdentifier")
+
+
+def extract_records(payload: Any) -> Tuple[Optional[List[Any]], Optional[str]]:
+    """Normalise a batch payload into a list of per-candidate records.
+
+    Accepts a bare JSON list, ``{"candidates": [...]}`` or the column-oriented
+    ``{"columns": {"koi_period": [...], ...}}`` form. Returns ``(records, error)``.
+    """
+    if isinstance(payload, list):
+        return payload, None
+    if not isinstance(payload, dict):
+        return None, "Payload must be a list of candidates or a JSON object"
+
+    if "candidates" in payload:
+        candidates = payload["candidates"]
+        if not isinstance(candidates, list):
+            return None, "'candidates' must be a list"
+        return candidates, None
+
+    if "columns" in payload:
+        columns = payload["columns"]
+        if not isinstance(columns, dict) or not columns:
+            return None, "'columns' must be a non-empty object of equal-length lists"
+        if not all(isinstance(values, list) for values in columns.values()):
+            return None, "Every entry in 'columns' must be a list"
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) != 1:
+            return None, "All lists in 'columns' must have the same length"
+        n_rows = lengths.pop()
+        names = list(columns.keys())
+        return [{name: columns[name][i] for name in names} for i in range(n_rows)], None
+
+    return None, "Payload must contain 'candidates' or 'columns'"
+
+
+def validate_record(record: Any, feature_columns: Sequence[str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Return the ordered feature row for ``record`` or a validation error.
+
+    Missing and null features are allowed (they are imputed); anything else
+    must be a JSON number.
+    """
+    if not isinstance(record, dict):
+        return None, "Candidate must be a JSON object"
+    row = {}
+    for col in feature_columns:
+        value = record.get(col)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return None, f"Feature '{col}' must be a number or null"
+        row[col] = value
+    return row, None
+
+
+def iter_ndjson_records(stream: TextIO) -> Iterator[Any]:
+    """Yield one parsed object per non-blank line; unparseable lines yield an ``InvalidRecord``."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield InvalidRecord(f"Invalid JSON line: {e}")
+
+
+def iter_csv_records(stream: TextIO, feature_columns: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per CSV row; empty feature cells become ``None``, numeric ones floats.
+
+    Non-numeric feature cells are left as strings so ``validate_record`` reports them.
+    """
+    features = set(feature_columns)
+    for row in csv.DictReader(stream):
+        record = {}
+        for key, value in row.items():
+            if key in features:
+                value = (value or "").strip()
+                if not value:
+                    value = None
+                else:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+            record[key] = value
+        yield record
+
+
+class InvalidRecord:
+    """Placeholder for an input row that could not even be parsed."""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CompiledPipeline:
+    """Pandas-free impute -> scale -> predict path, built once from the loaded artifacts.
+
+    Imputer medians and scaler mean/scale are kept as NumPy arrays and applied
+    with the same float64 operations sklearn uses (fill, ``-= mean``, ``/= scale``)
+    before the cast to float32 that XGBoost performs anyway, so probabilities are
+    bit-identical to the ``DataFrame -> imputer -> scaler -> predict_proba`` pipeline.
+    Single-row scoring reuses preallocated per-thread buffers.
+    """
+
+    def __init__(self, feature_columns: Sequence[str], medians, mean, scale,
+                 predict_fn: Callable[[np.ndarray], np.ndarray]):
+        self.feature_columns = list(feature_columns)
+        self.medians = np.ascontiguousarray(medians, dtype=np.float64)
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.predict_fn = predict_fn
+        self._local = threading.local()
+
+    @classmethod
+    def from_artifacts(cls, artifacts: Dict[str, Any]) -> "CompiledPipeline":
+        feature_columns = artifacts['feature_columns']
+        if 'model' not in artifacts:
+            # Compiled NumPy tree ensemble (numpy backend); no xgboost involved
+            return cls(feature_columns, artifacts['medians'], artifacts['mean'], artifacts['scale'],
+                       artifacts['trees'].predict_proba)
+
+        model = artifacts['model']
+
+        # Mirror XGBClassifier.predict_proba: honour early stopping, skip sklearn validation
+        booster = model.get_booster()
+        best_iteration = getattr(model, 'best_iteration', None)
+        iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        missing = model.missing
+
+        def predict_fn(X: np.ndarray) -> np.ndarray:
+            return booster.inplace_predict(
+                X, iteration_range=iteration_range, predict_type="value", missing=missing
+            )
+
+        return cls(feature_columns, artifacts['medians'], artifacts['mean'], artifacts['scale'], predict_fn)
+
+    def _buffers(self) -> Tuple[np.ndarray, np.ndarray]:
+        buffers = getattr(self._local, 'buffers', None)
+        if buffers is None:
+            n_features = len(self.feature_columns)
+            buffers = (np.empty(n_features, dtype=np.float64), np.empty((1, n_features), dtype=np.float32))
+            self._local.buffers = buffers
+        return buffers
+
+    def predict_one(self, values: Sequence[Any]) -> float:
+        """Score one row of raw feature values (``None`` = missing); returns P(exoplanet)."""
+        work, out = self._buffers()
+        for i, value in enumerate(values):
+            work[i] = np.nan if value is None else value
+        np.copyto(work, self.medians, where=np.isnan(work))
+        work -= self.mean
+        work /= self.scale
+        out[0] = work
+        return self.predict_fn(out)[0]
+
+    def predict_matrix(self, X: np.ndarray) -> np.ndarray:
+        """Score a float64 ``(n_rows, n_features)`` matrix with NaN for missing values."""
+        X = np.array(X, dtype=np.float64)
+        np.copyto(X, self.medians, where=np.isnan(X))
+        X -= self.mean
+        X /= self.scale
+        return self.predict_fn(X.astype(np.float32))
+
+    def predict_rows(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Score validated feature dicts in one vectorised pass."""
+        X = np.array(
+            [[np.nan if row[col] is None else row[col] for col in self.feature_columns] for row in rows],
+            dtype=np.float64,
+        ).reshape(len(rows), len(self.feature_columns))
+        return self.predict_matrix(X)
+
+
+def score_records(pipeline: CompiledPipeline, records: List[Any], start_index: int = 0,
+                  id_column: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Validate ``records`` and score the valid ones in one vectorised pass.
+
+    Returns one result per record, in input order; invalid rows become
+    ``{"index", "candidateIdentifier", "error"}`` entries.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(records)
+    valid_indices, valid_rows = [], []
+    for i, record in enumerate(records):
+        if isinstance(record, InvalidRecord):
+            row, row_error = None, record.error
+        else:
+            row, row_error = validate_record(record, pipeline.feature_columns)
+        if row_error:
+            identifier = get_identifier(record, id_column) if isinstance(record, dict) else None
+            results[i] = {"index": start_index + i, "candidateIdentifier": identifier, "error": row_error}
+        else:
+            valid_indices.append(i)
+            valid_rows.append(row)
+
+    if valid_rows:
+        probas = pipeline.predict_rows(valid_rows)
+        for i, row, proba in zip(valid_indices, valid_rows, probas):
+            results[i] = format_prediction(get_identifier(records[i], id_column), row, proba)
+    return results
+
+
+def format_prediction(custom_identifier: Any, row: Dict[str, Any], proba: float) -> Dict[str, Any]:
+    pred = int(proba >= 0.5)
+    radius_earth = row.get('koi_prad')
+    return {
+        "candidateIdentifier": custom_identifier,
+        "isExoplanet": bool(pred),
+        "confidence": round(float(proba if pred == 1 else 1 - proba), 6),
+        "details": {
+            "planetName": None,  # placeholder (could be filled if naming logic added)
+            "planetType": classify_planet_type(radius_earth),
+            "radiusEarth": radius_earth,
+            "orbitalPeriodDays": row.get('koi_period'),
+            "equilibriumTempKelvin": row.get('koi_teq'),
+        }
+    }
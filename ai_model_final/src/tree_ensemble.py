@@ -0,0 +1,137 @@
+from __future__ import annotations
+from typing import Any, Dict, Union
+import json
+import numpy as np
+
+# Flat per-node arrays, concatenated over all trees; ``roots`` holds each tree's first node.
+# XGBoost allocates a node's children consecutively, so the right child is always ``left + 1``.
+ARRAY_NAMES = ("feature", "threshold", "left", "default_left", "value", "roots")
+
+
+class TreeEnsemble:
+    """XGBoost ``binary:logistic`` tree ensemble compiled to flat NumPy arrays.
+
+    Leaves point to themselves and never step off (whatever the row's value,
+    ``+inf`` included), so every row can be pushed ``max_depth`` levels down
+    every tree at once; the leaf values are then summed per row. Only NumPy
+    is needed to evaluate it. Splits compare float32 values exactly as XGBoost
+    does, so rows land in the same leaves; margins are summed in float64, so
+    probabilities agree with ``predict_proba`` to float32 rounding.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], base_margin: float, max_depth: int,
+                 block_rows: int = 128):
+        self.feature = np.asarray(arrays["feature"], dtype=np.int32)
+        self.threshold = np.asarray(arrays["threshold"], dtype=np.float32)
+        self.left = np.asarray(arrays["left"], dtype=np.int32)
+        self.default_left = np.asarray(arrays["default_left"], dtype=np.bool_)
+        self.value = np.asarray(arrays["value"], dtype=np.float32)
+        self.roots = np.asarray(arrays["roots"], dtype=np.int32)
+        self.base_margin = float(base_margin)
+        self.max_depth = int(max_depth)
+        # Small row blocks keep the (rows x trees) working set cache-resident
+        self.block_rows = block_rows
+        self._feature = self.feature.astype(np.intp)
+        self._left = self.left.astype(np.intp)
+        self._roots = self.roots.astype(np.intp)
+        self._missing_step = (~self.default_left).astype(np.intp)
+        # Leaves are stored with a +inf threshold, which x = +inf would pass and step off;
+        # nothing compares >= NaN, so evaluate them against NaN instead
+        is_leaf = self.left == np.arange(len(self.left), dtype=np.int32)
+        self._threshold = np.where(is_leaf, np.float32(np.nan), self.threshold)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_xgboost_json(cls, model_json: Union[str, bytes, bytearray, Dict[str, Any]]) -> "TreeEnsemble":
+        """Compile the JSON produced by ``Booster.save_raw("json")``."""
+        if not isinstance(model_json, dict):
+            model_json = json.loads(bytes(model_json) if isinstance(model_json, bytearray) else model_json)
+        learner = model_json["learner"]
+        objective = learner["objective"]["name"]
+        if objective != "binary:logistic":
+            raise ValueError(f"Unsupported objective for compilation: {objective}")
+        gbtree = learner["gradient_booster"]
+        if gbtree.get("name") != "gbtree":
+            raise ValueError(f"Unsupported booster for compilation: {gbtree.get('name')}")
+        trees = gbtree["model"]["trees"]
+
+        # Honour early stopping the same way XGBClassifier.predict does
+        best_iteration = learner.get("attributes", {}).get("best_iteration")
+        if best_iteration is not None:
+            trees_per_iteration = int(gbtree["model"]["gbtree_model_param"]["num_parallel_tree"])
+            trees = trees[: (int(best_iteration) + 1) * trees_per_iteration]
+
+        parts = {name: [] for name in ARRAY_NAMES}
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported")
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            right = np.asarray(tree["right_children"], dtype=np.int32)
+            is_leaf = left == -1
+            if np.any(right[~is_leaf] != left[~is_leaf] + 1):
+                raise ValueError("Unsupported tree layout: right child does not follow left child")
+            node_ids = np.arange(len(left), dtype=np.int32)
+            conditions = np.asarray(tree["split_conditions"], dtype=np.float32)
+
+            parts["feature"].append(np.where(is_leaf, 0, tree["split_indices"]).astype(np.int32))
+            parts["threshold"].append(np.where(is_leaf, np.inf, conditions).astype(np.float32))
+            parts["left"].append(np.where(is_leaf, node_ids, left) + offset)
+            parts["default_left"].append(np.asarray(tree["default_left"], dtype=np.bool_) | is_leaf)
+            parts["value"].append(np.where(is_leaf, conditions, 0).astype(np.float32))
+            parts["roots"].append(np.array([offset], dtype=np.int32))
+            max_depth = max(max_depth, _tree_depth(left, right))
+            offset += len(left)
+
+        arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+        base_score = float(learner["learner_model_param"]["base_score"])
+        return cls(arrays, base_margin=np.log(base_score / (1.0 - base_score)), max_depth=max_depth)
+
+    @classmethod
+    def from_booster(cls, booster) -> "TreeEnsemble":
+        return cls.from_xgboost_json(booster.save_raw("json"))
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    def predict_margin(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        margins = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), self.block_rows):
+            margins[start:start + self.block_rows] = self._margin_block(X[start:start + self.block_rows])
+        return margins
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """P(class 1) per row, as float32 like ``XGBClassifier.predict_proba(X)[:, 1]``."""
+        return (1.0 / (1.0 + np.exp(-self.predict_margin(X)))).astype(np.float32)
+
+    def _margin_block(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        has_missing = np.isnan(flat).any()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        node = np.broadcast_to(self._roots, (n_rows, self.n_trees))
+        for _ in range(self.max_depth):
+            x = flat[row_offsets + self._feature[node]]
+            # NaN compares False, i.e. "left"; route it along the default branch instead
+            step = x >= self._threshold[node]
+            if has_missing:
+                step = np.where(np.isnan(x), self._missing_step[node], step)
+            node = self._left[node] + step
+        return self.value[node].sum(axis=1, dtype=np.float64) + self.base_margin
+
+
+def _tree_depth(left: np.ndarray, right: np.ndarray) -> int:
+    depth = 0
+    frontier = [0]
+    while True:
+        frontier = [child for node in frontier if left[node] != -1 for child in (left[node], right[node])]
+        if not frontier:
+            return depth
+        depth += 1
@@ -1,6 +1,8 @@
 from __future__ import annotations
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+import hashlib
 import joblib
+import numpy as np
 import os
 
 FEATURE_COLUMNS: List[str] = [
@@ -49,10 +51,61 @@ def load_artifact(path: str):
     return joblib.load(path)
 
 
-def load_artifacts(artifacts_dir: str) -> Dict[str, Any]:
-    return {
+BUNDLE_FILENAME = "exoplanet_model.bundle"
+LEGACY_FILENAMES = ("exoplanet_model.joblib", "imputer.joblib", "scaler.joblib", "feature_columns.joblib")
+
+
+def artifacts_fingerprint(artifacts_dir: str) -> str:
+    """Cheap change detector for the artifacts on disk (file sizes and mtimes)."""
+    parts = []
+    for name in (BUNDLE_FILENAME,) + LEGACY_FILENAMES:
+        path = os.path.join(artifacts_dir, name)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            parts.append(f"{name}:{stat.st_size}:{stat.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def model_version(artifacts: Dict[str, Any], fingerprint: str) -> str:
+    """Bundle checksum when loaded from a bundle, otherwise derived from the file fingerprint."""
+    if "manifest" in artifacts:
+        return artifacts["manifest"]["checksum"]["value"]
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def preprocessing_arrays(imputer, scaler, n_features: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Extract (medians, mean, scale) from a fitted SimpleImputer / StandardScaler pair."""
+    medians = np.asarray(imputer.statistics_, dtype=np.float64)
+    if not np.isnan(imputer.missing_values) or np.isnan(medians).any():
+        raise ValueError("Imputer must use NaN as missing value and have a median for every feature")
+    mean = scaler.mean_ if scaler.with_mean else np.zeros(n_features)
+    scale = scaler.scale_ if scaler.with_std else np.ones(n_features)
+    return medians, np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def load_artifacts(artifacts_dir: str, prefer_bundle: bool = True, backend: str = "xgboost") -> Dict[str, Any]:
+    """Load the model bundle if present, otherwise the four legacy joblib files.
+
+    Both forms expose ``feature_columns`` and the ``medians`` / ``mean`` /
+    ``scale`` preprocessing vectors, plus ``model`` (or the compiled ``trees``
+    for ``backend="numpy"``, which requires a bundle); the legacy form also
+    carries the fitted ``imputer`` and ``scaler``.
+    """
+    bundle_path = os.path.join(artifacts_dir, BUNDLE_FILENAME)
+    if prefer_bundle and os.path.exists(bundle_path):
+        from src.bundle import load_bundle
+
+        return load_bundle(bundle_path, FEATURE_COLUMNS, backend=backend)
+    if backend != "xgboost":
+        raise FileNotFoundError(f"Missing artifact: {bundle_path} (required for the '{backend}' backend)")
+
+    artifacts = {
         "model": load_artifact(os.path.join(artifacts_dir, "exoplanet_model.joblib")),
         "imputer": load_artifact(os.path.join(artifacts_dir, "imputer.joblib")),
         "scaler": load_artifact(os.path.join(artifacts_dir, "scaler.joblib")),
         "feature_columns": load_artifact(os.path.join(artifacts_dir, "feature_columns.joblib")),
     }
+    artifacts["medians"], artifacts["mean"], artifacts["scale"] = preprocessing_arrays(
+        artifacts["imputer"], artifacts["scaler"], len(artifacts["feature_columns"])
+    )
+    return artifacts
@@ -0,0 +1,50 @@
+import os
+import numpy as np
+import pytest
+
+from src.bundle import BundleError, load_bundle, read_manifest, save_bundle
+from src.pipeline import CompiledPipeline
+from src.utils import BUNDLE_FILENAME, FEATURE_COLUMNS, load_artifacts
+
+
+@pytest.fixture
+def bundle_path(artifacts, tmp_path):
+    path = str(tmp_path / BUNDLE_FILENAME)
+    save_bundle(path, artifacts['model'], artifacts['medians'], artifacts['mean'], artifacts['scale'],
+                artifacts['feature_columns'], training={"n_train": 1})
+    return path
+
+
+def test_bundle_round_trip_matches_joblib_artifacts(artifacts, bundle_path, catalogue):
+    bundled = load_artifacts(os.path.dirname(bundle_path))
+
+    assert bundled['manifest']['training'] == {"n_train": 1}
+    assert isinstance(bundled['medians'], np.memmap)
+    assert np.array_equal(bundled['medians'], artifacts['medians'])
+    assert np.array_equal(bundled['scale'], artifacts['scale'])
+
+    X = catalogue[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    expected = CompiledPipeline.from_artifacts(artifacts).predict_matrix(X)
+    assert np.array_equal(CompiledPipeline.from_artifacts(bundled).predict_matrix(X), expected)
+
+
+def test_bundle_sections_are_aligned(bundle_path):
+    manifest = read_manifest(bundle_path)
+    assert all(section['offset'] % 64 == 0 for section in manifest['sections'].values())
+    assert manifest['_data_start'] % 64 == 0
+
+
+def test_bundle_rejects_corrupted_data(bundle_path):
+    with open(bundle_path, 'r+b') as fh:
+        fh.seek(-1, os.SEEK_END)
+        last = fh.read(1)
+        fh.seek(-1, os.SEEK_END)
+        fh.write(bytes([last[0] ^ 0xFF]))
+
+    with pytest.raises(BundleError, match='Checksum'):
+        load_bundle(bundle_path, FEATURE_COLUMNS)
+
+
+def test_bundle_rejects_different_feature_order(bundle_path):
+    with pytest.raises(BundleError, match='feature order'):
+        load_bundle(bundle_path, list(reversed(FEATURE_COLUMNS)))
@@ -0,0 +1,108 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from src import cache as cache_module
+from src.cache import PredictionCache, feature_key
+from src.utils import FEATURE_COLUMNS, LEGACY_FILENAMES
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    return clock
+
+
+def test_feature_key_canonicalises_numbers_and_missing_values():
+    assert feature_key('v1', [2, 0.0, None]) == feature_key('v1', [2.0, -0.0, float('nan')])
+    assert feature_key('v1', [None, np.nan]) == feature_key('v1', [float('nan'), None])
+    assert feature_key('v1', [2.0, 1.0]) != feature_key('v1', [1.0, 2.0])
+    assert feature_key('v1', [2.0]) != feature_key('v2', [2.0])
+
+
+def test_cache_counts_hits_and_misses():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    assert cache.get(b'a') is None
+    cache.put(b'a', 0.25)
+    assert cache.get(b'a') == 0.25
+    assert cache.get(b'a') == 0.25
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+    assert stats['hit_rate'] == round(2 / 3, 4)
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put(b'a', 0.1)
+    cache.put(b'b', 0.2)
+    cache.get(b'a')
+    cache.put(b'c', 0.3)
+
+    assert cache.get(b'b') is None
+    assert cache.get(b'a') == 0.1
+    assert cache.get(b'c') == 0.3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_expires_entries_after_ttl(clock):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    cache.put(b'a', 0.1)
+
+    clock.now += 59.9
+    assert cache.get(b'a') == 0.1
+    clock.now += 0.1
+    assert cache.get(b'a') is None
+
+    stats = cache.stats()
+    assert (stats['expirations'], stats['entries'], stats['misses']) == (1, 0, 1)
+
+
+def test_cache_clear_drops_every_entry():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    cache.put(b'a', 0.1)
+    cache.put(b'b', 0.2)
+    cache.clear()
+
+    assert cache.get(b'a') is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_predict_cache_is_cleared_when_the_model_version_changes(scoring_app, artifacts_dir, tmp_path,
+                                                                  catalogue, monkeypatch):
+    for name in LEGACY_FILENAMES:
+        shutil.copy(os.path.join(artifacts_dir, name), tmp_path / name)
+    monkeypatch.setattr(scoring_app, 'ARTIFACTS_DIR', str(tmp_path))
+    monkeypatch.setattr(scoring_app, 'ARTIFACTS_CHECK_INTERVAL', 1e-9)
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    monkeypatch.setattr(scoring_app, 'prediction_cache', cache)
+    payload = {col: float(catalogue[col].iloc[0]) for col in FEATURE_COLUMNS}
+
+    with scoring_app.app.test_client() as client:
+        first = client.post('/predict', json=payload)
+        second = client.post('/predict', json=payload)
+        old_version = scoring_app.model_state['version']
+        assert cache.stats()['hits'] == 1
+
+        stat = os.stat(tmp_path / 'scaler.joblib')
+        os.utime(tmp_path / 'scaler.joblib', ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        third = client.post('/predict', json=payload)
+
+    assert first.get_json() == second.get_json() == third.get_json()
+    assert scoring_app.model_state['version'] != old_version
+    stats = cache.stats()
+    assert stats['invalidations'] == 1
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 1)
@@ -0,0 +1,67 @@
+import threading
+
+import numpy as np
+import pytest
+
+import app as model_app
+from src.microbatch import MicroBatcher
+from src.utils import FEATURE_COLUMNS
+
+
+def _submit_together(submit, rows):
+    """Submit ``rows`` from concurrent threads; returns one result or exception per row."""
+    results = [None] * len(rows)
+    barrier = threading.Barrier(len(rows))
+
+    def run(i):
+        barrier.wait()
+        try:
+            results[i] = submit(rows[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_bad_row_fails_only_its_own_submit():
+    # A long wait makes sure every row lands in the same batch
+    batcher = MicroBatcher(lambda X: np.nansum(X, axis=1), max_batch_size=8, max_wait_ms=200)
+
+    results = _submit_together(batcher.submit, [[1.0, 2.0], ["abc", 1.0], [3.0, None]])
+
+    assert results[0] == 3.0
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 3.0
+
+
+@pytest.fixture
+def microbatched_app(artifacts_dir, monkeypatch):
+    monkeypatch.setattr(model_app, "ARTIFACTS_DIR", artifacts_dir)
+    monkeypatch.setattr(model_app, "MICROBATCH_ENABLED", True)
+    monkeypatch.setattr(model_app, "MICROBATCH_MAX_WAIT_MS", 200.0)
+    monkeypatch.setattr(model_app, "prediction_cache", None)
+    monkeypatch.setitem(model_app.model_state, "objects", None)
+    monkeypatch.setitem(model_app.model_state, "batcher", None)
+    return model_app.app
+
+
+def test_predict_rejects_bad_row_without_failing_concurrent_requests(microbatched_app, catalogue):
+    good = {col: float(catalogue[col].iloc[0]) for col in FEATURE_COLUMNS}
+    bad = dict(good, koi_period="abc")
+
+    def post(payload):
+        with microbatched_app.test_client() as client:
+            response = client.post("/predict", json=payload)
+            return response.status_code, response.get_json()
+
+    results = _submit_together(post, [good, bad, good])
+
+    assert [status for status, _ in results] == [200, 400, 200]
+    assert "koi_period" in results[1][1]["error"]
+    assert results[0][1] == results[2][1]
+    assert model_app.model_state["batcher"].metrics()["rows"] == 2
@@ -0,0 +1,103 @@
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import app as model_app
+from src.utils import FEATURE_COLUMNS, LEGACY_FILENAMES, artifacts_fingerprint
+
+
+@pytest.fixture
+def reloadable_app(scoring_app, artifacts_dir, tmp_path, monkeypatch):
+    """scoring_app on a private copy of the joblib artifacts, checked for changes on every request."""
+    for name in LEGACY_FILENAMES:
+        shutil.copy(os.path.join(artifacts_dir, name), tmp_path / name)
+    monkeypatch.setattr(scoring_app, 'ARTIFACTS_DIR', str(tmp_path))
+    monkeypatch.setattr(scoring_app, 'ARTIFACTS_CHECK_INTERVAL', 1e-9)
+    return scoring_app
+
+
+def _touch(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_ready_is_503_until_the_model_loads(scoring_app, artifacts_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(scoring_app, 'ARTIFACTS_DIR', str(tmp_path))
+
+    with scoring_app.app.test_client() as client:
+        failed = client.get('/ready')
+        monkeypatch.setattr(scoring_app, 'ARTIFACTS_DIR', artifacts_dir)
+        loaded = client.get('/ready')
+
+    assert failed.status_code == 503
+    assert failed.get_json()['status'] == 'unavailable'
+    assert 'Missing artifact' in failed.get_json()['error']
+    assert loaded.status_code == 200
+    assert loaded.get_json()['status'] == 'ready'
+    assert loaded.get_json()['modelVersion'] == scoring_app.model_state['version']
+    assert scoring_app.model_state['error'] is None
+
+
+def test_concurrent_first_requests_load_the_artifacts_once(scoring_app, monkeypatch):
+    calls = []
+    load_artifacts = model_app.load_artifacts
+
+    def slow_load_artifacts(*args, **kwargs):
+        calls.append(threading.get_ident())
+        time.sleep(0.2)
+        return load_artifacts(*args, **kwargs)
+
+    monkeypatch.setattr(scoring_app, 'load_artifacts', slow_load_artifacts)
+    n_threads = 8
+    barrier = threading.Barrier(n_threads)
+    statuses = []
+
+    def probe():
+        barrier.wait()
+        with scoring_app.app.test_client() as client:
+            statuses.append(client.get('/ready').status_code)
+
+    threads = [threading.Thread(target=probe) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200] * n_threads
+    assert len(calls) == 1
+
+
+def test_hot_reload_picks_up_changed_artifacts(reloadable_app, tmp_path):
+    with reloadable_app.app.test_client() as client:
+        client.get('/ready')
+        old_pipeline, old_version = reloadable_app.get_pipeline()
+        _touch(tmp_path / 'scaler.joblib')
+        response = client.get('/ready')
+
+    new_pipeline, new_version = reloadable_app.get_pipeline()
+    assert response.status_code == 200
+    assert new_version != old_version
+    assert new_pipeline is not old_pipeline
+    assert response.get_json()['modelVersion'] == new_version
+
+
+def test_failed_hot_reload_keeps_serving_the_old_model(reloadable_app, tmp_path, catalogue):
+    payload = {col: float(catalogue[col].iloc[0]) for col in FEATURE_COLUMNS}
+
+    with reloadable_app.app.test_client() as client:
+        before = client.post('/predict', json=payload)
+        version = reloadable_app.model_state['version']
+        (tmp_path / 'imputer.joblib').write_bytes(b'not a pickle')
+        after = client.post('/predict', json=payload)
+        ready = client.get('/ready')
+
+    assert before.status_code == 200
+    assert after.status_code == 200
+    assert after.get_json() == before.get_json()
+    assert ready.status_code == 200
+    assert reloadable_app.model_state['version'] == version
+    # The change was seen, the reload failed, and the old model stayed in place
+    assert reloadable_app.model_state['fingerprint'] != artifacts_fingerprint(str(tmp_path))
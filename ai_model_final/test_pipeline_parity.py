@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from src.pipeline import CompiledPipeline
+
+
+def reference_probabilities(artifacts, features: pd.DataFrame) -> np.ndarray:
+    """The original DataFrame -> imputer -> scaler -> predict_proba pipeline."""
+    X_imputed = artifacts['imputer'].transform(features)
+    X_scaled = artifacts['scaler'].transform(X_imputed)
+    return artifacts['model'].predict_proba(X_scaled)[:, 1]
+
+
+def test_single_row_fast_path_is_bit_identical(artifacts, catalogue):
+    feature_columns = artifacts['feature_columns']
+    features = catalogue[feature_columns]
+    expected = reference_probabilities(artifacts, features)
+
+    pipeline = CompiledPipeline.from_artifacts(artifacts)
+    rows = features.astype(object).where(features.notna(), None).values.tolist()
+    actual = np.array([pipeline.predict_one(row) for row in rows], dtype=expected.dtype)
+
+    mismatches = np.flatnonzero(actual != expected)
+    assert mismatches.size == 0, f"{mismatches.size} rows differ, first at index {mismatches[:5]}"
+
+
+def test_batch_fast_path_is_bit_identical(artifacts, catalogue):
+    feature_columns = artifacts['feature_columns']
+    features = catalogue[feature_columns]
+    expected = reference_probabilities(artifacts, features)
+
+    pipeline = CompiledPipeline.from_artifacts(artifacts)
+    rows = features.astype(object).where(features.notna(), None).to_dict('records')
+
+    assert np.array_equal(pipeline.predict_rows(rows), expected)
+    assert np.array_equal(pipeline.predict_matrix(features.to_numpy(dtype=np.float64)), expected)
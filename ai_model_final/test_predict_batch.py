@@ -0,0 +1,94 @@
+import pytest
+
+from src.pipeline import extract_records
+from src.utils import FEATURE_COLUMNS
+
+
+@pytest.fixture
+def candidates(catalogue):
+    rows = catalogue[FEATURE_COLUMNS].head(5).astype(object)
+    records = rows.where(rows.notna(), None).to_dict(orient='records')
+    for i, record in enumerate(records):
+        record['customIdentifier'] = f'candidate-{i}'
+    return records
+
+
+def test_extract_records_accepts_list_candidates_and_columns():
+    rows = [{'koi_period': 1.5, 'koi_prad': None}, {'koi_period': 2.0, 'koi_prad': 3.0}]
+
+    assert extract_records(rows) == (rows, None)
+    assert extract_records({'candidates': rows}) == (rows, None)
+    assert extract_records({'columns': {'koi_period': [1.5, 2.0], 'koi_prad': [None, 3.0]}}) == (rows, None)
+
+
+@pytest.mark.parametrize('payload', [
+    {'columns': {'koi_period': [1.0, 2.0], 'koi_prad': [1.0]}},
+    {'columns': {'koi_period': 1.0}},
+    {'columns': {}},
+    {'candidates': {'koi_period': 1.0}},
+    {'rows': []},
+    'koi_period',
+])
+def test_extract_records_rejects_malformed_payloads(payload):
+    records, error = extract_records(payload)
+
+    assert records is None
+    assert error
+
+
+def test_batch_list_and_column_payloads_score_the_same(scoring_app, candidates):
+    columns = {key: [record[key] for record in candidates] for key in candidates[0]}
+
+    with scoring_app.app.test_client() as client:
+        as_list = client.post('/predict/batch', json=candidates)
+        as_columns = client.post('/predict/batch', json={'columns': columns})
+
+    assert as_list.status_code == 200
+    assert as_list.get_json()['count'] == len(candidates)
+    assert as_list.get_json()['errors'] == 0
+    assert as_columns.get_json() == as_list.get_json()
+
+
+def test_batch_results_match_predict_row_for_row(scoring_app, candidates):
+    with scoring_app.app.test_client() as client:
+        batch = client.post('/predict/batch', json={'candidates': candidates}).get_json()
+        single = [client.post('/predict', json=record).get_json() for record in candidates]
+
+    assert batch['results'] == single
+
+
+def test_batch_rejects_malformed_column_payload(scoring_app):
+    with scoring_app.app.test_client() as client:
+        response = client.post('/predict/batch', json={'columns': {'koi_period': [1.0, 2.0], 'koi_prad': [1.0]}})
+
+    assert response.status_code == 400
+    assert 'same length' in response.get_json()['error']
+
+
+def test_batch_rejects_more_than_max_batch_size_rows(scoring_app, candidates, monkeypatch):
+    monkeypatch.setattr(scoring_app, 'MAX_BATCH_SIZE', len(candidates) - 1)
+
+    with scoring_app.app.test_client() as client:
+        response = client.post('/predict/batch', json=candidates)
+
+    assert response.status_code == 413
+    assert scoring_app.model_state['objects'] is None
+
+
+def test_batch_reports_row_errors_without_failing_the_batch(scoring_app, candidates):
+    records = [candidates[0], dict(candidates[1], koi_period='abc'), 'not a candidate', candidates[2]]
+
+    with scoring_app.app.test_client() as client:
+        response = client.post('/predict/batch', json=records)
+        expected = [client.post('/predict', json=record).get_json() for record in (candidates[0], candidates[2])]
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['count'] == 4
+    assert body['errors'] == 2
+    assert body['results'][1] == {
+        'index': 1, 'candidateIdentifier': 'candidate-1', 'error': "Feature 'koi_period' must be a number or null"
+    }
+    assert body['results'][2]['index'] == 2
+    assert 'error' in body['results'][2]
+    assert [body['results'][0], body['results'][3]] == expected
@@ -1,22 +1,18 @@
 import os
-import pandas as pd
 from src.utils import load_artifacts
+from src.pipeline import CompiledPipeline
 
 ARTIFACTS_DIR = 'artifacts'
 
 def main():
     artifacts = load_artifacts(ARTIFACTS_DIR)
-    model = artifacts['model']
-    imputer = artifacts['imputer']
-    scaler = artifacts['scaler']
-    feature_columns = artifacts['feature_columns']
+    pipeline = CompiledPipeline.from_artifacts(artifacts)
 
     # Build a dummy row with None -> will be imputed (not ideal for real use but tests pipeline)
-    dummy = {c: None for c in feature_columns}
-    df = pd.DataFrame([dummy], columns=feature_columns)
-    X_imp = imputer.transform(df)
-    X_scaled = scaler.transform(X_imp)
-    proba = model.predict_proba(X_scaled)[0, 1]
+    dummy = [None] * len(artifacts['feature_columns'])
+    proba = pipeline.predict_one(dummy)
+    if 'manifest' in artifacts:
+        print({"bundle_checksum": artifacts['manifest']['checksum']['value']})
     print({"raw_probability_exoplanet": float(proba)})
 
 if __name__ == '__main__':
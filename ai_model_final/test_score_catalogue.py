@@ -0,0 +1,65 @@
+import io
+import json
+import socket
+import threading
+
+import pytest
+from werkzeug.serving import make_server
+
+import app as model_app
+from score_catalogue import score_file
+from src.utils import FEATURE_COLUMNS
+
+
+@pytest.fixture
+def stream_server(artifacts_dir, monkeypatch):
+    monkeypatch.setattr(model_app, "ARTIFACTS_DIR", artifacts_dir)
+    monkeypatch.setitem(model_app.model_state, "objects", None)
+    server = make_server("127.0.0.1", 0, model_app.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/predict/stream"
+    server.shutdown()
+
+
+def test_streams_body_larger_than_socket_buffers(stream_server, catalogue, tmp_path):
+    # ~3 MB of CSV in, ~25 MB of NDJSON out: far more than the sockets buffer, so the
+    # upload can only finish if results are read while it is still running
+    rows = catalogue[FEATURE_COLUMNS]
+    copies = 12
+    path = tmp_path / "catalogue.csv"
+    with open(path, "w") as fh:
+        for i in range(copies):
+            rows.to_csv(fh, index=False, header=i == 0)
+    with socket.socket() as sock:
+        buffered = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) + sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    assert path.stat().st_size > 8 * buffered
+    expected_rows = len(rows) * copies
+
+    out = io.StringIO()
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(score_file(stream_server, str(path), out, chunk_rows=500)), daemon=True
+    )
+    worker.start()
+    worker.join(timeout=120)
+
+    assert not worker.is_alive(), "score_file deadlocked"
+    assert result["rows"] == expected_rows
+    assert result["errors"] == 0
+    assert result["first_result_ms"] < result["elapsed_ms"]
+    lines = out.getvalue().splitlines()
+    assert len(lines) == expected_rows
+    assert all("isExoplanet" in json.loads(line) for line in (lines[0], lines[-1]))
+
+
+def test_query_parameters_are_url_encoded(stream_server, tmp_path):
+    path = tmp_path / "one.ndjson"
+    # Unencoded, the space and '&' would split or corrupt the query string
+    path.write_text(json.dumps({"koi_period": 10.5, "planet name&id": "K00752.01"}) + "\n")
+
+    out = io.StringIO()
+    result = score_file(stream_server, str(path), out, id_column="planet name&id")
+
+    assert result["rows"] == 1
+    assert json.loads(out.getvalue())["candidateIdentifier"] == "K00752.01"
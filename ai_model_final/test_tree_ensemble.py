@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+from src.bundle import save_bundle
+from src.pipeline import CompiledPipeline
+from src.tree_ensemble import TreeEnsemble
+from src.utils import BUNDLE_FILENAME, load_artifacts
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def scaled_features(artifacts, catalogue):
+    """Training CSV after imputation and scaling, as float32 (what the booster sees)."""
+    X_imputed = artifacts['imputer'].transform(catalogue[artifacts['feature_columns']])
+    return artifacts['scaler'].transform(X_imputed).astype(np.float32)
+
+
+@pytest.fixture(scope='module')
+def trees(artifacts):
+    return TreeEnsemble.from_booster(artifacts['model'].get_booster())
+
+
+def test_compiled_ensemble_matches_predict_proba(artifacts, trees, scaled_features):
+    expected = artifacts['model'].predict_proba(scaled_features)[:, 1]
+    actual = trees.predict_proba(scaled_features)
+
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
+    assert np.array_equal(actual >= 0.5, expected >= 0.5)
+
+
+def test_compiled_ensemble_follows_default_branch_for_missing_values(artifacts, trees, scaled_features):
+    X = scaled_features[:500].copy()
+    rng = np.random.default_rng(0)
+    X[rng.random(X.shape) < 0.2] = np.nan
+
+    expected = artifacts['model'].predict_proba(X)[:, 1]
+    np.testing.assert_allclose(trees.predict_proba(X), expected, rtol=0, atol=1e-6)
+
+
+def test_compiled_ensemble_matches_booster_for_infinite_values(artifacts, trees, scaled_features):
+    X = scaled_features[:500].copy()
+    rng = np.random.default_rng(0)
+    X[rng.random(X.shape) < 0.1] = np.inf
+    X[rng.random(X.shape) < 0.1] = -np.inf
+    # Feature 0 is what leaves compare against, so cover +inf there on every row
+    X[::2, 0] = np.inf
+    X[1::2, 0] = -np.inf
+
+    expected = artifacts['model'].predict_proba(X)[:, 1]
+    np.testing.assert_allclose(trees.predict_proba(X), expected, rtol=0, atol=1e-6)
+
+
+def test_numpy_backend_scores_without_xgboost(artifacts, trees, catalogue, tmp_path):
+    save_bundle(str(tmp_path / BUNDLE_FILENAME), artifacts['model'], artifacts['medians'], artifacts['mean'],
+                artifacts['scale'], artifacts['feature_columns'], trees=trees)
+
+    X = catalogue[artifacts['feature_columns']].to_numpy(dtype=np.float64)
+    expected = CompiledPipeline.from_artifacts(artifacts).predict_matrix(X)
+    compiled = CompiledPipeline.from_artifacts(load_artifacts(str(tmp_path), backend='numpy'))
+    np.testing.assert_allclose(compiled.predict_matrix(X), expected, rtol=0, atol=1e-6)
+
+    script = (
+        "import sys\n"
+        "from src.utils import load_artifacts\n"
+        "from src.pipeline import CompiledPipeline\n"
+        f"pipeline = CompiledPipeline.from_artifacts(load_artifacts({str(tmp_path)!r}, backend='numpy'))\n"
+        "pipeline.predict_one([None] * len(pipeline.feature_columns))\n"
+        "assert 'xgboost' not in sys.modules, 'xgboost was imported'\n"
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BASE_DIR, check=True)
@@ -1,7 +1,10 @@
 import os
+import time
 import argparse
 import joblib
 import pandas as pd
+import sklearn
+import xgboost
 from typing import Tuple
 from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
@@ -9,7 +12,9 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import classification_report, roc_auc_score, confusion_matrix
 from xgboost import XGBClassifier
 
-from src.utils import FEATURE_COLUMNS
+from src.utils import BUNDLE_FILENAME, FEATURE_COLUMNS, preprocessing_arrays
+from src.bundle import save_bundle
+from src.tree_ensemble import TreeEnsemble
 
 
 def load_and_filter_dataset(path: str) -> pd.DataFrame:
@@ -32,7 +37,8 @@ def build_datasets(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series, pd.DataFr
     return X_train, X_test, y_train, y_test
 
 
-def preprocess_and_train(X_train: pd.DataFrame, X_test: pd.DataFrame, y_train, y_test, artifacts_dir: str):
+def preprocess_and_train(X_train: pd.DataFrame, X_test: pd.DataFrame, y_train, y_test, artifacts_dir: str,
+                         write_joblib: bool = True):
     imputer = SimpleImputer(strategy='median')
     scaler = StandardScaler()
 
@@ -59,6 +65,7 @@ def preprocess_and_train(X_train: pd.DataFrame, X_test: pd.DataFrame, y_train, y
     proba = model.predict_proba(X_test_scaled)[:, 1]
     preds = (proba >= 0.5).astype(int)
     print("Classification Report:\n", classification_report(y_test, preds, digits=4))
+    auc = None
     try:
         auc = roc_auc_score(y_test, proba)
         print(f"ROC AUC: {auc:.4f}")
@@ -67,17 +74,35 @@ def preprocess_and_train(X_train: pd.DataFrame, X_test: pd.DataFrame, y_train, y
     print("Confusion Matrix:\n", confusion_matrix(y_test, preds))
 
     os.makedirs(artifacts_dir, exist_ok=True)
-    joblib.dump(model, os.path.join(artifacts_dir, 'exoplanet_model.joblib'))
-    joblib.dump(imputer, os.path.join(artifacts_dir, 'imputer.joblib'))
-    joblib.dump(scaler, os.path.join(artifacts_dir, 'scaler.joblib'))
-    joblib.dump(FEATURE_COLUMNS, os.path.join(artifacts_dir, 'feature_columns.joblib'))
-    print(f"Artifacts saved to {artifacts_dir}")
+    if write_joblib:
+        joblib.dump(model, os.path.join(artifacts_dir, 'exoplanet_model.joblib'))
+        joblib.dump(imputer, os.path.join(artifacts_dir, 'imputer.joblib'))
+        joblib.dump(scaler, os.path.join(artifacts_dir, 'scaler.joblib'))
+        joblib.dump(FEATURE_COLUMNS, os.path.join(artifacts_dir, 'feature_columns.joblib'))
+
+    medians, mean, scale = preprocessing_arrays(imputer, scaler, len(FEATURE_COLUMNS))
+    manifest = save_bundle(
+        os.path.join(artifacts_dir, BUNDLE_FILENAME), model, medians, mean, scale, FEATURE_COLUMNS,
+        training={
+            "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "n_train": int(len(X_train)),
+            "n_test": int(len(X_test)),
+            "roc_auc": None if auc is None else round(float(auc), 6),
+            "params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool))},
+            "xgboost_version": xgboost.__version__,
+            "sklearn_version": sklearn.__version__,
+        },
+        trees=TreeEnsemble.from_booster(model.get_booster()),
+    )
+    print(f"Artifacts saved to {artifacts_dir} (bundle checksum {manifest['checksum']['value'][:12]})")
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Train Exoplanet Classifier')
     parser.add_argument('--data', type=str, required=True, help='Path to NASA Exoplanet 2.csv dataset')
     parser.add_argument('--artifacts', type=str, default='artifacts', help='Directory to save artifacts')
+    parser.add_argument('--skip-joblib', action='store_true',
+                        help='Only write the model bundle, not the legacy joblib pickles')
     return parser.parse_args()
 
 
@@ -85,7 +110,7 @@ def main():
     args = parse_args()
     df = load_and_filter_dataset(args.data)
     X_train, X_test, y_train, y_test = build_datasets(df)
-    preprocess_and_train(X_train, X_test, y_train, y_test, args.artifacts)
+    preprocess_and_train(X_train, X_test, y_train, y_test, args.artifacts, write_joblib=not args.skip_joblib)
 
 
 if __name__ == '__main__':
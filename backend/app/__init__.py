@@ -1,25 +1,86 @@
 from flask import Flask
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from app.config import Config
 from app.database import init_db
+from app.models.prediction_stats import PredictionStats
+from app.utils.metrics import register_provider
+from app.utils.ml_client import create_ml_client
+from app.utils.jobs import JobRunner
+from app.utils.passwords import password_hasher
+from app.utils.rate_limit import RateLimiter
+from app.utils.trigram_index import CatalogueIndex
+from app.utils.user_cache import user_cache
+from app.utils.write_behind import WriteBehindBuffer
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Take the client IP and scheme from the headers set by TRUSTED_PROXIES reverse proxies
+    if app.config['TRUSTED_PROXIES'] > 0:
+        trusted = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted, x_proto=trusted)
+    
     # Enable CORS for all origins
     CORS(app, origins="*", supports_credentials=True)
     
+    # bcrypt runs in a small process pool, forked before the database client or any other thread starts
+    password_hasher.configure(
+        rounds=app.config['BCRYPT_ROUNDS'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        queue_timeout=app.config['PASSWORD_HASH_QUEUE_TIMEOUT']
+    )
+    password_hasher.start()
+    register_provider('password_hasher', password_hasher.metrics)
+    
     # Initialize database connection
     init_db(app)
     
+    # Users loaded by token_required are reused for USER_CACHE_TTL seconds (0 disables the cache)
+    user_cache.ttl_seconds = app.config['USER_CACHE_TTL']
+    
+    # Shared ML client (one per worker process): pooled HTTP to the ML API, or the model in-process
+    ml_client = create_ml_client(app.config)
+    app.extensions['ml_client'] = ml_client
+    register_provider('ml_client', ml_client.metrics)
+    
+    # Background pool for asynchronous prediction jobs
+    job_runner = JobRunner.from_config(app)
+    app.extensions['job_runner'] = job_runner
+    register_provider('prediction_jobs', job_runner.metrics)
+    
+    # Optional write-behind buffer for prediction history inserts
+    if app.config['PREDICTION_WRITE_BEHIND']:
+        prediction_writer = WriteBehindBuffer.from_config(
+            'predictions', app.config, on_written=PredictionStats.record_many
+        )
+        app.extensions['prediction_writer'] = prediction_writer
+        register_provider('prediction_writer', prediction_writer.metrics)
+    
+    # Trigram index of dataset designations for fuzzy search, built in the background
+    if app.config['CATALOGUE_INDEX_ENABLED']:
+        catalogue_index = CatalogueIndex.from_config(app.config)
+        catalogue_index.start()
+        app.extensions['catalogue_index'] = catalogue_index
+        register_provider('catalogue_index', catalogue_index.metrics)
+    
+    # Token-bucket limits on login, predictions and search (routes opt in with @rate_limit)
+    if app.config['RATE_LIMIT_ENABLED']:
+        rate_limiter = RateLimiter.from_config(app.config)
+        app.extensions['rate_limiter'] = rate_limiter
+        register_provider('rate_limiter', rate_limiter.metrics)
+    
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.predictions import predictions_bp
     from app.routes.datasets import datasets_bp
+    from app.routes.metrics import metrics_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
     app.register_blueprint(predictions_bp, url_prefix='/api/v1/predictions')
     app.register_blueprint(datasets_bp, url_prefix='/api/v1/datasets')
+    app.register_blueprint(metrics_bp, url_prefix='/api/v1/metrics')
     
     return app
\ No newline at end of file
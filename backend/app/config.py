@@ -9,8 +9,84 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-for-exoplanet-platform'
     JWT_ACCESS_TOKEN_EXPIRES_IN = 24 * 60 * 60  # 24 hours in seconds
     
+    # Number of reverse proxies in front of the app whose X-Forwarded-For/-Proto headers are trusted
+    # (0 trusts none; a client could otherwise pick its own IP by sending the header)
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES', 0))
+    
+    # Seconds token_required may reuse a loaded user (per worker process; 0 disables the cache)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+    # Build the user from the token's signed profile claims and skip the lookup entirely
+    AUTH_TRUST_TOKEN_CLAIMS = os.environ.get('AUTH_TRUST_TOKEN_CLAIMS', 'False').lower() == 'true'
+    
+    # bcrypt cost factor for new hashes; stored hashes with another cost are re-hashed at the next login
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    # Hashing runs in a dedicated process pool (per worker process; 0 hashes on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 32))  # running + queued hashes
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))  # seconds to wait for a slot, then 503
+    
+    # Token-bucket rate limits as '<requests>/<second|minute|hour|day>[,burst=<n>]' ('' or 0 disables one);
+    # counted per user on authenticated endpoints and per client IP on login and signup.
+    # Off by default: behind a reverse proxy every client has the proxy's IP unless TRUSTED_PROXIES is set
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'False').lower() == 'true'
+    RATE_LIMIT_STORE = os.environ.get('RATE_LIMIT_STORE', 'memory').lower()  # 'memory' (per worker process) or 'mongo' (shared)
+    RATE_LIMIT_MAX_BUCKETS = int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', 100000))  # memory store only
+    RATE_LIMIT_LOGIN = os.environ.get('RATE_LIMIT_LOGIN', '10/minute')
+    RATE_LIMIT_PREDICT = os.environ.get('RATE_LIMIT_PREDICT', '60/minute,burst=20')
+    RATE_LIMIT_JOBS = os.environ.get('RATE_LIMIT_JOBS', '10000/hour,burst=5000')  # counted in candidates, not requests
+    RATE_LIMIT_SEARCH = os.environ.get('RATE_LIMIT_SEARCH', '120/minute,burst=30')
+    
     # External ML API configuration
     ML_API_URL = os.environ.get('ML_API_URL') or 'https://your-ml-api.com/predict'
+    ML_API_BATCH_URL = os.environ.get('ML_API_BATCH_URL')  # Defaults to ML_API_URL + '/batch'
     ML_API_TIMEOUT = int(os.environ.get('ML_API_TIMEOUT', 30))  # seconds
+    ML_API_CONNECT_TIMEOUT = float(os.environ.get('ML_API_CONNECT_TIMEOUT', 5))  # seconds
+    ML_API_READ_TIMEOUT = float(os.environ.get('ML_API_READ_TIMEOUT', ML_API_TIMEOUT))  # seconds
+    ML_API_POOL_SIZE = int(os.environ.get('ML_API_POOL_SIZE', 10))  # keep-alive connections per worker
     ML_API_KEY = os.environ.get('ML_API_KEY')  # Optional API key for authentication
-    USE_FALLBACK_PREDICTIONS = os.environ.get('USE_FALLBACK_PREDICTIONS', 'False').lower() == 'true'
\ No newline at end of file
+    
+    # Resilience: bounded retries for connection errors/502-504, error-rate circuit breaker, optional hedging
+    ML_API_MAX_RETRIES = int(os.environ.get('ML_API_MAX_RETRIES', 2))
+    ML_API_RETRY_BACKOFF = float(os.environ.get('ML_API_RETRY_BACKOFF', 0.1))  # base delay in seconds (jittered, doubled per retry)
+    ML_API_BREAKER_ERROR_RATE = float(os.environ.get('ML_API_BREAKER_ERROR_RATE', 0.5))  # opens at this error rate...
+    ML_API_BREAKER_MIN_REQUESTS = int(os.environ.get('ML_API_BREAKER_MIN_REQUESTS', 10))  # ...over at least this many calls
+    ML_API_BREAKER_WINDOW = float(os.environ.get('ML_API_BREAKER_WINDOW', 30))  # seconds of history considered
+    ML_API_BREAKER_RESET_TIMEOUT = float(os.environ.get('ML_API_BREAKER_RESET_TIMEOUT', 30))  # seconds open before a probe
+    ML_API_HEDGE_URL = os.environ.get('ML_API_HEDGE_URL')  # Second ML replica; hedging is off when unset
+    ML_API_HEDGE_MIN_DELAY_MS = float(os.environ.get('ML_API_HEDGE_MIN_DELAY_MS', 50))  # lower bound on the p95 hedge delay
+    
+    # 'remote' calls ML_API_URL over HTTP; 'local' loads the ai_model_final artifacts in-process
+    ML_INFERENCE_MODE = os.environ.get('ML_INFERENCE_MODE', 'remote').lower()
+    ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR') or os.path.join(os.path.dirname(__file__), '..', '..', 'ai_model_final')
+    ML_ARTIFACTS_DIR = os.environ.get('ML_ARTIFACTS_DIR')  # Defaults to <ML_MODEL_DIR>/artifacts
+    ML_INFERENCE_BACKEND = os.environ.get('ML_INFERENCE_BACKEND', 'xgboost')  # 'xgboost' or 'numpy' (local mode)
+    USE_FALLBACK_PREDICTIONS = os.environ.get('USE_FALLBACK_PREDICTIONS', 'False').lower() == 'true'
+    
+    # Asynchronous prediction jobs (POST /api/v1/predictions/jobs)
+    PREDICTION_JOB_WORKERS = int(os.environ.get('PREDICTION_JOB_WORKERS', 2))  # background threads per worker process
+    PREDICTION_JOB_BATCH_SIZE = int(os.environ.get('PREDICTION_JOB_BATCH_SIZE', 100))  # candidates per ML batch call
+    PREDICTION_JOB_MAX_CANDIDATES = int(os.environ.get('PREDICTION_JOB_MAX_CANDIDATES', 5000))
+    # Longest allowed long-poll, seconds; each waiting poll holds a request worker, so only raise it with threaded/async workers
+    PREDICTION_JOB_MAX_WAIT = float(os.environ.get('PREDICTION_JOB_MAX_WAIT', 5))
+    
+    # Write-behind prediction history: respond first, batch the inserts in the background
+    PREDICTION_WRITE_BEHIND = os.environ.get('PREDICTION_WRITE_BEHIND', 'False').lower() == 'true'
+    PREDICTION_WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get('PREDICTION_WRITE_BEHIND_QUEUE_SIZE', 10000))
+    PREDICTION_WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('PREDICTION_WRITE_BEHIND_BATCH_SIZE', 500))
+    PREDICTION_WRITE_BEHIND_FLUSH_MS = float(os.environ.get('PREDICTION_WRITE_BEHIND_FLUSH_MS', 200))
+    PREDICTION_WRITE_BEHIND_ENQUEUE_TIMEOUT_MS = float(os.environ.get('PREDICTION_WRITE_BEHIND_ENQUEUE_TIMEOUT_MS', 50))  # then write synchronously
+    
+    # Seconds a user's prediction history total may be served from cache
+    HISTORY_COUNT_CACHE_TTL = float(os.environ.get('HISTORY_COUNT_CACHE_TTL', 30))
+    
+    # Seconds a dataset collection's total may be served from cache (ingest_datasets.py updates the stored count)
+    DATASET_COUNT_CACHE_TTL = float(os.environ.get('DATASET_COUNT_CACHE_TTL', 60))
+    
+    # Dataset statistics: recomputed after an ingest or this many seconds; clients may reuse a response for DATASET_STATS_MAX_AGE
+    DATASET_STATS_CACHE_TTL = float(os.environ.get('DATASET_STATS_CACHE_TTL', 300))
+    DATASET_STATS_MAX_AGE = int(os.environ.get('DATASET_STATS_MAX_AGE', 60))
+    
+    # In-memory trigram index of dataset designations for typo-tolerant search (one per worker process)
+    CATALOGUE_INDEX_ENABLED = os.environ.get('CATALOGUE_INDEX_ENABLED', 'True').lower() == 'true'
+    CATALOGUE_INDEX_REFRESH_INTERVAL = float(os.environ.get('CATALOGUE_INDEX_REFRESH_INTERVAL', 60))  # seconds between dataset_meta version checks
+    CATALOGUE_INDEX_MIN_SIMILARITY = float(os.environ.get('CATALOGUE_INDEX_MIN_SIMILARITY', 0.3))
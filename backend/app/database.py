@@ -47,13 +47,34 @@ def create_indexes():
             
             # Create indexes for predictions collection
             db.predictions.create_index("user_id")
-            db.predictions.create_index([("user_id", 1), ("created_at", -1)])
+            # _id breaks created_at ties for keyset pagination of the history
+            db.predictions.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)])
+            
+            # Create indexes for prediction jobs collection
+            db.prediction_jobs.create_index([("user_id", 1), ("created_at", -1)])
+            
+            # Shared rate limit buckets (RATE_LIMIT_STORE=mongo) are removed once they would be full again
+            db.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+            
+            # Compound indexes for dataset filters and sorts (see check_query_plans.py)
+            create_dataset_indexes(db)
             
             print("📋 Database indexes created successfully")
         except Exception as e:
             print(f"⚠️  Warning: Could not create indexes: {str(e)}")
             # Don't raise error, indexes might already exist
 
+def create_dataset_indexes(database, dataset=None, collection=None):
+    """Create the filter/sort indexes of one dataset (or all) on its collection, or on `collection`"""
+    from app.utils.dataset_queries import DATASETS, dataset_indexes
+    
+    for name, spec in DATASETS.items():
+        if dataset is not None and name != dataset:
+            continue
+        target = collection if collection is not None else database[spec['collection']]
+        for keys in dataset_indexes(spec):
+            target.create_index(keys)
+
 def get_db():
     """Get database instance"""
     if db is None:
@@ -1,5 +1,7 @@
 # Models package
 from .user import User
 from .prediction import Prediction
+from .prediction_job import PredictionJob
+from .prediction_stats import PredictionStats
 
-__all__ = ['User', 'Prediction']
\ No newline at end of file
+__all__ = ['User', 'Prediction', 'PredictionJob', 'PredictionStats']
\ No newline at end of file
@@ -1,14 +1,30 @@
+import base64
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
 from app.database import get_db
+from app.models.prediction_stats import PredictionStats
 
 class Prediction:
+    FIELDS = ('user_id', 'request_data', 'response_data', 'created_at')
+    
     def __init__(self, user_id, request_data, response_data, created_at=None, _id=None):
+        # Predictions loaded from the database come with an _id; new ones get a client-side one
+        is_new = _id is None
         self._id = _id or ObjectId()
         self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
         self.request_data = request_data
         self.response_data = response_data
         self.created_at = created_at or datetime.utcnow()
+        # Field values as last written to (or read from) the database; None until inserted
+        self._saved = None if is_new else self._document()
+    
+    @property
+    def is_new(self):
+        return self._saved is None
+    
+    def _document(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
     
     def to_dict(self):
         """Convert prediction object to dictionary"""
@@ -20,32 +36,57 @@ class Prediction:
             'created_at': self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at
         }
     
-    def save(self):
-        """Save prediction to database"""
+    def insert(self):
+        """Insert a new prediction with its client-side _id (a single write, no lookup)
+        and add it to the user's PredictionStats rollup"""
         db = get_db()
-        prediction_data = {
-            'user_id': self.user_id,
-            'request_data': self.request_data,
-            'response_data': self.response_data,
-            'created_at': self.created_at
-        }
-        
+        document = self._document()
         try:
-            if self._id and db.predictions.find_one({'_id': self._id}):
-                # Update existing prediction
-                result = db.predictions.update_one(
-                    {'_id': self._id},
-                    {'$set': prediction_data}
-                )
-                return result.modified_count > 0
-            else:
-                # Insert new prediction
-                result = db.predictions.insert_one(prediction_data)
-                self._id = result.inserted_id
-                return True
+            db.predictions.insert_one({'_id': self._id, **document})
+            self._saved = document
         except Exception as e:
             print(f"Error saving prediction: {str(e)}")
             return False
+        PredictionStats.record(self.user_id, self.response_data)
+        return True
+    
+    def insert_deferred(self, writer):
+        """Queue the prediction on a write-behind buffer (keeping the client-side _id);
+        inserts synchronously when the buffer is full. The buffer's `on_written`
+        hook updates the rollup once the document is written."""
+        document = self._document()
+        if writer.put({'_id': self._id, **document}):
+            self._saved = document
+            return True
+        return self.insert()
+    
+    def update(self, fields=None):
+        """Apply `fields` (a dict of new values, optional) and $set only the fields that
+        differ from what was last saved. Reassign fields rather than mutating nested
+        dicts in place, or pass them here, so changes are detected."""
+        if self.is_new:
+            raise ValueError("Cannot update a prediction that has not been inserted")
+        for field, value in (fields or {}).items():
+            if field not in self.FIELDS:
+                raise ValueError(f"Unknown prediction field: {field}")
+            setattr(self, field, value)
+        
+        changed = {field: value for field, value in self._document().items() if self._saved.get(field) != value}
+        if not changed:
+            return True
+        
+        db = get_db()
+        try:
+            result = db.predictions.update_one({'_id': self._id}, {'$set': changed})
+            self._saved.update(changed)
+            return result.matched_count == 1
+        except Exception as e:
+            print(f"Error updating prediction: {str(e)}")
+            return False
+    
+    def save(self):
+        """Insert a new prediction or update a loaded one"""
+        return self.insert() if self.is_new else self.update()
     
     @staticmethod
     def find_by_user_id(user_id, limit=50, skip=0):
@@ -54,7 +95,7 @@ class Prediction:
         try:
             user_object_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
             cursor = db.predictions.find({'user_id': user_object_id})\
-                                   .sort('created_at', -1)\
+                                   .sort([('created_at', -1), ('_id', -1)])\
                                    .skip(skip)\
                                    .limit(limit)
             
@@ -73,6 +114,62 @@ class Prediction:
             print(f"Error finding predictions by user: {str(e)}")
             return []
     
+    @staticmethod
+    def encode_cursor(created_at, prediction_id):
+        """Opaque keyset cursor pointing just past (created_at, _id)"""
+        raw = f"{created_at.isoformat()}|{prediction_id}".encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+            created_at, prediction_id = raw.split('|')
+            return datetime.fromisoformat(created_at), ObjectId(prediction_id)
+        except (ValueError, TypeError, InvalidId):
+            raise ValueError('Invalid cursor')
+    
+    @staticmethod
+    def find_page_by_user_id(user_id, limit=10, after=None):
+        """Keyset page of a user's predictions, newest first.
+        
+        Walks the (user_id, created_at, _id) index from the `after` cursor, so a page
+        costs O(limit) however deep it is. Returns (predictions, next_cursor), where
+        next_cursor is None on the last page.
+        """
+        db = get_db()
+        user_object_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        query = {'user_id': user_object_id}
+        if after:
+            created_at, prediction_id = Prediction.decode_cursor(after)
+            query['$or'] = [
+                {'created_at': {'$lt': created_at}},
+                {'created_at': created_at, '_id': {'$lt': prediction_id}}
+            ]
+        
+        # One extra document tells whether there is a next page
+        cursor = db.predictions.find(query)\
+                               .sort([('created_at', -1), ('_id', -1)])\
+                               .limit(limit + 1)
+        
+        predictions = []
+        for prediction_data in cursor:
+            predictions.append(Prediction(
+                user_id=prediction_data['user_id'],
+                request_data=prediction_data['request_data'],
+                response_data=prediction_data['response_data'],
+                created_at=prediction_data['created_at'],
+                _id=prediction_data['_id']
+            ))
+        
+        next_cursor = None
+        if len(predictions) > limit:
+            predictions = predictions[:limit]
+            last = predictions[-1]
+            next_cursor = Prediction.encode_cursor(last.created_at, last._id)
+        return predictions, next_cursor
+    
     @staticmethod
     def count_by_user_id(user_id):
         """Count predictions by user ID"""
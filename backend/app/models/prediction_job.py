@@ -0,0 +1,153 @@
+from datetime import datetime
+from bson import ObjectId
+from app.database import get_db
+
+class PredictionJob:
+    """A batch of candidates scored in the background (see app.utils.jobs)"""
+    
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    FINISHED_STATES = (COMPLETED, FAILED)
+    
+    def __init__(self, user_id, candidates, total=None, status=QUEUED, processed=0, succeeded=0, failed=0,
+                 prediction_ids=None, errors=None, error=None, created_at=None, started_at=None,
+                 finished_at=None, _id=None):
+        self._id = _id or ObjectId()
+        self.user_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        self.candidates = candidates  # None when loaded without them
+        self.total = len(candidates) if total is None else total
+        self.status = status
+        self.processed = processed
+        self.succeeded = succeeded
+        self.failed = failed
+        self.prediction_ids = prediction_ids or []
+        self.errors = errors or []
+        self.error = error
+        self.created_at = created_at or datetime.utcnow()
+        self.started_at = started_at
+        self.finished_at = finished_at
+    
+    @property
+    def is_finished(self):
+        return self.status in self.FINISHED_STATES
+    
+    def to_dict(self):
+        """Convert job to its API representation (without the submitted candidates)"""
+        def iso(value):
+            return value.isoformat() if isinstance(value, datetime) else value
+        
+        return {
+            'id': str(self._id),
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'prediction_ids': [str(prediction_id) for prediction_id in self.prediction_ids],
+            'errors': self.errors,
+            'error': self.error,
+            'created_at': iso(self.created_at),
+            'started_at': iso(self.started_at),
+            'finished_at': iso(self.finished_at)
+        }
+    
+    def save(self):
+        """Insert the job"""
+        db = get_db()
+        try:
+            db.prediction_jobs.insert_one({
+                '_id': self._id,
+                'user_id': self.user_id,
+                'candidates': self.candidates,
+                'total': self.total,
+                'status': self.status,
+                'processed': self.processed,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'prediction_ids': self.prediction_ids,
+                'errors': self.errors,
+                'error': self.error,
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            })
+            return True
+        except Exception as e:
+            print(f"Error saving prediction job: {str(e)}")
+            return False
+    
+    @staticmethod
+    def mark_running(job_id):
+        """Move a queued job to running; False if another worker already claimed it"""
+        db = get_db()
+        result = db.prediction_jobs.update_one(
+            {'_id': job_id, 'status': PredictionJob.QUEUED},
+            {'$set': {'status': PredictionJob.RUNNING, 'started_at': datetime.utcnow()}}
+        )
+        return result.modified_count == 1
+    
+    @staticmethod
+    def record_progress(job_id, prediction_ids, errors):
+        """Atomically add one scored batch to the job's counters"""
+        db = get_db()
+        db.prediction_jobs.update_one(
+            {'_id': job_id},
+            {
+                '$inc': {
+                    'processed': len(prediction_ids) + len(errors),
+                    'succeeded': len(prediction_ids),
+                    'failed': len(errors)
+                },
+                '$push': {
+                    'prediction_ids': {'$each': prediction_ids},
+                    'errors': {'$each': errors}
+                }
+            }
+        )
+    
+    @staticmethod
+    def mark_finished(job_id, error=None):
+        db = get_db()
+        db.prediction_jobs.update_one(
+            {'_id': job_id},
+            {'$set': {
+                'status': PredictionJob.FAILED if error else PredictionJob.COMPLETED,
+                'error': error,
+                'finished_at': datetime.utcnow()
+            }}
+        )
+    
+    @staticmethod
+    def _from_document(job_data):
+        return PredictionJob(
+            user_id=job_data['user_id'],
+            candidates=job_data.get('candidates'),
+            total=job_data['total'],
+            status=job_data['status'],
+            processed=job_data['processed'],
+            succeeded=job_data['succeeded'],
+            failed=job_data['failed'],
+            prediction_ids=job_data['prediction_ids'],
+            errors=job_data['errors'],
+            error=job_data.get('error'),
+            created_at=job_data['created_at'],
+            started_at=job_data.get('started_at'),
+            finished_at=job_data.get('finished_at'),
+            _id=job_data['_id']
+        )
+    
+    @staticmethod
+    def find_by_id(job_id, include_candidates=False):
+        """Find job by ID; the (potentially large) candidate list is only loaded on request"""
+        db = get_db()
+        try:
+            projection = None if include_candidates else {'candidates': 0}
+            job_data = db.prediction_jobs.find_one({'_id': ObjectId(job_id)}, projection)
+            
+            if job_data:
+                return PredictionJob._from_document(job_data)
+        except Exception as e:
+            print(f"Error finding prediction job by ID: {str(e)}")
+        return None
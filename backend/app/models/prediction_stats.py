@@ -0,0 +1,240 @@
+from collections import defaultdict
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.database import get_db
+
+class PredictionStats:
+    """Per-user rollup of the prediction history, one `prediction_stats` document per user.
+    
+    Counters are bumped with `$inc` whenever predictions are stored, so reading
+    a user's stats is a single `_id` lookup. Users start with an empty
+    `complete` rollup at signup; for history stored before rollups existed,
+    `rebuild` recomputes them from the predictions collection (see
+    rebuild_prediction_stats.py) and marks them `complete`. Until then a
+    rollup that only `$inc` created may be missing older history, and
+    `compute` answers from the predictions collection instead.
+    Every `$inc` also bumps `version`, so a rebuild only replaces a rollup
+    that nothing updated while it was aggregating.
+    """
+    
+    def __init__(self, user_id, total=0, exoplanets=0, confidence_sum=0.0, planet_types=None, updated_at=None,
+                 complete=False):
+        self.user_id = user_id
+        self.complete = complete
+        self.total = total
+        self.exoplanets = exoplanets
+        self.confidence_sum = confidence_sum
+        self.planet_types = planet_types or {}
+        self.updated_at = updated_at
+    
+    @property
+    def average_confidence(self):
+        return self.confidence_sum / self.total if self.total else 0
+    
+    def to_dict(self):
+        """Convert stats to the prediction stats API representation"""
+        return {
+            'total_predictions': self.total,
+            'confirmed_exoplanets': self.exoplanets,
+            'average_confidence': round(self.average_confidence, 3),
+            'planet_type_distribution': self.planet_types
+        }
+    
+    @staticmethod
+    def _planet_type_key(planet_type):
+        # Field names may not contain '.' or start with '$'
+        return str(planet_type).replace('.', '_').lstrip('$')
+    
+    @staticmethod
+    def increments(response_data):
+        """`$inc` fields for one stored prediction"""
+        increments = {
+            'total': 1,
+            'exoplanets': 1 if response_data.get('isExoplanet') else 0,
+            'confidence_sum': response_data.get('confidence') or 0
+        }
+        planet_type = (response_data.get('details') or {}).get('planetType')
+        if planet_type:
+            increments[f'planet_types.{PredictionStats._planet_type_key(planet_type)}'] = 1
+        return increments
+    
+    @staticmethod
+    def record(user_id, response_data):
+        """Add one stored prediction to the user's rollup"""
+        return PredictionStats.record_many([{'user_id': user_id, 'response_data': response_data}])
+    
+    @staticmethod
+    def record_many(documents):
+        """Add stored prediction documents to their users' rollups, one upsert per user"""
+        per_user = defaultdict(lambda: defaultdict(float))
+        for document in documents:
+            for field, value in PredictionStats.increments(document['response_data']).items():
+                per_user[document['user_id']][field] += value
+        if not per_user:
+            return True
+        
+        db = get_db()
+        now = datetime.utcnow()
+        try:
+            db.prediction_stats.bulk_write([
+                UpdateOne(
+                    {'_id': user_id},
+                    {
+                        '$inc': {
+                            'version': 1,
+                            **{
+                                field: value if field == 'confidence_sum' else int(value)
+                                for field, value in increments.items()
+                            }
+                        },
+                        '$set': {'updated_at': now}
+                    },
+                    upsert=True
+                )
+                for user_id, increments in per_user.items()
+            ], ordered=False)
+            return True
+        except Exception as e:
+            print(f"Error updating prediction stats: {str(e)}")
+            return False
+    
+    @staticmethod
+    def create_empty(user_id):
+        """Start a new user's rollup: a user with no history yet is complete from the beginning"""
+        db = get_db()
+        try:
+            db.prediction_stats.update_one(
+                {'_id': user_id},
+                {'$setOnInsert': {
+                    'total': 0, 'exoplanets': 0, 'confidence_sum': 0, 'planet_types': {},
+                    'complete': True, 'version': 0, 'updated_at': datetime.utcnow()
+                }},
+                upsert=True
+            )
+            return True
+        except Exception as e:
+            print(f"Error creating prediction stats: {str(e)}")
+            return False
+    
+    @staticmethod
+    def _aggregate(match):
+        """Rollup fields per user_id, computed from the predictions matching `match`"""
+        db = get_db()
+        totals = db.predictions.aggregate([
+            {'$match': match},
+            {'$group': {
+                '_id': '$user_id',
+                'total': {'$sum': 1},
+                'exoplanets': {'$sum': {'$cond': [{'$eq': ['$response_data.isExoplanet', True]}, 1, 0]}},
+                'confidence_sum': {'$sum': {'$ifNull': ['$response_data.confidence', 0]}}
+            }}
+        ])
+        planet_types = db.predictions.aggregate([
+            {'$match': {**match, 'response_data.details.planetType': {'$nin': [None, '']}}},
+            {'$group': {
+                '_id': {'user_id': '$user_id', 'planet_type': '$response_data.details.planetType'},
+                'count': {'$sum': 1}
+            }}
+        ])
+        
+        types_by_user = defaultdict(dict)
+        for group in planet_types:
+            key = PredictionStats._planet_type_key(group['_id']['planet_type'])
+            types_by_user[group['_id']['user_id']][key] = group['count']
+        
+        return {
+            group['_id']: {
+                'total': group['total'],
+                'exoplanets': group['exoplanets'],
+                'confidence_sum': group['confidence_sum'],
+                'planet_types': types_by_user.get(group['_id'], {})
+            }
+            for group in totals
+        }
+    
+    @staticmethod
+    def compute(user_id):
+        """A user's stats aggregated from the predictions collection, without touching the rollup"""
+        user_object_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        fields = PredictionStats._aggregate({'user_id': user_object_id}).get(user_object_id, {})
+        return PredictionStats(user_id=user_object_id, **fields)
+    
+    @staticmethod
+    def rebuild(user_id=None, max_attempts=5):
+        """Recompute rollups from the predictions collection (all users, or one);
+        returns the number of users rebuilt.
+        
+        Each rollup is replaced only if its `version` is still the one read
+        before aggregating; users whose rollup was bumped meanwhile are
+        rebuilt again, up to `max_attempts` times. A prediction inserted
+        before the aggregation but only `$inc`ed after the replace is still
+        counted twice, so run rebuilds while writes are quiet.
+        """
+        db = get_db()
+        match = {}
+        if user_id is not None:
+            match['user_id'] = ObjectId(user_id) if isinstance(user_id, str) else user_id
+        
+        # Versions are read first: any $inc after this point makes the replace below miss
+        stats_filter = {'_id': match['user_id']} if user_id is not None else {}
+        versions = {doc['_id']: doc.get('version') for doc in db.prediction_stats.find(stats_filter, {'version': 1})}
+        groups = PredictionStats._aggregate(match)
+        if user_id is not None and not groups:
+            # No predictions yet: store an empty rollup so the lookup is not repeated
+            groups[match['user_id']] = {'total': 0, 'exoplanets': 0, 'confidence_sum': 0, 'planet_types': {}}
+        if not groups:
+            return 0
+        
+        now = datetime.utcnow()
+        user_ids = list(groups)
+        operations = [
+            # A missing `version` matches both a missing rollup and one written before versions existed;
+            # when the filter misses an existing rollup, the upsert fails with a duplicate key instead
+            ReplaceOne(
+                {'_id': group_user_id, 'version': versions.get(group_user_id)},
+                {**groups[group_user_id], 'complete': True, 'version': (versions.get(group_user_id) or 0) + 1,
+                 'updated_at': now},
+                upsert=True
+            )
+            for group_user_id in user_ids
+        ]
+        conflicts = []
+        try:
+            db.prediction_stats.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') != 11000:
+                    raise
+                conflicts.append(user_ids[error['index']])
+        
+        rebuilt = len(user_ids) - len(conflicts)
+        for conflict_user_id in conflicts:
+            if max_attempts > 1:
+                rebuilt += PredictionStats.rebuild(conflict_user_id, max_attempts - 1)
+            else:
+                print(f"⚠️  Prediction stats for user {conflict_user_id} kept changing; not rebuilt")
+        return rebuilt
+    
+    @staticmethod
+    def find_by_user_id(user_id):
+        """Find a user's rollup; None if it was never recorded"""
+        db = get_db()
+        try:
+            user_object_id = ObjectId(user_id) if isinstance(user_id, str) else user_id
+            stats_data = db.prediction_stats.find_one({'_id': user_object_id})
+            
+            if stats_data:
+                return PredictionStats(
+                    user_id=stats_data['_id'],
+                    total=stats_data.get('total', 0),
+                    exoplanets=stats_data.get('exoplanets', 0),
+                    confidence_sum=stats_data.get('confidence_sum', 0.0),
+                    planet_types=stats_data.get('planet_types', {}),
+                    updated_at=stats_data.get('updated_at'),
+                    complete=stats_data.get('complete', False)
+                )
+        except Exception as e:
+            print(f"Error finding prediction stats: {str(e)}")
+        return None
@@ -1,15 +1,33 @@
 from datetime import datetime
 from bson import ObjectId
-import bcrypt
+from pymongo.errors import DuplicateKeyError
 from app.database import get_db
 
+class DuplicateUserError(Exception):
+    """Raised by User.insert when the email or username is already taken"""
+    
+    def __init__(self, field=None):
+        super().__init__(f"User with this {field or 'email or username'} already exists")
+        self.field = field  # 'email', 'username' or None if the server did not say
+
 class User:
+    FIELDS = ('username', 'email', 'password_hash', 'created_at')
+    
     def __init__(self, username, email, password_hash, created_at=None, _id=None):
         self._id = _id  # Only set if provided (from database)
         self.username = username
         self.email = email
         self.password_hash = password_hash
         self.created_at = created_at or datetime.utcnow()
+        # Field values as last written to (or read from) the database; None until inserted
+        self._saved = None if _id is None else self._document()
+    
+    @property
+    def is_new(self):
+        return self._saved is None
+    
+    def _document(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
     
     def to_dict(self):
         """Convert user object to dictionary"""
@@ -20,37 +38,58 @@ class User:
             'created_at': self.created_at.isoformat() if isinstance(self.created_at, datetime) else self.created_at
         }
     
-    def save(self):
-        """Save user to database"""
+    def insert(self):
+        """Insert a new user in a single write.
+        
+        Uniqueness of email and username is enforced by the unique indexes, so no
+        lookup is needed first; a conflict raises DuplicateUserError.
+        """
+        db = get_db()
+        document = self._document()
         try:
-            db = get_db()
-            user_data = {
-                'username': self.username,
-                'email': self.email,
-                'password_hash': self.password_hash,
-                'created_at': self.created_at
-            }
-            
-            # Check if this is an existing user by checking if _id exists in database
-            existing_user = None
-            if self._id:
-                existing_user = db.users.find_one({'_id': self._id})
-            
-            if existing_user:
-                # Update existing user
-                result = db.users.update_one(
-                    {'_id': self._id},
-                    {'$set': user_data}
-                )
-                return result.modified_count > 0
-            else:
-                # Insert new user (don't include _id in insert data, let MongoDB generate it)
-                result = db.users.insert_one(user_data)
-                self._id = result.inserted_id
-                return True
+            # insert_one adds the generated _id to the dict it is given; keep `document` clean
+            result = db.users.insert_one(dict(document))
+        except DuplicateKeyError as e:
+            key_pattern = (e.details or {}).get('keyPattern') or {}
+            raise DuplicateUserError(next(iter(key_pattern), None))
         except Exception as e:
             print(f"Error saving user: {str(e)}")
             return False
+        
+        self._id = result.inserted_id
+        self._saved = document
+        return True
+    
+    def update(self, fields=None):
+        """Apply `fields` (a dict of new values, optional) and $set only the fields that
+        differ from what was last saved"""
+        if self.is_new:
+            raise ValueError("Cannot update a user that has not been inserted")
+        for field, value in (fields or {}).items():
+            if field not in self.FIELDS:
+                raise ValueError(f"Unknown user field: {field}")
+            setattr(self, field, value)
+        
+        # app.utils imports this module, so import the cache here
+        from app.utils.user_cache import invalidate_user
+        
+        changed = {field: value for field, value in self._document().items() if self._saved.get(field) != value}
+        if not changed:
+            return True
+        
+        db = get_db()
+        try:
+            result = db.users.update_one({'_id': self._id}, {'$set': changed})
+            self._saved.update(changed)
+            invalidate_user(self._id)
+            return result.matched_count == 1
+        except Exception as e:
+            print(f"Error updating user: {str(e)}")
+            return False
+    
+    def save(self):
+        """Insert a new user or update a loaded one"""
+        return self.insert() if self.is_new else self.update()
     
     @staticmethod
     def find_by_email(email):
@@ -87,27 +126,44 @@ class User:
     @staticmethod
     def find_by_id(user_id):
         """Find user by ID"""
+        user_data = User.find_document_by_id(user_id)
+        return User.from_document(user_data) if user_data else None
+    
+    @staticmethod
+    def find_document_by_id(user_id):
+        """Raw user document by ID (what token_required caches); None if not found"""
         db = get_db()
         try:
-            user_data = db.users.find_one({'_id': ObjectId(user_id)})
-            
-            if user_data:
-                return User(
-                    username=user_data['username'],
-                    email=user_data['email'],
-                    password_hash=user_data['password_hash'],
-                    created_at=user_data['created_at'],
-                    _id=user_data['_id']
-                )
+            return db.users.find_one({'_id': ObjectId(user_id)})
         except Exception:
-            pass
-        return None
+            return None
+    
+    @staticmethod
+    def from_document(user_data):
+        return User(
+            username=user_data['username'],
+            email=user_data['email'],
+            password_hash=user_data['password_hash'],
+            created_at=user_data['created_at'],
+            _id=user_data['_id']
+        )
     
     @staticmethod
     def hash_password(password):
-        """Hash password using bcrypt"""
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Hash password using bcrypt (in the password hashing pool, at the configured cost)"""
+        # app.utils imports this module, so import the hasher here
+        from app.utils.passwords import password_hasher
+        return password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if provided password matches the hash"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
\ No newline at end of file
+        from app.utils.passwords import password_hasher
+        return password_hasher.verify(password, self.password_hash)
+    
+    def rehash_password(self, password):
+        """Re-hash a just-verified password if its hash was made with another cost
+        than BCRYPT_ROUNDS; True if the stored hash was replaced"""
+        from app.utils.passwords import password_hasher
+        if not password_hasher.needs_rehash(self.password_hash):
+            return False
+        return self.update({'password_hash': password_hasher.hash(password)})
\ No newline at end of file
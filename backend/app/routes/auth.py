@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify
 from marshmallow import Schema, fields, ValidationError
 import re
-from app.models.user import User
+from app.models.prediction_stats import PredictionStats
+from app.models.user import DuplicateUserError, User
 from app.utils.auth import generate_token, token_required
+from app.utils.metrics import increment
+from app.utils.passwords import PasswordHasherBusy
+from app.utils.rate_limit import rate_limit
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -17,7 +21,14 @@ class LoginSchema(Schema):
     email = fields.Email(required=True)
     password = fields.Str(required=True)
 
+def hasher_busy_response(error):
+    """503 for a signup or login turned away by the full password hashing pool"""
+    response = jsonify({'message': 'Too many sign-ins in progress, please retry shortly'})
+    response.headers['Retry-After'] = str(int(error.retry_after + 0.999))
+    return response, 503
+
 @auth_bp.route('/signup', methods=['POST'])
+@rate_limit('login')
 def signup():
     """User registration endpoint"""
     try:
@@ -42,18 +53,11 @@ def signup():
         if len(password) < 6:
             return jsonify({'message': 'Password must be at least 6 characters long'}), 400
         
-        # Check if user already exists by email
-        existing_user_email = User.find_by_email(email)
-        if existing_user_email:
-            return jsonify({'message': 'User with this email already exists'}), 409
-        
-        # Check if user already exists by username
-        existing_user_username = User.find_by_username(username)
-        if existing_user_username:
-            return jsonify({'message': 'Username already taken'}), 409
-        
         # Hash password
-        password_hash = User.hash_password(password)
+        try:
+            password_hash = User.hash_password(password)
+        except PasswordHasherBusy as e:
+            return hasher_busy_response(e)
         
         # Create new user
         new_user = User(
@@ -62,11 +66,14 @@ def signup():
             password_hash=password_hash
         )
         
-        # Save user to database
+        # Save user to database; the unique indexes on email and username reject duplicates
         try:
-            if new_user.save():
+            if new_user.insert():
+                # No history yet, so the stats rollup is complete from the start
+                PredictionStats.create_empty(new_user._id)
+                
                 # Generate JWT token
-                token = generate_token(new_user._id)
+                token = generate_token(new_user._id, new_user)
                 
                 # Return success response
                 return jsonify({
@@ -77,6 +84,12 @@ def signup():
                 }), 201
             else:
                 return jsonify({'message': 'Failed to create user - database error'}), 500
+        except DuplicateUserError as e:
+            # Only look up which field clashed when the server did not report it
+            field = e.field or ('email' if User.find_by_email(email) else 'username')
+            if field == 'email':
+                return jsonify({'message': 'User with this email already exists'}), 409
+            return jsonify({'message': 'Username already taken'}), 409
         except Exception as save_error:
             print(f"Save error: {str(save_error)}")
             return jsonify({'message': f'Failed to create user: {str(save_error)}'}), 500
@@ -85,6 +98,7 @@ def signup():
         return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limit('login')
 def login():
     """User login endpoint"""
     try:
@@ -117,11 +131,21 @@ def login():
             return jsonify({'message': 'Invalid email or password'}), 401
         
         # Check password
-        if not user.check_password(password):
-            return jsonify({'message': 'Invalid email or password'}), 401
+        try:
+            if not user.check_password(password):
+                return jsonify({'message': 'Invalid email or password'}), 401
+        except PasswordHasherBusy as e:
+            return hasher_busy_response(e)
+        
+        # Upgrade the stored hash after a BCRYPT_ROUNDS change; the login succeeds either way
+        try:
+            if user.rehash_password(password):
+                increment('auth.password_rehashed')
+        except Exception as e:
+            print(f"Password re-hash skipped: {str(e)}")
         
         # Generate JWT token
-        token = generate_token(user._id)
+        token = generate_token(user._id, user)
         
         return jsonify({
             'access_token': token,
@@ -1,69 +1,145 @@
-from flask import Blueprint, request, jsonify
-from marshmallow import Schema, fields, ValidationError
+from flask import Blueprint, request, jsonify, current_app
+from marshmallow import Schema, fields, ValidationError, EXCLUDE
 from app.database import get_db
 from app.utils.auth import token_required
+from app.utils.cache import TTLCache
+from app.utils.dataset_queries import (
+    DATASETS, DatasetQueryError, build_filter, parse_sort, cursor_filter, sort_spec, encode_cursor
+)
+from app.utils.dataset_search import search_dataset
+from app.utils.metrics import register_provider
+from app.utils.rate_limit import rate_limit
 from bson import ObjectId
+import hashlib
+import json
 import math
 
 datasets_bp = Blueprint('datasets', __name__)
 
 class PaginationSchema(Schema):
+    class Meta:
+        # Filter parameters are validated by build_filter
+        unknown = EXCLUDE
+    
     page = fields.Int(missing=1, validate=lambda x: x >= 1)
     limit = fields.Int(missing=12, validate=lambda x: 1 <= x <= 50)
+    after = fields.Str()
+    sort = fields.Str()
+
+KEPLER_INFO = {
+    'name': 'Kepler Objects of Interest',
+    'description': 'Planetary candidates and confirmed planets from the Kepler mission',
+    'source': 'NASA Exoplanet Archive'
+}
+
+TESS_INFO = {
+    'name': 'TESS Objects of Interest',
+    'description': 'Planetary candidates from the Transiting Exoplanet Survey Satellite',
+    'source': 'NASA Exoplanet Archive'
+}
+
+# Search keys written by ingest_datasets.py are internal to dataset search
+DOCUMENT_PROJECTION = {'search_keys': 0}
+
+# Collection totals change only on ingest, so they are served from cache rather than counted per page
+dataset_count_cache = TTLCache()
+register_provider('dataset_count_cache', dataset_count_cache.stats)
+
+def get_dataset_count(collection_name, query=None):
+    """
+    Cached total for a dataset collection: the counter stored by ingest_datasets.py
+    in `dataset_meta`, or the collection's metadata-based estimate. Filtered
+    totals are counted with the filter, which the dataset indexes cover.
+    """
+    def count():
+        db = get_db()
+        if query:
+            return db[collection_name].count_documents(query)
+        meta = db.dataset_meta.find_one({'_id': collection_name})
+        if meta and 'count' in meta:
+            return meta['count']
+        return db[collection_name].estimated_document_count()
+    
+    key = (collection_name, json.dumps(query, sort_keys=True)) if query else collection_name
+    return dataset_count_cache.get_or_set(
+        key, count, ttl_seconds=current_app.config['DATASET_COUNT_CACHE_TTL']
+    )
+
+def paginate_dataset(dataset, dataset_info):
+    """
+    Page through a dataset collection, optionally filtered and sorted.
+    
+    Filters: `disposition` (comma-separated) and `min_<field>`/`max_<field>`
+    ranges; `sort=<field>` or `sort=-<field>` orders by a field with `_id` as
+    the tie-breaker (default: `_id` order). Every combination is served by the
+    compound indexes from `dataset_indexes`.
+    
+    Pass the previous page's `next_cursor` as `after` to continue from where the
+    last page ended, so every page costs O(limit). Without `after` the page is
+    selected by `page` (default 1) as before, and the response keeps `page` and
+    `has_prev`; cursor pages leave those out.
+    """
+    spec = DATASETS[dataset]
+    schema = PaginationSchema()
+    try:
+        params = schema.load(request.args.to_dict())
+        query = build_filter(spec, {k: v for k, v in request.args.items() if k not in schema.fields})
+        sort_field, direction = parse_sort(spec, params.get('sort'))
+        after = params.get('after')
+        cursor_query = cursor_filter(sort_field, direction, after) if after else None
+    except ValidationError as err:
+        return jsonify({'message': 'Invalid parameters', 'errors': err.messages}), 400
+    except DatasetQueryError as err:
+        return jsonify({'message': 'Invalid parameters', 'errors': err.errors}), 400
+    
+    limit = params['limit']
+    page = params['page'] if not after else None
+    
+    collection = get_db()[spec['collection']]
+    find_query = {'$and': [query, cursor_query]} if cursor_query else query
+    
+    # One extra document tells whether there is a next page
+    cursor = collection.find(find_query, DOCUMENT_PROJECTION).sort(sort_spec(sort_field, direction))
+    if page:
+        cursor = cursor.skip((page - 1) * limit)
+    items = list(cursor.limit(limit + 1))
+    has_next = len(items) > limit
+    items = items[:limit]
+    next_cursor = encode_cursor(sort_field, items[-1]) if has_next else None
+    
+    # Convert ObjectId to string for JSON serialization
+    for item in items:
+        item['_id'] = str(item['_id'])
+    
+    total_count = get_dataset_count(spec['collection'], query)
+    pagination = {
+        'limit': limit,
+        'next_cursor': next_cursor,
+        'total_items': total_count,
+        'total_pages': math.ceil(total_count / limit) if total_count > 0 else 0,
+        'has_next': has_next
+    }
+    if page:
+        pagination['page'] = page
+        pagination['has_prev'] = page > 1
+    
+    return jsonify({
+        'data': items,
+        'pagination': pagination,
+        'filters': query,
+        'sort': params.get('sort'),
+        'dataset_info': dataset_info
+    }), 200
 
 @datasets_bp.route('/kepler', methods=['GET'])
 @token_required
 def get_kepler_data(current_user):
     """
-    Get Kepler dataset with pagination
+    Get Kepler dataset with pagination, filters and sorting
     Default: 12 items per page
     """
     try:
-        # Validate query parameters
-        schema = PaginationSchema()
-        try:
-            params = schema.load(request.args.to_dict())
-        except ValidationError as err:
-            return jsonify({'message': 'Invalid parameters', 'errors': err.messages}), 400
-        
-        page = params['page']
-        limit = params['limit']
-        skip = (page - 1) * limit
-        
-        # Get database connection
-        db = get_db()
-        kepler_collection = db.kepler_dataset
-        
-        # Get total count for pagination info
-        total_count = kepler_collection.count_documents({})
-        
-        # Calculate total pages
-        total_pages = math.ceil(total_count / limit) if total_count > 0 else 0
-        
-        # Get paginated data
-        kepler_data = list(kepler_collection.find({}).skip(skip).limit(limit))
-        
-        # Convert ObjectId to string for JSON serialization
-        for item in kepler_data:
-            item['_id'] = str(item['_id'])
-        
-        return jsonify({
-            'data': kepler_data,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
-            'dataset_info': {
-                'name': 'Kepler Objects of Interest',
-                'description': 'Planetary candidates and confirmed planets from the Kepler mission',
-                'source': 'NASA Exoplanet Archive'
-            }
-        }), 200
-        
+        return paginate_dataset('kepler', KEPLER_INFO)
     except Exception as e:
         return jsonify({
             'message': 'Error retrieving Kepler data', 
@@ -74,55 +150,11 @@ def get_kepler_data(current_user):
 @token_required
 def get_tess_data(current_user):
     """
-    Get TESS dataset with pagination
+    Get TESS dataset with pagination, filters and sorting
     Default: 12 items per page
     """
     try:
-        # Validate query parameters
-        schema = PaginationSchema()
-        try:
-            params = schema.load(request.args.to_dict())
-        except ValidationError as err:
-            return jsonify({'message': 'Invalid parameters', 'errors': err.messages}), 400
-        
-        page = params['page']
-        limit = params['limit']
-        skip = (page - 1) * limit
-        
-        # Get database connection
-        db = get_db()
-        tess_collection = db.tess_dataset
-        
-        # Get total count for pagination info
-        total_count = tess_collection.count_documents({})
-        
-        # Calculate total pages
-        total_pages = math.ceil(total_count / limit) if total_count > 0 else 0
-        
-        # Get paginated data
-        tess_data = list(tess_collection.find({}).skip(skip).limit(limit))
-        
-        # Convert ObjectId to string for JSON serialization
-        for item in tess_data:
-            item['_id'] = str(item['_id'])
-        
-        return jsonify({
-            'data': tess_data,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total_items': total_count,
-                'total_pages': total_pages,
-                'has_next': page < total_pages,
-                'has_prev': page > 1
-            },
-            'dataset_info': {
-                'name': 'TESS Objects of Interest',
-                'description': 'Planetary candidates from the Transiting Exoplanet Survey Satellite',
-                'source': 'NASA Exoplanet Archive'
-            }
-        }), 200
-        
+        return paginate_dataset('tess', TESS_INFO)
     except Exception as e:
         return jsonify({
             'message': 'Error retrieving TESS data', 
@@ -146,7 +178,7 @@ def get_kepler_item(current_user, item_id):
         except:
             return jsonify({'message': 'Invalid item ID format'}), 400
         
-        item = kepler_collection.find_one({'_id': object_id})
+        item = kepler_collection.find_one({'_id': object_id}, DOCUMENT_PROJECTION)
         
         if not item:
             return jsonify({'message': 'Kepler object not found'}), 404
@@ -185,7 +217,7 @@ def get_tess_item(current_user, item_id):
         except:
             return jsonify({'message': 'Invalid item ID format'}), 400
         
-        item = tess_collection.find_one({'_id': object_id})
+        item = tess_collection.find_one({'_id': object_id}, DOCUMENT_PROJECTION)
         
         if not item:
             return jsonify({'message': 'TESS object not found'}), 404
@@ -209,9 +241,12 @@ def get_tess_item(current_user, item_id):
 
 @datasets_bp.route('/search', methods=['GET'])
 @token_required
+@rate_limit('search')
 def search_datasets(current_user):
     """
-    Search across both Kepler and TESS datasets
+    Search across both Kepler and TESS datasets by designation or catalogue id.
+    Results are ranked: id matches, then exact designations, then prefixes,
+    then similar designations; each item's `_match` says which.
     """
     try:
         query = request.args.get('query', '').strip()
@@ -222,23 +257,17 @@ def search_datasets(current_user):
         # Get database connection
         db = get_db()
         
-        # Search in Kepler dataset
-        kepler_results = list(db.kepler_dataset.find({
-            '$or': [
-                {'kepoi_name': {'$regex': query, '$options': 'i'}},
-                {'kepler_name': {'$regex': query, '$options': 'i'}},
-                {'kepid': {'$regex': str(query), '$options': 'i'}}
-            ]
-        }).limit(10))
-        
-        # Search in TESS dataset
-        tess_results = list(db.tess_dataset.find({
-            '$or': [
-                {'toi': {'$regex': str(query), '$options': 'i'}},
-                {'ctoi_alias': {'$regex': str(query), '$options': 'i'}},
-                {'tid': {'$regex': str(query), '$options': 'i'}}
-            ]
-        }).limit(10))
+        # Fuzzy matches fill up the results once this worker's trigram index is built
+        catalogue_index = current_app.extensions.get('catalogue_index')
+        results = {}
+        for dataset in ('kepler', 'tess'):
+            spec = DATASETS[dataset]
+            results[dataset] = search_dataset(
+                db[spec['collection']], spec, query,
+                fuzzy_index=catalogue_index.get(dataset) if catalogue_index else None,
+                min_similarity=current_app.config['CATALOGUE_INDEX_MIN_SIMILARITY']
+            )
+        kepler_results, tess_results = results['kepler'], results['tess']
         
         # Convert ObjectIds to strings
         for item in kepler_results:
@@ -265,69 +294,117 @@ def search_datasets(current_user):
             'error': str(e)
         }), 500
 
+# Histogram bucket lower bounds; values at or above the last bound fall into its open-ended bucket
+STATS_HISTOGRAMS = {
+    'radius': [0, 1.25, 2, 4, 6, 15],  # Earth radii: Earth-size, super-Earth, sub-Neptune, Neptune, giant
+    'period': [0, 1, 10, 100, 365, 1000]  # days
+}
+
+def _histogram(bounds, buckets):
+    """`$bucket` output -> ordered list of {range, min, max, count}; `max` is None for the open-ended bucket"""
+    counts = {bucket['_id']: bucket['count'] for bucket in buckets}
+    histogram = []
+    for i, bound in enumerate(bounds):
+        upper = bounds[i + 1] if i + 1 < len(bounds) else None
+        histogram.append({
+            'range': f"{bound:g}-{upper:g}" if upper is not None else f"{bound:g}+",
+            'min': bound,
+            'max': upper,
+            'count': counts.get(bound, 0) + (counts.get('overflow', 0) if upper is None else 0)
+        })
+    return histogram
+
+def compute_dataset_stats(dataset):
+    """Totals, disposition counts and histograms of one dataset in a single `$facet` aggregation"""
+    spec = DATASETS[dataset]
+    facets = {
+        'total': [{'$count': 'count'}],
+        'dispositions': [{'$group': {'_id': f"${spec['disposition']}", 'count': {'$sum': 1}}}]
+    }
+    for name, bounds in STATS_HISTOGRAMS.items():
+        field = spec['fields'][name]
+        facets[name] = [
+            {'$match': {field: {'$gte': bounds[0]}}},
+            {'$bucket': {'groupBy': f'${field}', 'boundaries': bounds, 'default': 'overflow'}}
+        ]
+    
+    result = next(get_db()[spec['collection']].aggregate([{'$facet': facets}]), {})
+    
+    return {
+        'total': result['total'][0]['count'] if result.get('total') else 0,
+        'dispositions': {
+            group['_id']: group['count'] for group in result.get('dispositions', []) if group['_id'] is not None
+        },
+        'histograms': {name: _histogram(bounds, result.get(name, [])) for name, bounds in STATS_HISTOGRAMS.items()}
+    }
+
+# Stats are recomputed when ingest_datasets.py bumps a dataset version, or after DATASET_STATS_CACHE_TTL
+dataset_stats_cache = TTLCache(max_entries=16)
+register_provider('dataset_stats_cache', dataset_stats_cache.stats)
+
+def get_cached_dataset_stats():
+    """(payload, etag) for the stats endpoint, rebuilt at most once per dataset version and TTL"""
+    db = get_db()
+    versions = {
+        meta['_id']: meta.get('version')
+        for meta in db.dataset_meta.find({'_id': {'$in': [spec['collection'] for spec in DATASETS.values()]}}, {'version': 1})
+    }
+    key = tuple(versions.get(spec['collection']) for spec in DATASETS.values())
+    
+    def build():
+        kepler = compute_dataset_stats('kepler')
+        tess = compute_dataset_stats('tess')
+        kepler_dispositions = {'CONFIRMED': 0, 'CANDIDATE': 0, 'FALSE POSITIVE': 0, **kepler['dispositions']}
+        tess_dispositions = {'PC': 0, 'FP': 0, **tess['dispositions']}
+        payload = {
+            'kepler_dataset': {
+                'total_objects': kepler['total'],
+                'confirmed_planets': kepler_dispositions['CONFIRMED'],
+                'candidates': kepler_dispositions['CANDIDATE'],
+                'false_positives': kepler_dispositions['FALSE POSITIVE'],
+                'disposition_breakdown': kepler_dispositions,
+                'histograms': kepler['histograms']
+            },
+            'tess_dataset': {
+                'total_objects': tess['total'],
+                'planet_candidates': tess_dispositions['PC'],  # Planet Candidate
+                'false_positives': tess_dispositions['FP'],  # False Positive
+                'disposition_breakdown': tess_dispositions,
+                'histograms': tess['histograms']
+            },
+            'combined_stats': {
+                'total_objects': kepler['total'] + tess['total'],
+                'total_confirmed_planets': kepler_dispositions['CONFIRMED'],
+                'total_candidates': kepler_dispositions['CANDIDATE'] + tess_dispositions['PC']
+            },
+            'histogram_units': {'radius': 'Earth radii', 'period': 'days'}
+        }
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        return payload, etag
+    
+    return dataset_stats_cache.get_or_set(
+        key, build, ttl_seconds=current_app.config['DATASET_STATS_CACHE_TTL']
+    )
+
 @datasets_bp.route('/stats', methods=['GET'])
 @token_required
 def get_dataset_stats(current_user):
     """
-    Get statistics about both datasets
+    Get statistics about both datasets: totals, disposition breakdowns and
+    radius/period histograms. Served from a cache with an ETag, so repeat
+    loads with If-None-Match get a 304.
     """
     try:
-        # Get database connection
-        db = get_db()
-        
-        # Get collection stats
-        kepler_count = db.kepler_dataset.count_documents({})
-        tess_count = db.tess_dataset.count_documents({})
-        
-        # Get confirmed vs candidate counts for Kepler
-        kepler_confirmed = db.kepler_dataset.count_documents({
-            'koi_disposition': 'CONFIRMED'
-        })
-        kepler_candidates = db.kepler_dataset.count_documents({
-            'koi_disposition': 'CANDIDATE'
-        })
-        kepler_false_positives = db.kepler_dataset.count_documents({
-            'koi_disposition': 'FALSE POSITIVE'
-        })
-        
-        # Get disposition stats for TESS
-        tess_pc = db.tess_dataset.count_documents({
-            'tfopwg_disp': 'PC'  # Planet Candidate
-        })
-        tess_fp = db.tess_dataset.count_documents({
-            'tfopwg_disp': 'FP'  # False Positive
-        })
+        payload, etag = get_cached_dataset_stats()
         
-        return jsonify({
-            'kepler_dataset': {
-                'total_objects': kepler_count,
-                'confirmed_planets': kepler_confirmed,
-                'candidates': kepler_candidates,
-                'false_positives': kepler_false_positives,
-                'disposition_breakdown': {
-                    'CONFIRMED': kepler_confirmed,
-                    'CANDIDATE': kepler_candidates,
-                    'FALSE POSITIVE': kepler_false_positives
-                }
-            },
-            'tess_dataset': {
-                'total_objects': tess_count,
-                'planet_candidates': tess_pc,
-                'false_positives': tess_fp,
-                'disposition_breakdown': {
-                    'PC': tess_pc,
-                    'FP': tess_fp
-                }
-            },
-            'combined_stats': {
-                'total_objects': kepler_count + tess_count,
-                'total_confirmed_planets': kepler_confirmed,
-                'total_candidates': kepler_candidates + tess_pc
-            }
-        }), 200
+        response = jsonify(payload)
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config['DATASET_STATS_MAX_AGE']
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({
             'message': 'Error retrieving dataset statistics', 
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
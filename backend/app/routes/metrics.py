@@ -0,0 +1,13 @@
+from flask import Blueprint, jsonify
+from app.utils.auth import token_required
+from app.utils.metrics import snapshot
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('', methods=['GET'])
+@token_required
+def get_metrics(current_user):
+    """
+    Per-worker runtime metrics (connection pools, caches, queues, counters)
+    """
+    return jsonify(snapshot()), 200
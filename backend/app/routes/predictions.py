@@ -3,10 +3,29 @@ from marshmallow import Schema, fields, ValidationError
 import requests
 import json
 from app.models.prediction import Prediction
+from app.models.prediction_job import PredictionJob
+from app.models.prediction_stats import PredictionStats
 from app.utils.auth import token_required
+from app.utils.ml_client import get_ml_client
+from app.utils.resilience import CircuitOpenError
+from app.utils.jobs import get_job_runner
+from app.utils.metrics import register_provider
+from app.utils.rate_limit import rate_limit
+from app.utils.singleflight import SingleFlight, payload_key
+from app.utils.cache import TTLCache
+import copy
+import time
 
 predictions_bp = Blueprint('predictions', __name__)
 
+# Identical concurrent predictions (double-submits, several tabs) share one ML call
+prediction_flight = SingleFlight('predictions')
+register_provider('prediction_coalescing', prediction_flight.metrics)
+
+# Per-user history totals; counting is the expensive part of deep pagination
+history_count_cache = TTLCache()
+register_provider('history_count_cache', history_count_cache.stats)
+
 class PredictionRequestSchema(Schema):
     customIdentifier = fields.Str(required=True)
     koi_period = fields.Float(required=True)
@@ -27,6 +46,7 @@ class PredictionRequestSchema(Schema):
 
 @predictions_bp.route('/predict', methods=['POST'])
 @token_required
+@rate_limit('predict')
 def predict_exoplanet(current_user):
     """
     Predict exoplanet classification by sending data to external API
@@ -45,39 +65,24 @@ def predict_exoplanet(current_user):
         except ValidationError as err:
             return jsonify({'message': 'Validation error', 'errors': err.messages}), 400
         
-        # Get ML API configuration from app config
-        external_api_url = current_app.config['ML_API_URL']
-        api_timeout = current_app.config['ML_API_TIMEOUT']
-        api_key = current_app.config.get('ML_API_KEY')
+        # Client shared by all requests of this worker: pooled HTTP, or the in-process model (ML_INFERENCE_MODE)
+        ml_client = get_ml_client()
         
         try:
             # Make actual request to external API
-            print(f"Sending request to external API: {external_api_url}")
+            print(f"Sending request to external API: {ml_client.url}")
             print(f"Request data: {validated_data}")
             
-            # Prepare headers
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'Exoplanet-Research-Platform/1.0'
-            }
-            
-            # Add API key if configured
-            if api_key:
-                headers['Authorization'] = f'Bearer {api_key}'
-                # Or use headers['X-API-Key'] = api_key depending on your API
-            
-            response = requests.post(
-                external_api_url, 
-                json=validated_data, 
-                timeout=api_timeout,
-                headers=headers
+            # Raises for non-2xx responses, returns the parsed JSON body. Requests with the same
+            # features share one in-flight call; the identifier only echoes back, so it is not part of the key
+            api_response, shared = prediction_flight.do(
+                payload_key(validated_data, exclude=('customIdentifier',)),
+                lambda: ml_client.predict(validated_data)
             )
-            
-            # Check if request was successful
-            response.raise_for_status()
-            
-            # Parse JSON response
-            api_response = response.json()
+            # The result object is shared between coalesced callers; give each its own copy
+            api_response = copy.deepcopy(api_response)
+            if shared and isinstance(api_response, dict):
+                api_response['candidateIdentifier'] = validated_data['customIdentifier']
             
             print(f"Received response: {api_response}")
             
@@ -97,30 +102,25 @@ def predict_exoplanet(current_user):
             if 'candidateIdentifier' not in api_response:
                 api_response['candidateIdentifier'] = validated_data["customIdentifier"]
             
-            # Store the prediction in database
-            prediction = Prediction(
-                user_id=current_user._id,
-                request_data=validated_data,
-                response_data=api_response
-            )
+            return store_prediction(current_user, validated_data, api_response)
             
-            if prediction.save():
-                return jsonify({
-                    'message': 'Prediction completed successfully',
-                    'prediction': api_response,
-                    'prediction_id': str(prediction._id)
-                }), 200
-            else:
-                # Still return the prediction even if saving fails
-                return jsonify({
-                    'message': 'Prediction completed but failed to save to history',
-                    'prediction': api_response
-                }), 200
-                
+        except CircuitOpenError as e:
+            # The ML API is failing; answer immediately instead of tying up this worker
+            if current_app.config.get('USE_FALLBACK_PREDICTIONS', False):
+                print(f"{e}; using fallback prediction logic...")
+                return store_prediction(current_user, validated_data, create_fallback_response(validated_data))
+            
+            response = jsonify({
+                'message': 'Prediction service temporarily unavailable',
+                'error': str(e),
+                'suggestion': 'Set USE_FALLBACK_PREDICTIONS=True in config to enable fallback mode'
+            })
+            response.headers['Retry-After'] = str(max(1, int(e.retry_after + 0.999)))
+            return response, 503
         except requests.exceptions.Timeout:
             return jsonify({
                 'message': 'External API request timed out',
-                'error': 'The ML prediction service did not respond within 30 seconds'
+                'error': f'The ML prediction service did not respond within {ml_client.timeout[1]:g} seconds'
             }), 408
         except requests.exceptions.ConnectionError:
             return jsonify({
@@ -152,7 +152,7 @@ def predict_exoplanet(current_user):
             
             if use_fallback:
                 print("Using fallback prediction logic...")
-                api_response = create_fallback_response(validated_data)
+                return store_prediction(current_user, validated_data, create_fallback_response(validated_data))
             else:
                 return jsonify({
                     'message': 'Unexpected error calling external API', 
@@ -163,33 +163,176 @@ def predict_exoplanet(current_user):
     except Exception as e:
         return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
 
+def store_prediction(current_user, validated_data, api_response):
+    """
+    Save a prediction to the user's history and build the endpoint response
+    """
+    prediction = Prediction(
+        user_id=current_user._id,
+        request_data=validated_data,
+        response_data=api_response
+    )
+    
+    # In write-behind mode the insert is batched after the response; the id is generated client-side
+    prediction_writer = current_app.extensions.get('prediction_writer')
+    saved = prediction.insert_deferred(prediction_writer) if prediction_writer else prediction.insert()
+    
+    if saved:
+        return jsonify({
+            'message': 'Prediction completed successfully',
+            'prediction': api_response,
+            'prediction_id': str(prediction._id)
+        }), 200
+    else:
+        # Still return the prediction even if saving fails
+        return jsonify({
+            'message': 'Prediction completed but failed to save to history',
+            'prediction': api_response
+        }), 200
+
+def job_candidates(data):
+    """Candidates of a job request: {"candidates": [...]}, a bare list, or a single candidate"""
+    if isinstance(data, dict) and 'candidates' in data:
+        return data['candidates']
+    return data if isinstance(data, list) else [data]
+
+def job_rate_limit_cost():
+    """A job takes one 'jobs' rate limit token per candidate"""
+    candidates = job_candidates(request.get_json(silent=True))
+    return len(candidates) if isinstance(candidates, list) else 1
+
+@predictions_bp.route('/jobs', methods=['POST'])
+@token_required
+@rate_limit('jobs', cost=job_rate_limit_cost)
+def create_prediction_job(current_user):
+    """
+    Queue one or many candidates for background scoring and return the job id immediately
+    """
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'message': 'No data provided'}), 400
+        
+        candidates = job_candidates(data)
+        
+        if not isinstance(candidates, list) or not candidates:
+            return jsonify({'message': "'candidates' must be a non-empty list"}), 400
+        
+        max_candidates = current_app.config['PREDICTION_JOB_MAX_CANDIDATES']
+        if len(candidates) > max_candidates:
+            return jsonify({'message': f'Too many candidates: {len(candidates)} (max {max_candidates})'}), 413
+        
+        # Validate everything up front so a job never fails on bad input halfway through
+        try:
+            validated_candidates = PredictionRequestSchema(many=True).load(candidates)
+        except ValidationError as err:
+            return jsonify({'message': 'Validation error', 'errors': err.messages}), 400
+        
+        job = PredictionJob(user_id=current_user._id, candidates=validated_candidates)
+        if not job.save():
+            return jsonify({'message': 'Failed to create prediction job'}), 500
+        
+        get_job_runner().submit(job)
+        
+        response = jsonify({
+            'message': 'Prediction job queued',
+            'job': job.to_dict(),
+            'status_url': f'/api/v1/predictions/jobs/{job._id}'
+        })
+        response.headers['Location'] = f'/api/v1/predictions/jobs/{job._id}'
+        return response, 202
+        
+    except Exception as e:
+        return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
+
+@predictions_bp.route('/jobs/<job_id>', methods=['GET'])
+@token_required
+def get_prediction_job(current_user, job_id):
+    """
+    Get the status of a prediction job; ?wait=<seconds> long-polls until it finishes
+    """
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), current_app.config['PREDICTION_JOB_MAX_WAIT'])
+    except ValueError:
+        return jsonify({'message': 'Invalid wait parameter'}), 400
+    
+    try:
+        job = PredictionJob.find_by_id(job_id)
+        
+        if not job:
+            return jsonify({'message': 'Prediction job not found'}), 404
+        
+        # Check if job belongs to current user
+        if str(job.user_id) != str(current_user._id):
+            return jsonify({'message': 'Access denied'}), 403
+        
+        deadline = time.monotonic() + wait
+        while not job.is_finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Wakes immediately for jobs run by this process; re-checks the database at least every second
+            get_job_runner().wait(job._id, min(remaining, 1.0))
+            job = PredictionJob.find_by_id(job_id)
+        
+        return jsonify(job.to_dict()), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
+
 @predictions_bp.route('/history', methods=['GET'])
 @token_required
 def get_prediction_history(current_user):
     """
-    Get user's prediction history with pagination
+    Get user's prediction history, newest first.
+    
+    Cursor pagination: pass `cursor=true` for the first page, then the
+    previous response's `next_cursor` as `after`; add `include_total=true`
+    for the (cached) total. Without either, the original `page` pagination
+    and response shape are kept, with an exact total.
     """
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
         limit = min(int(request.args.get('limit', 10)), 50)  # Max 50 per page
-        skip = (page - 1) * limit
+        if limit < 1:
+            raise ValueError
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
+        cursor_mode = 'after' in request.args or request.args.get('cursor', 'false').lower() == 'true'
         
-        # Get predictions for current user
-        predictions = Prediction.find_by_user_id(current_user._id, limit=limit, skip=skip)
-        total_count = Prediction.count_by_user_id(current_user._id)
+        if not cursor_mode:
+            # Offset pagination (kept for compatibility; cost grows with page depth)
+            page = int(request.args.get('page', 1))
+            if page < 1:
+                raise ValueError
+            skip = (page - 1) * limit
+            
+            predictions = Prediction.find_by_user_id(current_user._id, limit=limit, skip=skip)
+            total_count = Prediction.count_by_user_id(current_user._id)
+            
+            return jsonify({
+                'predictions': [prediction.to_dict() for prediction in predictions],
+                'pagination': {
+                    'page': page,
+                    'limit': limit,
+                    'total': total_count,
+                    'pages': (total_count + limit - 1) // limit
+                }
+            }), 200
         
-        # Convert to dict format
-        predictions_list = [prediction.to_dict() for prediction in predictions]
+        predictions, next_cursor = Prediction.find_page_by_user_id(
+            current_user._id, limit=limit, after=request.args.get('after')
+        )
+        pagination = {
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
+        if include_total:
+            pagination['total'] = count_user_predictions(current_user._id)
         
         return jsonify({
-            'predictions': predictions_list,
-            'pagination': {
-                'page': page,
-                'limit': limit,
-                'total': total_count,
-                'pages': (total_count + limit - 1) // limit
-            }
+            'predictions': [prediction.to_dict() for prediction in predictions],
+            'pagination': pagination
         }), 200
         
     except ValueError:
@@ -197,6 +340,17 @@ def get_prediction_history(current_user):
     except Exception as e:
         return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
 
+def count_user_predictions(user_id):
+    """
+    Total predictions of a user for cursor pages' `include_total`, cached for
+    HISTORY_COUNT_CACHE_TTL seconds (so it may lag new predictions by that long)
+    """
+    return history_count_cache.get_or_set(
+        str(user_id),
+        lambda: Prediction.count_by_user_id(user_id),
+        ttl_seconds=current_app.config['HISTORY_COUNT_CACHE_TTL']
+    )
+
 @predictions_bp.route('/history/<prediction_id>', methods=['GET'])
 @token_required
 def get_prediction_detail(current_user, prediction_id):
@@ -222,38 +376,17 @@ def get_prediction_detail(current_user, prediction_id):
 @token_required
 def get_prediction_stats(current_user):
     """
-    Get user's prediction statistics
+    Get user's prediction statistics over their whole history,
+    read from the PredictionStats rollup once it is complete
     """
     try:
-        total_predictions = Prediction.count_by_user_id(current_user._id)
-        
-        # Get recent predictions to calculate stats
-        recent_predictions = Prediction.find_by_user_id(current_user._id, limit=100)
-        
-        exoplanet_count = 0
-        confidence_sum = 0
-        planet_types = {}
+        stats = PredictionStats.find_by_user_id(current_user._id)
+        if stats is None or not stats.complete:
+            # History from before rollups existed that rebuild_prediction_stats.py has not backfilled
+            # yet: aggregate it directly (rebuilding here could race with concurrent $inc updates)
+            stats = PredictionStats.compute(current_user._id)
         
-        for prediction in recent_predictions:
-            response_data = prediction.response_data
-            if response_data.get('isExoplanet'):
-                exoplanet_count += 1
-            
-            confidence = response_data.get('confidence', 0)
-            confidence_sum += confidence
-            
-            planet_type = response_data.get('details', {}).get('planetType')
-            if planet_type:
-                planet_types[planet_type] = planet_types.get(planet_type, 0) + 1
-        
-        avg_confidence = confidence_sum / len(recent_predictions) if recent_predictions else 0
-        
-        return jsonify({
-            'total_predictions': total_predictions,
-            'confirmed_exoplanets': exoplanet_count,
-            'average_confidence': round(avg_confidence, 3),
-            'planet_type_distribution': planet_types
-        }), 200
+        return jsonify(stats.to_dict()), 200
         
     except Exception as e:
         return jsonify({'message': 'Internal server error', 'error': str(e)}), 500
@@ -264,9 +397,9 @@ def test_ml_api_connectivity(current_user):
     """
     Test connectivity to the external ML API
     """
+    ml_client = get_ml_client()
+    external_api_url = ml_client.url
     try:
-        external_api_url = current_app.config['ML_API_URL']
-        api_timeout = current_app.config['ML_API_TIMEOUT']
         
         # Test with minimal data or health check endpoint
         test_data = {
@@ -288,27 +421,13 @@ def test_ml_api_connectivity(current_user):
             "koi_kepmag": 15.0
         }
         
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'Exoplanet-Research-Platform/1.0'
-        }
-        
-        api_key = current_app.config.get('ML_API_KEY')
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-        
-        response = requests.post(
-            external_api_url,
-            json=test_data,
-            timeout=api_timeout,
-            headers=headers
-        )
+        result = ml_client.check(test_data)
         
         return jsonify({
             'message': 'ML API connectivity test successful',
             'api_url': external_api_url,
-            'status_code': response.status_code,
-            'response_time_ms': response.elapsed.total_seconds() * 1000,
+            'status_code': result['status_code'],
+            'response_time_ms': result['response_time_ms'],
             'api_available': True
         }), 200
         
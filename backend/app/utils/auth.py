@@ -1,16 +1,26 @@
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import request, jsonify, current_app
+from bson import ObjectId
+from flask import request, jsonify, current_app, g
 from app.models.user import User
+from app.utils.metrics import increment, register_provider
+from app.utils.user_cache import user_cache
 
-def generate_token(user_id):
-    """Generate JWT token for user"""
+register_provider('user_cache', user_cache.stats)
+
+def generate_token(user_id, user=None):
+    """Generate JWT token for user; with `user`, its profile is embedded as signed
+    claims that token_required can trust instead of loading the user"""
     payload = {
         'user_id': str(user_id),
         'exp': datetime.utcnow() + timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES_IN']),
         'iat': datetime.utcnow()
     }
+    if user is not None:
+        payload['username'] = user.username
+        payload['email'] = user.email
+        payload['created_at'] = user.created_at.isoformat() if isinstance(user.created_at, datetime) else user.created_at
     
     return jwt.encode(
         payload,
@@ -32,6 +42,37 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return None
 
+def load_user(payload):
+    """
+    User for a decoded token. With AUTH_TRUST_TOKEN_CLAIMS the signed claims are
+    used as-is (no database read; the user has no password hash). Otherwise the
+    user document comes from the per-process cache, keyed by user id and token
+    `iat`, or from the database on a miss.
+    """
+    if current_app.config['AUTH_TRUST_TOKEN_CLAIMS'] and 'username' in payload:
+        increment('auth.trusted_claims')
+        try:
+            return User(
+                username=payload['username'],
+                email=payload['email'],
+                password_hash=None,
+                created_at=datetime.fromisoformat(payload['created_at']),
+                _id=ObjectId(payload['user_id'])
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    key = (str(payload['user_id']), payload.get('iat'))
+    user_data = user_cache.get(key)
+    if user_data is None:
+        user_data = User.find_document_by_id(payload['user_id'])
+        if user_data is None:
+            return None
+        if user_cache.ttl_seconds > 0:
+            user_cache.set(key, user_data)
+    # A fresh User per request, so handlers never share (or mutate) a cached object
+    return User.from_document(user_data)
+
 def token_required(f):
     """Decorator to require JWT token for protected routes"""
     @wraps(f)
@@ -54,11 +95,14 @@ def token_required(f):
         if payload is None:
             return jsonify({'message': 'Token is invalid or expired'}), 401
         
-        # Get user from database
-        current_user = User.find_by_id(payload['user_id'])
+        # Get user from token claims, cache or database
+        current_user = load_user(payload)
         if not current_user:
             return jsonify({'message': 'User not found'}), 401
         
+        # Also kept on `g` for request-scoped helpers such as rate limiting
+        g.current_user = current_user
+        
         # Pass the current user to the decorated function
         return f(current_user, *args, **kwargs)
     
@@ -82,4 +126,4 @@ def get_current_user():
     if payload is None:
         return None
     
-    return User.find_by_id(payload['user_id'])
\ No newline at end of file
+    return load_user(payload)
\ No newline at end of file
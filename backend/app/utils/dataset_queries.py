@@ -0,0 +1,173 @@
+import base64
+import json
+from bson import ObjectId
+from bson.errors import InvalidId
+
+# Filterable/sortable fields per dataset. Filters and sorts accept either the short
+# name (`min_period`, `sort=-radius`) or the archive column (`min_koi_period`, `sort=-koi_prad`).
+# `search` lists the designation fields indexed by app.utils.dataset_search: `names`
+# are free-text designations, `labelled` numeric ids searchable with a catalogue
+# prefix ("TOI 700", "TIC 50365310") and `ids` numeric ids matched exactly.
+DATASETS = {
+    'kepler': {
+        'collection': 'kepler_dataset',
+        'disposition': 'koi_disposition',
+        'fields': {
+            'period': 'koi_period',
+            'radius': 'koi_prad',
+            'temp': 'koi_teq',
+            'score': 'koi_score'
+        },
+        'search': {
+            'names': ['kepoi_name', 'kepler_name'],
+            'labelled': {'kepid': 'kic'},
+            'ids': {'kepid': 'int'}
+        }
+    },
+    'tess': {
+        'collection': 'tess_dataset',
+        'disposition': 'tfopwg_disp',
+        'fields': {
+            'period': 'pl_orbper',
+            'radius': 'pl_rade',
+            'temp': 'pl_eqt'
+        },
+        'search': {
+            'names': ['ctoi_alias'],
+            'labelled': {'toi': 'toi', 'tid': 'tic'},
+            'ids': {'toi': 'toi', 'tid': 'int'}
+        }
+    }
+}
+
+class DatasetQueryError(ValueError):
+    """Invalid filter, sort or cursor parameter; `errors` maps parameter name to messages"""
+    
+    def __init__(self, param, message):
+        super().__init__(f"{param}: {message}")
+        self.errors = {param: [message]}
+
+def dataset_indexes(spec):
+    """Compound indexes serving every filter/sort combination of a dataset.
+    
+    Each numeric field gets (field, _id) for range filters and sorts, and
+    (disposition, field, _id) for the same under a disposition filter; _id is the
+    keyset tie-breaker. (disposition, _id) serves a disposition filter in the
+    default order; `search_keys` and the numeric ids serve dataset search.
+    """
+    disposition = spec['disposition']
+    indexes = [[(disposition, 1), ('_id', 1)]]
+    for field in spec['fields'].values():
+        indexes.append([(field, 1), ('_id', 1)])
+        indexes.append([(disposition, 1), (field, 1), ('_id', 1)])
+    indexes.append([('search_keys', 1)])
+    for field in spec['search']['ids']:
+        indexes.append([(field, 1)])
+    return indexes
+
+def _resolve_field(spec, name):
+    if name in spec['fields']:
+        return spec['fields'][name]
+    if name in spec['fields'].values():
+        return name
+    return None
+
+def _parse_number(param, value):
+    try:
+        return float(value)
+    except ValueError:
+        raise DatasetQueryError(param, 'Must be a number')
+
+def build_filter(spec, args):
+    """MongoDB filter from request args: `disposition` (comma-separated) and `min_<field>`/`max_<field>` ranges"""
+    query = {}
+    
+    disposition_field = spec['disposition']
+    for param in ('disposition', disposition_field):
+        if args.get(param):
+            values = [value.strip().upper() for value in args[param].split(',') if value.strip()]
+            query[disposition_field] = values[0] if len(values) == 1 else {'$in': values}
+    
+    for param, value in args.items():
+        bound, _, name = param.partition('_')
+        if bound not in ('min', 'max') or not name:
+            continue
+        field = _resolve_field(spec, name)
+        if field is None:
+            raise DatasetQueryError(param, f"Unknown filter field '{name}'")
+        operator = '$gte' if bound == 'min' else '$lte'
+        query.setdefault(field, {})[operator] = _parse_number(param, value)
+    
+    return query
+
+def parse_sort(spec, value):
+    """`sort` argument -> (field, direction); defaults to insertion (_id) order"""
+    if not value:
+        return '_id', 1
+    direction = -1 if value.startswith('-') else 1
+    field = _resolve_field(spec, value.lstrip('-+'))
+    if field is None:
+        raise DatasetQueryError('sort', f"Cannot sort by '{value.lstrip('-+')}'")
+    return field, direction
+
+def encode_cursor(sort_field, item):
+    """Cursor just past `item`: its _id in default order, otherwise its (sort value, _id)"""
+    if sort_field == '_id':
+        return str(item['_id'])
+    raw = json.dumps({'v': item.get(sort_field), 'i': str(item['_id'])}).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def cursor_filter(sort_field, direction, cursor):
+    """Filter selecting the documents after `cursor` in (sort_field, _id) order.
+    
+    MongoDB orders missing/null values before numbers, so ascending walks the
+    documents without a value first and descending walks them last.
+    """
+    try:
+        if sort_field == '_id':
+            return {'_id': {'$gt': ObjectId(cursor)}}
+        state = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        value, last_id = state['v'], ObjectId(state['i'])
+    except (ValueError, TypeError, KeyError, InvalidId):
+        raise DatasetQueryError('after', 'Invalid cursor')
+    
+    if direction == 1:
+        if value is None:
+            return {'$or': [
+                {sort_field: None, '_id': {'$gt': last_id}},
+                {sort_field: {'$ne': None}}
+            ]}
+        return {'$or': [
+            {sort_field: {'$gt': value}},
+            {sort_field: value, '_id': {'$gt': last_id}}
+        ]}
+    
+    if value is None:
+        return {sort_field: None, '_id': {'$lt': last_id}}
+    return {'$or': [
+        {sort_field: {'$lt': value}},
+        {sort_field: value, '_id': {'$lt': last_id}},
+        {sort_field: None}
+    ]}
+
+def sort_spec(sort_field, direction):
+    if sort_field == '_id':
+        return [('_id', direction)]
+    return [(sort_field, direction), ('_id', direction)]
+
+def plan_stages(explain_output):
+    """All stage names in an explain() winning plan (COLLSCAN, IXSCAN, ...)"""
+    stages = []
+    
+    def walk(node):
+        if isinstance(node, dict):
+            if 'stage' in node:
+                stages.append(node['stage'])
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+    
+    walk(explain_output.get('queryPlanner', {}).get('winningPlan', {}))
+    return stages
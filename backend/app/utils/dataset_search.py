@@ -0,0 +1,124 @@
+import re
+
+# Ranking tiers, best first: numeric id match, whole designation, designation prefix
+# (trigram 'fuzzy' matches come after all of them)
+MATCH_RANK = {'id': 0, 'exact': 1, 'prefix': 2}
+
+# Prefix matches fetched per requested result, so ranking has some choice
+PREFIX_CANDIDATES = 3
+
+_SEPARATORS = re.compile(r'[^a-z0-9.]+')
+_LEADING_ZEROS = re.compile(r'^([a-z]+)0+(?=\d)')
+_NUMBER = re.compile(r'^([a-z]*)(\d+(?:\.\d+)?)$')
+
+def normalize(text):
+    """'Kepler-227 b' -> 'kepler227b': lower-cased with spaces and separators removed"""
+    return _SEPARATORS.sub('', str(text).lower()).strip('.')
+
+def _format_number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def search_keys(spec, document):
+    """
+    Normalised designation keys stored on each document at ingest.
+    
+    Names are also keyed without their zero padding ('k00752.01' and 'k752.01')
+    and labelled ids with their catalogue prefix ('toi700.01', 'tic50365310').
+    """
+    keys = set()
+    for field in spec['search']['names']:
+        value = document.get(field)
+        if value is None:
+            continue
+        key = normalize(value)
+        if key:
+            keys.add(key)
+            keys.add(_LEADING_ZEROS.sub(r'\1', key))
+    for field, label in spec['search']['labelled'].items():
+        value = document.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            keys.add(label + _format_number(value))
+    return sorted(keys)
+
+def _id_clauses(spec, key):
+    """Exact matches on the numeric id fields for queries like '10797460', 'TIC 50365310' or 'TOI 700'"""
+    match = _NUMBER.match(key)
+    if not match:
+        return []
+    label, number = match.groups()
+    
+    clauses = []
+    for field, kind in spec['search']['ids'].items():
+        if label and spec['search']['labelled'].get(field) != label:
+            continue
+        if kind == 'int':
+            if '.' not in number:
+                clauses.append({field: int(number)})
+        elif '.' in number:
+            clauses.append({field: float(number)})
+        else:
+            # 'TOI 700' names the star: every planet 700.01, 700.02, ...
+            clauses.append({field: {'$gte': float(number), '$lt': float(number) + 1}})
+    return clauses
+
+def search_queries(spec, query, limit):
+    """(match tier, filter, limit) for each indexed lookup a search runs, best tier first"""
+    key = normalize(query)
+    if not key:
+        return []
+    
+    queries = []
+    id_clauses = _id_clauses(spec, key)
+    if id_clauses:
+        queries.append(('id', {'$or': id_clauses}, limit))
+    queries.append(('exact', {'search_keys': key}, limit))
+    # Anchored and case-sensitive against lower-cased keys, so it becomes an index range scan
+    queries.append(('prefix', {'search_keys': {'$regex': '^' + re.escape(key)}}, limit * PREFIX_CANDIDATES))
+    return queries
+
+def search_dataset(collection, spec, query, limit=10, fuzzy_index=None, min_similarity=0.3):
+    """
+    Ranked search over one dataset: id matches, then exact designations, then
+    prefixes, shortest matching designation first. Every lookup is an index scan
+    bounded by `limit`, so latency does not grow with the catalogue.
+    
+    With a TrigramIndex as `fuzzy_index`, remaining slots are filled with
+    similar designations for misspelled or partial queries, fetched with one
+    `$in`; these carry `_match: 'fuzzy'` and their similarity as `_score`.
+    """
+    key = normalize(query)
+    found = {}
+    for match, query_filter, query_limit in search_queries(spec, query, limit):
+        for document in collection.find(query_filter).limit(query_limit):
+            found.setdefault(document['_id'], (match, document))
+    
+    def rank(entry):
+        match, document = entry
+        matching = [k for k in document.get('search_keys', []) if k.startswith(key)]
+        return MATCH_RANK[match], min((len(k) for k in matching), default=0), min(matching, default='')
+    
+    ranked = sorted(found.values(), key=rank)[:limit]
+    
+    if fuzzy_index is not None and len(ranked) < limit:
+        matches = [
+            (doc_id, score) for doc_id, score, _ in fuzzy_index.search(query, limit, min_similarity)
+            if doc_id not in found
+        ][:limit - len(ranked)]
+        if matches:
+            documents = {
+                document['_id']: document
+                for document in collection.find({'_id': {'$in': [doc_id for doc_id, _ in matches]}})
+            }
+            for doc_id, score in matches:
+                # Skip documents a replacing ingest removed since the index was built
+                if doc_id in documents:
+                    documents[doc_id]['_score'] = score
+                    ranked.append(('fuzzy', documents[doc_id]))
+    
+    results = []
+    for match, document in ranked:
+        document.pop('search_keys', None)
+        document['_match'] = match
+        results.append(document)
+    return results
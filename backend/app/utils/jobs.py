@@ -0,0 +1,127 @@
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.models.prediction import Prediction
+from app.models.prediction_job import PredictionJob
+from app.utils.metrics import increment
+from app.utils.ml_client import get_ml_client
+
+class JobRunner:
+    """Background pool that scores PredictionJobs in batches.
+    
+    Jobs are persisted before they are queued here, so the request thread only
+    pays for one insert. Each worker thread claims a job, sends its candidates
+    to the ML client `batch_size` at a time, stores every result with
+    `Prediction.insert` and records progress on the job document after each batch.
+    Jobs live in this process's queue: a job whose process stops before it
+    finishes stays in the `queued`/`running` state.
+    """
+    
+    def __init__(self, app, max_workers=2, batch_size=100):
+        self.app = app
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prediction-job')
+        self._lock = threading.Lock()
+        self._events = {}
+        self._queued = 0
+        self._running = 0
+    
+    @classmethod
+    def from_config(cls, app):
+        return cls(
+            app,
+            max_workers=app.config['PREDICTION_JOB_WORKERS'],
+            batch_size=app.config['PREDICTION_JOB_BATCH_SIZE']
+        )
+    
+    def submit(self, job):
+        with self._lock:
+            self._queued += 1
+            self._events[str(job._id)] = threading.Event()
+        self._executor.submit(self._run, job)
+    
+    def wait(self, job_id, timeout):
+        """Wait up to `timeout` seconds for a job to finish.
+        
+        Returns as soon as the job finishes if this process is running it;
+        jobs queued in another worker process are only re-checked by the caller.
+        """
+        with self._lock:
+            event = self._events.get(str(job_id))
+        if event is None:
+            time.sleep(timeout)
+            return False
+        return event.wait(timeout)
+    
+    def _run(self, job):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            with self.app.app_context():
+                self._process(job)
+        finally:
+            with self._lock:
+                self._running -= 1
+                event = self._events.pop(str(job._id), None)
+            if event is not None:
+                event.set()
+    
+    def _process(self, job):
+        if not PredictionJob.mark_running(job._id):
+            return
+        
+        ml_client = get_ml_client()
+        started = time.perf_counter()
+        try:
+            for start in range(0, job.total, self.batch_size):
+                batch = job.candidates[start:start + self.batch_size]
+                results = ml_client.predict_batch(batch)
+                
+                prediction_ids, errors = [], []
+                for offset, (candidate, result) in enumerate(zip(batch, results)):
+                    if 'error' in result:
+                        errors.append({
+                            'index': start + offset,
+                            'candidateIdentifier': candidate.get('customIdentifier'),
+                            'error': result['error']
+                        })
+                        continue
+                    
+                    if not result.get('candidateIdentifier'):
+                        result['candidateIdentifier'] = candidate['customIdentifier']
+                    prediction = Prediction(user_id=job.user_id, request_data=candidate, response_data=result)
+                    if prediction.insert():
+                        prediction_ids.append(prediction._id)
+                    else:
+                        errors.append({
+                            'index': start + offset,
+                            'candidateIdentifier': candidate.get('customIdentifier'),
+                            'error': 'Failed to save prediction'
+                        })
+                
+                PredictionJob.record_progress(job._id, prediction_ids, errors)
+            
+            PredictionJob.mark_finished(job._id)
+            increment('prediction_jobs.completed')
+            print(f"✅ Prediction job {job._id}: {job.total} candidates in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            traceback.print_exc()
+            PredictionJob.mark_finished(job._id, error=str(e))
+            increment('prediction_jobs.failed')
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'batch_size': self.batch_size,
+                'queued': self._queued,
+                'running': self._running
+            }
+
+def get_job_runner():
+    """Job runner of the current app"""
+    return current_app.extensions['job_runner']
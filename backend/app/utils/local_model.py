@@ -0,0 +1,115 @@
+import os
+import sys
+import threading
+import time
+
+class LocalModelClient:
+    """In-process drop-in for MLClient when the ML service runs on the same host.
+    
+    Loads the ai_model_final artifacts into this worker and scores predictions
+    directly, returning the same response shape as the ML service's /predict,
+    so there is no HTTP round-trip or JSON encode/decode per prediction.
+    Requires the ML service's dependencies (numpy, plus xgboost unless
+    ML_INFERENCE_BACKEND=numpy) in the backend environment.
+    """
+    
+    def __init__(self, model_dir, artifacts_dir=None, backend='xgboost'):
+        self.model_dir = os.path.abspath(model_dir)
+        self.artifacts_dir = os.path.abspath(artifacts_dir or os.path.join(self.model_dir, 'artifacts'))
+        self.backend = backend
+        self.url = f'local://{self.artifacts_dir}'
+        
+        self._load_lock = threading.Lock()
+        self._pipeline = None
+        self._format_prediction = None
+        self._score_records = None
+        self._model_version = None
+        self._load_ms = None
+        
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            model_dir=config['ML_MODEL_DIR'],
+            artifacts_dir=config.get('ML_ARTIFACTS_DIR'),
+            backend=config['ML_INFERENCE_BACKEND']
+        )
+    
+    def _load(self):
+        """Load and warm the model once per process"""
+        if self._pipeline is not None:
+            return self._pipeline
+        
+        with self._load_lock:
+            if self._pipeline is None:
+                started = time.perf_counter()
+                
+                # ai_model_final is not an installed package; import its `src` modules from disk
+                if self.model_dir not in sys.path:
+                    sys.path.insert(0, self.model_dir)
+                from src.utils import artifacts_fingerprint, load_artifacts, model_version
+                from src.pipeline import CompiledPipeline, format_prediction, score_records
+                
+                fingerprint = artifacts_fingerprint(self.artifacts_dir)
+                artifacts = load_artifacts(self.artifacts_dir, backend=self.backend)
+                pipeline = CompiledPipeline.from_artifacts(artifacts)
+                pipeline.predict_one([None] * len(pipeline.feature_columns))
+                
+                self._format_prediction = format_prediction
+                self._score_records = score_records
+                self._model_version = model_version(artifacts, fingerprint)
+                self._load_ms = round((time.perf_counter() - started) * 1000, 3)
+                self._pipeline = pipeline
+                print(f"🧠 Loaded model {self._model_version[:12]} in-process from {self.artifacts_dir} in {self._load_ms} ms")
+        return self._pipeline
+    
+    def predict(self, payload):
+        """Score one candidate; same contract as MLClient.predict"""
+        with self._lock:
+            self._requests += 1
+        try:
+            pipeline = self._load()
+            custom_identifier = payload.get('customIdentifier') or payload.get('candidateIdentifier')
+            row = {col: payload.get(col) for col in pipeline.feature_columns}
+            proba = pipeline.predict_one([row[col] for col in pipeline.feature_columns])
+            return self._format_prediction(custom_identifier, row, proba)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+    
+    def predict_batch(self, candidates):
+        """Score many candidates in one vectorised pass; same contract as MLClient.predict_batch"""
+        with self._lock:
+            self._requests += 1
+        try:
+            pipeline = self._load()
+            return self._score_records(pipeline, candidates)
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+    
+    def check(self, payload):
+        """Score `payload` once and report how long it took"""
+        started = time.perf_counter()
+        self.predict(payload)
+        return {
+            'status_code': 200,
+            'response_time_ms': (time.perf_counter() - started) * 1000
+        }
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'mode': 'local',
+                'backend': self.backend,
+                'loaded': self._pipeline is not None,
+                'model_version': self._model_version,
+                'load_ms': self._load_ms,
+                'requests': self._requests,
+                'errors': self._errors
+            }
@@ -0,0 +1,31 @@
+import threading
+from collections import defaultdict
+
+# Process-wide counters plus named providers that report their own state on demand
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_providers = {}
+
+def increment(name, value=1):
+    """Increment a named counter"""
+    with _lock:
+        _counters[name] += value
+
+def register_provider(name, provider):
+    """Register a callable returning a dict of metrics, reported under `name`"""
+    with _lock:
+        _providers[name] = provider
+
+def snapshot():
+    """Current value of every counter and provider"""
+    with _lock:
+        counters = dict(_counters)
+        providers = dict(_providers)
+    
+    metrics = {'counters': counters}
+    for name, provider in providers.items():
+        try:
+            metrics[name] = provider()
+        except Exception as e:
+            metrics[name] = {'error': str(e)}
+    return metrics
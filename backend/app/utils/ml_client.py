@@ -0,0 +1,249 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app.utils.metrics import increment
+from app.utils.resilience import CircuitBreaker, LatencyTracker, retry_call
+
+# Responses that mean "this replica cannot serve right now" rather than "bad request"
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+def is_retryable(error):
+    """Failures where the request never reached the model, or a gateway/overload status.
+    
+    Read timeouts are not retried: the ML service may still be working on the
+    request, and waiting another full timeout is what we are trying to avoid.
+    """
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return True  # includes ConnectTimeout
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return False
+
+def is_service_failure(error):
+    """Errors that count against the circuit breaker (4xx responses do not)"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.RequestException, ValueError))
+
+class MLClient:
+    """Pooled, keep-alive HTTP client for the ML prediction API.
+    
+    One instance is created per worker process in `create_app` and shared by
+    all request threads, so connections (and TLS sessions) to ML_API_URL are
+    reused instead of being re-established on every prediction.
+    """
+    
+    def __init__(self, url, connect_timeout=5.0, read_timeout=30.0, pool_size=10, api_key=None,
+                 max_retries=2, retry_backoff=0.1, breaker=None, hedge_url=None, hedge_min_delay=0.05,
+                 batch_url=None):
+        self.url = url
+        self.batch_url = batch_url or url.rstrip('/') + '/batch'
+        self.timeout = (connect_timeout, read_timeout)
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.breaker = breaker or CircuitBreaker('ml_client')
+        
+        # Hedging: if the primary has not answered after its recent p95 latency, ask the second replica too
+        self.hedge_url = hedge_url
+        self.hedge_min_delay = hedge_min_delay
+        self.latency = LatencyTracker()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * pool_size, thread_name_prefix='ml-hedge') if hedge_url else None
+        self._hedged = 0
+        self._hedge_wins = 0
+        
+        self.session = requests.Session()
+        # pool_size idle sockets are kept; a burst beyond it opens extra connections (closed after use)
+        # rather than blocking: requests cannot bound the wait for a pooled connection, so a blocked
+        # thread would hang until one frees up instead of failing into the circuit breaker
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'User-Agent': 'Exoplanet-Research-Platform/1.0',
+            'Connection': 'keep-alive'
+        })
+        if api_key:
+            self.session.headers['Authorization'] = f'Bearer {api_key}'
+        
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._requests = 0
+        self._errors = 0
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            url=config['ML_API_URL'],
+            batch_url=config.get('ML_API_BATCH_URL'),
+            connect_timeout=config['ML_API_CONNECT_TIMEOUT'],
+            read_timeout=config['ML_API_READ_TIMEOUT'],
+            pool_size=config['ML_API_POOL_SIZE'],
+            api_key=config.get('ML_API_KEY'),
+            max_retries=config['ML_API_MAX_RETRIES'],
+            retry_backoff=config['ML_API_RETRY_BACKOFF'],
+            breaker=CircuitBreaker(
+                'ml_client',
+                error_rate_threshold=config['ML_API_BREAKER_ERROR_RATE'],
+                min_requests=config['ML_API_BREAKER_MIN_REQUESTS'],
+                window_seconds=config['ML_API_BREAKER_WINDOW'],
+                reset_timeout=config['ML_API_BREAKER_RESET_TIMEOUT']
+            ),
+            hedge_url=config.get('ML_API_HEDGE_URL'),
+            hedge_min_delay=config['ML_API_HEDGE_MIN_DELAY_MS'] / 1000.0
+        )
+    
+    def post(self, payload, url=None):
+        """POST `payload` as JSON and return the raw response"""
+        with self._lock:
+            self._in_flight += 1
+            self._requests += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        try:
+            return self.session.post(url or self.url, json=payload, timeout=self.timeout)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+    
+    def _call(self, url, payload):
+        response = self.post(payload, url=url)
+        response.raise_for_status()
+        return response.json()
+    
+    def _call_primary(self, payload):
+        started = time.perf_counter()
+        result = self._call(self.url, payload)
+        self.latency.record(time.perf_counter() - started)
+        return result
+    
+    def _call_hedged(self, payload):
+        delay = self.latency.percentile(95) if self.hedge_url else None
+        if delay is None:
+            return self._call_primary(payload)
+        
+        primary = self._hedge_executor.submit(self._call_primary, payload)
+        try:
+            return primary.result(timeout=max(delay, self.hedge_min_delay))
+        except FutureTimeoutError:
+            pass
+        
+        with self._lock:
+            self._hedged += 1
+        increment('ml_client.hedged')
+        hedge = self._hedge_executor.submit(self._call, self.hedge_url, payload)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return future.result()
+        # Both failed: report the primary's error
+        return primary.result()
+    
+    def _resilient(self, fn):
+        """Run `fn` through the circuit breaker with bounded, jittered retries"""
+        self.breaker.before_call()
+        try:
+            result = retry_call(
+                fn,
+                max_retries=self.max_retries,
+                base_delay=self.retry_backoff,
+                is_retryable=is_retryable,
+                name='ml_client'
+            )
+        except Exception as e:
+            if is_service_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        self.breaker.record_success()
+        return result
+    
+    def predict(self, payload):
+        """Score one candidate through the circuit breaker, with bounded retries and optional hedging.
+        
+        Raises CircuitOpenError without calling the API while the breaker is open,
+        requests exceptions on HTTP/transport errors and ValueError on bad JSON.
+        """
+        return self._resilient(lambda: self._call_hedged(payload))
+    
+    def predict_batch(self, candidates):
+        """Score many candidates in one call to the ML service's /predict/batch.
+        
+        Returns one result per candidate, in order; rows the ML service rejects
+        come back as {"index", "candidateIdentifier", "error"} entries.
+        """
+        response = self._resilient(lambda: self._call(self.batch_url, {'candidates': candidates}))
+        if not isinstance(response, dict) or not isinstance(response.get('results'), list):
+            raise ValueError("Batch response does not contain a 'results' list")
+        return response['results']
+    
+    def check(self, payload):
+        """POST `payload` once and report the status code and round-trip time"""
+        response = self.post(payload)
+        return {
+            'status_code': response.status_code,
+            'response_time_ms': response.elapsed.total_seconds() * 1000
+        }
+    
+    def metrics(self):
+        """Pool utilisation for this worker"""
+        idle_connections = 0
+        opened_connections = 0
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                opened_connections += pool.num_connections
+                idle_connections += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+        
+        p95 = self.latency.percentile(95)
+        with self._lock:
+            return {
+                'mode': 'remote',
+                'pool_size': self.pool_size,
+                'connect_timeout': self.timeout[0],
+                'read_timeout': self.timeout[1],
+                'in_flight': self._in_flight,
+                'max_in_flight': self._max_in_flight,
+                'utilisation': round(self._in_flight / self.pool_size, 3) if self.pool_size else None,
+                'requests': self._requests,
+                'errors': self._errors,
+                'connections_opened': opened_connections,
+                'idle_connections': idle_connections,
+                'max_retries': self.max_retries,
+                'breaker': self.breaker.metrics(),
+                'hedge': {
+                    'enabled': self.hedge_url is not None,
+                    'delay_p95_ms': round(p95 * 1000, 3) if p95 is not None else None,
+                    'hedged': self._hedged,
+                    'hedge_wins': self._hedge_wins
+                }
+            }
+
+def create_ml_client(config):
+    """Client for the configured ML_INFERENCE_MODE: 'remote' (HTTP) or 'local' (in-process)"""
+    mode = config['ML_INFERENCE_MODE']
+    if mode == 'remote':
+        return MLClient.from_config(config)
+    if mode == 'local':
+        from app.utils.local_model import LocalModelClient
+        return LocalModelClient.from_config(config)
+    raise ValueError(f"Unknown ML_INFERENCE_MODE: {mode} (expected 'remote' or 'local')")
+
+def get_ml_client():
+    """ML client of the current app"""
+    return current_app.extensions['ml_client']
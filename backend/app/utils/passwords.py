@@ -0,0 +1,171 @@
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _verify(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+def hash_cost(password_hash):
+    """Cost factor of a bcrypt hash ('$2b$12$...' -> 12); None if it cannot be read"""
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool has `max_pending` jobs and none finished within `queue_timeout`"""
+    
+    def __init__(self, retry_after):
+        super().__init__(f"Password hashing pool is busy; retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+class PasswordHasher:
+    """bcrypt hashing and verification in a small, dedicated process pool.
+    
+    bcrypt is deliberately CPU-bound for 100+ ms per call, so running it on the
+    request threads lets a burst of logins take every core from the rest of
+    the API. Here at most `workers` hashes run at once (per worker process),
+    at most `max_pending` are admitted (running or queued), and a caller waits
+    up to `queue_timeout` seconds for a slot before PasswordHasherBusy is
+    raised. create_app starts the pool before any other thread exists, so
+    forking its processes cannot copy a held lock; a pool inherited by a
+    forked gunicorn worker (--preload) is replaced by a fresh one on first use.
+    `workers=0` hashes inline on the calling thread.
+    """
+    
+    def __init__(self, rounds=12, workers=2, max_pending=32, queue_timeout=5.0, window=256):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._timings = {'hash': deque(maxlen=window), 'verify': deque(maxlen=window)}
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+    
+    def configure(self, rounds=None, workers=None, max_pending=None, queue_timeout=None):
+        """Apply settings (create_app calls this with the Config values); restarts the pool if it changed size"""
+        with self._lock:
+            if rounds is not None:
+                self.rounds = rounds
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            if max_pending is not None and max_pending != self.max_pending:
+                self.max_pending = max_pending
+                self._slots = threading.BoundedSemaphore(max_pending)
+            if workers is not None and workers != self.workers:
+                self.workers = workers
+                self._shutdown_locked()
+    
+    def hash(self, password):
+        """bcrypt hash of `password` at the configured cost"""
+        return self._run('hash', _hash, password, self.rounds)
+    
+    def verify(self, password, password_hash):
+        """True if `password` matches `password_hash`"""
+        return self._run('verify', _verify, password, password_hash)
+    
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different cost than the configured one"""
+        return hash_cost(password_hash) != self.rounds
+    
+    def start(self):
+        """Fork the pool processes now instead of on the first hash"""
+        if self.workers > 0:
+            executor = self._get_executor()
+            for future in [executor.submit(int) for _ in range(self.workers)]:
+                future.result()
+    
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid != os.getpid():
+                # Inherited across a fork: its processes and threads belong to the parent
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('fork')
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+    
+    def _run(self, kind, function, *args):
+        if self.workers <= 0:
+            started = time.perf_counter()
+            result = function(*args)
+            self._record(kind, started)
+            return result
+        
+        slots = self._slots
+        if not slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHasherBusy(max(1.0, self.queue_timeout))
+        
+        started = time.perf_counter()
+        with self._lock:
+            self._pending += 1
+        try:
+            try:
+                return self._get_executor().submit(function, *args).result()
+            except BrokenProcessPool:
+                # A pool process died (e.g. OOM killed); start a fresh pool and retry once
+                self._reset()
+                return self._get_executor().submit(function, *args).result()
+        finally:
+            with self._lock:
+                self._pending -= 1
+            slots.release()
+            self._record(kind, started)
+    
+    def _record(self, kind, started):
+        with self._lock:
+            self._completed += 1
+            self._timings[kind].append((time.perf_counter() - started) * 1000)
+    
+    def _reset(self):
+        with self._lock:
+            self._shutdown_locked()
+    
+    def _shutdown_locked(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def close(self):
+        self._reset()
+    
+    def metrics(self):
+        with self._lock:
+            timings = {kind: sorted(values) for kind, values in self._timings.items()}
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'started': self._executor is not None,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'queue_depth': max(0, self._pending - self.workers),
+                'completed': self._completed,
+                'rejected': self._rejected,
+                **{
+                    f'{kind}_ms': {
+                        'p50': round(values[len(values) // 2], 1) if values else None,
+                        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 1) if values else None
+                    }
+                    for kind, values in timings.items()
+                }
+            }
+
+# Shared by every request thread of this worker process; create_app applies the Config settings
+password_hasher = PasswordHasher()
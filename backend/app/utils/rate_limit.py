@@ -0,0 +1,239 @@
+import math
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import current_app, g, jsonify, request
+from pymongo import ReturnDocument
+from app.database import get_db
+from app.utils.metrics import increment
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+class RateLimit:
+    """`limit` requests per `period` seconds, in bursts of up to `burst` (a token bucket)"""
+    
+    def __init__(self, limit, period, burst=None):
+        self.limit = limit
+        self.period = period
+        self.burst = burst or limit
+    
+    @property
+    def rate(self):
+        """Tokens added back per second"""
+        return self.limit / self.period
+    
+    @classmethod
+    def parse(cls, text):
+        """'30/minute' or '30/minute,burst=60'; None for an empty or zero limit (no limiting)"""
+        if not text or not text.strip() or text.strip() == '0':
+            return None
+        rule, _, options = text.partition(',')
+        limit, _, period = rule.partition('/')
+        if period.strip().lower() not in PERIODS:
+            raise ValueError(f"Invalid rate limit '{text}': period must be one of {', '.join(PERIODS)}")
+        burst = None
+        if options:
+            name, _, value = options.partition('=')
+            if name.strip() != 'burst':
+                raise ValueError(f"Invalid rate limit '{text}': only 'burst' may follow the rate")
+            burst = int(value)
+        return cls(int(limit), PERIODS[period.strip().lower()], burst)
+    
+    def __str__(self):
+        period = next(name for name, seconds in PERIODS.items() if seconds == self.period)
+        return f'{self.limit}/{period}' + (f',burst={self.burst}' if self.burst != self.limit else '')
+
+class MemoryBucketStore:
+    """Token buckets in this process only (each worker limits separately).
+    
+    The least recently used buckets are dropped beyond `max_entries`, which
+    only forgives those clients their spent tokens.
+    """
+    
+    name = 'memory'
+    
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def take(self, key, rate, capacity, cost=1):
+        """Refill the bucket and take `cost` tokens if it has them; returns (allowed, tokens left)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+    
+    def metrics(self):
+        with self._lock:
+            return {'buckets': len(self._buckets), 'max_entries': self.max_entries}
+
+class MongoBucketStore:
+    """Token buckets in a MongoDB collection, shared by every worker process.
+    
+    Each check is one `find_one_and_update` whose pipeline refills and takes
+    from the bucket atomically on the server, timed by the server clock
+    (`$$NOW`, MongoDB 4.2+) so worker clocks do not matter. Buckets carry an
+    `expires_at` for the TTL index once they would be full again.
+    """
+    
+    name = 'mongo'
+    
+    def __init__(self, collection_name='rate_limits'):
+        self.collection_name = collection_name
+    
+    def take(self, key, rate, capacity, cost=1):
+        elapsed_seconds = {'$divide': [{'$subtract': ['$$NOW', {'$ifNull': ['$updated_at', '$$NOW']}]}, 1000]}
+        bucket = get_db()[self.collection_name].find_one_and_update(
+            {'_id': key},
+            [
+                {'$set': {
+                    'tokens': {'$min': [
+                        capacity,
+                        {'$add': [{'$ifNull': ['$tokens', capacity]}, {'$multiply': [elapsed_seconds, rate]}]}
+                    ]},
+                    'updated_at': '$$NOW'
+                }},
+                # Field references in one $set stage see the previous stage's values
+                {'$set': {
+                    'allowed': {'$gte': ['$tokens', cost]},
+                    'tokens': {'$cond': [{'$gte': ['$tokens', cost]}, {'$subtract': ['$tokens', cost]}, '$tokens']},
+                    'expires_at': {'$add': ['$$NOW', int(math.ceil(capacity / rate * 1000))]}
+                }}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return bucket['allowed'], bucket['tokens']
+    
+    def metrics(self):
+        return {'collection': self.collection_name}
+
+class RateLimitResult:
+    def __init__(self, name, rule, allowed, remaining, cost=1):
+        self.name = name
+        self.rule = rule
+        self.allowed = allowed
+        self.remaining = remaining
+        self.cost = cost
+    
+    @property
+    def retry_after(self):
+        """Seconds until the next request would be allowed"""
+        return 0.0 if self.allowed else (self.cost - self.remaining) / self.rule.rate
+
+class RateLimiter:
+    """Named token-bucket limits (e.g. 'predict', 'search', 'login') over a bucket store.
+    
+    Routes opt in with `@rate_limit(name)`; a name without a configured
+    limit is not limited. If the store fails (e.g. MongoDB is unreachable)
+    the request is let through rather than turned away.
+    """
+    
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = {name: rule for name, rule in limits.items() if rule is not None}
+        self._lock = threading.Lock()
+        self._allowed = defaultdict(int)
+        self._rejected = defaultdict(int)
+        self._store_errors = 0
+    
+    @classmethod
+    def from_config(cls, config):
+        if config['RATE_LIMIT_STORE'] == 'mongo':
+            store = MongoBucketStore()
+        elif config['RATE_LIMIT_STORE'] == 'memory':
+            store = MemoryBucketStore(max_entries=config['RATE_LIMIT_MAX_BUCKETS'])
+        else:
+            raise ValueError(f"Unknown RATE_LIMIT_STORE '{config['RATE_LIMIT_STORE']}' (use 'memory' or 'mongo')")
+        limits = {
+            'login': RateLimit.parse(config['RATE_LIMIT_LOGIN']),
+            'predict': RateLimit.parse(config['RATE_LIMIT_PREDICT']),
+            'jobs': RateLimit.parse(config['RATE_LIMIT_JOBS']),
+            'search': RateLimit.parse(config['RATE_LIMIT_SEARCH'])
+        }
+        return cls(store, limits)
+    
+    def hit(self, name, identity, cost=1):
+        """Spend `cost` tokens of `identity` (e.g. 'user:<id>') against limit `name`; None if it is not limited.
+        A cost above the burst size is charged as the whole burst, so it can still pass once the bucket is full."""
+        rule = self.limits.get(name)
+        if rule is None:
+            return None
+        cost = max(1, min(cost, rule.burst))
+        try:
+            allowed, remaining = self.store.take(f'{name}:{identity}', rule.rate, rule.burst, cost)
+        except Exception as e:
+            with self._lock:
+                self._store_errors += 1
+            print(f"⚠️  Rate limit store error, allowing request: {str(e)}")
+            return None
+        
+        with self._lock:
+            if allowed:
+                self._allowed[name] += 1
+            else:
+                self._rejected[name] += 1
+        if not allowed:
+            increment('rate_limit.rejected')
+            increment(f'rate_limit.rejected.{name}')
+        return RateLimitResult(name, rule, allowed, remaining, cost)
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'store': self.store.name,
+                **self.store.metrics(),
+                'store_errors': self._store_errors,
+                'limits': {
+                    name: {
+                        'rule': str(rule),
+                        'allowed': self._allowed[name],
+                        'rejected': self._rejected[name]
+                    }
+                    for name, rule in self.limits.items()
+                }
+            }
+
+def request_identity():
+    """Who a request is counted against: the user token_required loaded, else the client IP
+    (the proxy's own IP behind a reverse proxy, unless TRUSTED_PROXIES is set)"""
+    user = g.get('current_user')
+    if user is not None:
+        return f'user:{user._id}'
+    return f'ip:{request.remote_addr}'
+
+def rate_limit(name, cost=None):
+    """Decorator applying limit `name` of the app's RateLimiter; place it below @token_required
+    so requests are counted per user rather than per IP. `cost`, if given, is called with no
+    arguments during the request and returns how many tokens it takes (default 1)."""
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            limiter = current_app.extensions.get('rate_limiter')
+            result = limiter.hit(name, request_identity(), cost() if cost else 1) if limiter is not None else None
+            if result is not None and not result.allowed:
+                retry_after = max(1, math.ceil(result.retry_after))
+                response = jsonify({
+                    'message': 'Too many requests, please slow down',
+                    'limit': str(result.rule),
+                    'retry_after': retry_after
+                })
+                response.headers['Retry-After'] = str(retry_after)
+                response.headers['X-RateLimit-Limit'] = str(result.rule.limit)
+                response.headers['X-RateLimit-Remaining'] = '0'
+                return response, 429
+            return f(*args, **kwargs)
+        
+        return decorated
+    
+    return decorator
@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from collections import deque
+from app.utils.metrics import increment
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit breaker is open"""
+    
+    def __init__(self, name, retry_after):
+        super().__init__(f"Circuit breaker '{name}' is open; retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Error-rate circuit breaker (closed -> open -> half-open -> closed).
+    
+    While closed, outcomes are kept for the last `window_seconds`; once at least
+    `min_requests` have been seen and the error rate reaches `error_rate_threshold`
+    the breaker opens and calls fail fast for `reset_timeout` seconds. It then
+    lets `half_open_max_calls` probe calls through: a success closes it again,
+    a failure re-opens it. Every transition is counted as
+    `<name>.breaker.<from>_to_<to>` in app.utils.metrics.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, name, error_rate_threshold=0.5, min_requests=10, window_seconds=30.0,
+                 reset_timeout=30.0, half_open_max_calls=1):
+        self.name = name
+        self.error_rate_threshold = error_rate_threshold
+        self.min_requests = min_requests
+        self.window_seconds = window_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._outcomes = deque()  # (timestamp, ok)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._rejected = 0
+        self._transitions = {}
+    
+    def _transition(self, state):
+        key = f'{self._state}_to_{state}'
+        self._transitions[key] = self._transitions.get(key, 0) + 1
+        increment(f'{self.name}.breaker.{key}')
+        print(f"⚡ Circuit breaker '{self.name}': {self._state} -> {state}")
+        
+        self._state = state
+        self._outcomes.clear()
+        self._half_open_calls = 0
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+    
+    def _prune(self, now):
+        while self._outcomes and self._outcomes[0][0] < now - self.window_seconds:
+            self._outcomes.popleft()
+    
+    def before_call(self):
+        """Reserve a call slot, or raise CircuitOpenError if the call must not be made"""
+        with self._lock:
+            if self._state == self.OPEN:
+                remaining = self._opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(self.HALF_OPEN)
+            
+            if self._state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._rejected += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout)
+                self._half_open_calls += 1
+    
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._transition(self.CLOSED)
+            elif self._state == self.CLOSED:
+                self._outcomes.append((time.monotonic(), True))
+    
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._transition(self.OPEN)
+            elif self._state == self.CLOSED:
+                now = time.monotonic()
+                self._outcomes.append((now, False))
+                self._prune(now)
+                failures = sum(1 for _, ok in self._outcomes if not ok)
+                if len(self._outcomes) >= self.min_requests and failures / len(self._outcomes) >= self.error_rate_threshold:
+                    self._transition(self.OPEN)
+    
+    def metrics(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                'state': self._state,
+                'window_requests': len(self._outcomes),
+                'window_error_rate': round(failures / len(self._outcomes), 4) if self._outcomes else None,
+                'rejected': self._rejected,
+                'transitions': dict(self._transitions)
+            }
+
+def retry_call(fn, max_retries=2, base_delay=0.1, max_delay=1.0, is_retryable=lambda e: True, name=None):
+    """Call `fn`, retrying retryable failures up to `max_retries` times.
+    
+    Waits use exponential backoff with full jitter (uniform in
+    [0, min(max_delay, base_delay * 2**attempt)]) so retries from many workers
+    do not arrive at the recovering service in lockstep.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            if name:
+                increment(f'{name}.retries')
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
+            attempt += 1
+
+class LatencyTracker:
+    """Rolling window of recent latencies (seconds) for percentile-based hedging delays"""
+    
+    def __init__(self, window=500, min_samples=20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+    
+    def percentile(self, q):
+        """q-th percentile of the window, or None until `min_samples` have been recorded"""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            samples = sorted(self._samples)
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
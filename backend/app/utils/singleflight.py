@@ -0,0 +1,76 @@
+import hashlib
+import json
+import threading
+from app.utils.metrics import increment
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+    
+    The first caller for a key runs the function; callers arriving while it is
+    in flight wait for and share its result (or its exception). Nothing is
+    cached afterwards: the next call with that key runs again. Shared results
+    are the same object for every caller, so callers must not mutate them.
+    Coalesced calls are counted as `<name>.coalesced` in app.utils.metrics.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executions = 0
+        self._coalesced = 0
+    
+    def do(self, key, fn):
+        """Return `(result, shared)`; `shared` is True when another caller's execution was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._executions += 1
+            else:
+                self._coalesced += 1
+        
+        if not leader:
+            increment(f'{self.name}.coalesced')
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executions': self._executions,
+                'coalesced': self._coalesced
+            }
+
+def payload_key(payload, exclude=()):
+    """Canonical digest of a JSON payload: key order and int/float spelling do not matter"""
+    canonical = {
+        key: float(value) if isinstance(value, int) and not isinstance(value, bool) else value
+        for key, value in payload.items()
+        if key not in exclude
+    }
+    return hashlib.blake2b(json.dumps(canonical, sort_keys=True).encode('utf-8'), digest_size=16).digest()
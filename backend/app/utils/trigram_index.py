@@ -0,0 +1,264 @@
+import re
+import sys
+import threading
+import time
+from array import array
+from app.database import get_db
+from app.utils.dataset_queries import DATASETS
+from app.utils.dataset_search import normalize, search_keys
+
+# Posting lists longer than this are kept as bitsets; shorter ones become one per lookup
+DENSE_POSTINGS = 256
+
+def trigrams(key):
+    """Distinct trigrams of a normalised key, padded like pg_trgm so word starts weigh more"""
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _bitset(entries, size):
+    bits = bytearray((size + 7) // 8)
+    for entry in entries:
+        bits[entry >> 3] |= 1 << (entry & 7)
+    return int.from_bytes(bits, 'little')
+
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+def _set_bits(mask, limit):
+    """Indexes of the lowest `limit` set bits; the byte scan runs in C, so sparse masks are cheap"""
+    entries = []
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for match in _NONZERO_BYTE.finditer(data):
+        offset = match.start()
+        byte = data[offset]
+        for bit in range(8):
+            if byte >> bit & 1:
+                entries.append(offset * 8 + bit)
+        if len(entries) >= limit:
+            return entries[:limit]
+    return entries
+
+class TrigramIndex:
+    """In-memory trigram index from normalised designations to document `_id`s.
+    
+    Similarity is the trigram Jaccard index of query and designation, so
+    partial and misspelled designations ('K0752', 'keplr 227') still score.
+    Posting lists are bitsets over entries; a lookup adds the query's lists
+    into bit-sliced counters (one big-int operation per bit plane instead of
+    one Python step per entry). Similarity only depends on the shared count
+    and the designation's own trigram count, so entries are then visited one
+    (shared, size) group at a time in descending similarity, and only until
+    `limit` documents are found.
+    Entries can be appended while the index serves lookups (call `finish`
+    afterwards); a full rebuild makes a new index instead.
+    """
+    
+    def __init__(self):
+        self._keys = []
+        self._doc_ids = []
+        self._sizes = array('H')
+        self._postings = {}
+        self._bitsets = {}
+        self._size_bitsets = {}
+        self._full = 0
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self.max_id = None
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def add(self, doc_id, keys):
+        with self._lock:
+            for key in keys:
+                grams = trigrams(key)
+                entry = len(self._keys)
+                self._keys.append(key)
+                self._doc_ids.append(doc_id)
+                self._sizes.append(len(grams))
+                for gram in grams:
+                    postings = self._postings.get(gram)
+                    if postings is None:
+                        postings = self._postings[gram] = array('I')
+                    postings.append(entry)
+            if self.max_id is None or doc_id > self.max_id:
+                self.max_id = doc_id
+    
+    def finish(self):
+        """Rebuild the dense bitsets and the memory estimate after a batch of `add` calls"""
+        with self._lock:
+            size = len(self._keys)
+            self._bitsets = {
+                gram: _bitset(postings, size)
+                for gram, postings in self._postings.items()
+                if len(postings) > DENSE_POSTINGS
+            }
+            entries_by_size = {}
+            for entry, grams in enumerate(self._sizes):
+                entries_by_size.setdefault(grams, []).append(entry)
+            self._size_bitsets = {grams: _bitset(entries, size) for grams, entries in entries_by_size.items()}
+            self._full = (1 << size) - 1
+            self._memory_bytes = (
+                sys.getsizeof(self._keys) + sum(sys.getsizeof(key) for key in self._keys)
+                + sys.getsizeof(self._doc_ids) + sys.getsizeof(self._sizes)
+                + sys.getsizeof(self._postings)
+                + sum(sys.getsizeof(gram) + sys.getsizeof(postings) for gram, postings in self._postings.items())
+                + sum(sys.getsizeof(bits) for bits in self._bitsets.values())
+                + sum(sys.getsizeof(bits) for bits in self._size_bitsets.values())
+            )
+    
+    def search(self, query, limit=10, min_similarity=0.3):
+        """Best matches as `(doc_id, similarity, key)`, one per document, most similar first"""
+        key = normalize(query)
+        grams = trigrams(key)
+        n = len(grams)
+        with self._lock:
+            size = len(self._keys)
+            full = self._full
+            # planes[i] holds bit i of every entry's shared-trigram count
+            planes = []
+            for gram in grams:
+                bits = self._bitsets.get(gram)
+                if bits is None:
+                    postings = self._postings.get(gram)
+                    if postings is None:
+                        continue
+                    bits = _bitset(postings, size)
+                carry = bits
+                for i, plane in enumerate(planes):
+                    planes[i], carry = plane ^ carry, plane & carry
+                    if not carry:
+                        break
+                if carry:
+                    planes.append(carry)
+            
+            # (similarity, shared, size) for every group that can reach min_similarity, best first
+            max_shared = min(n, (1 << len(planes)) - 1)
+            groups = sorted(
+                (
+                    (shared / (n + grams - shared), shared, grams)
+                    for shared in range(1, max_shared + 1)
+                    for grams in self._size_bitsets
+                    if grams >= shared and shared / (n + grams - shared) >= min_similarity
+                ),
+                key=lambda group: (-group[0], abs(group[2] - n))
+            )
+            
+            best = {}
+            levels = {}
+            for similarity, shared, grams in groups:
+                if len(best) >= limit:
+                    break
+                level = levels.get(shared)
+                if level is None:
+                    level = full
+                    for i, plane in enumerate(planes):
+                        level &= plane if shared >> i & 1 else plane ^ full
+                    levels[shared] = level
+                for entry in _set_bits(level & self._size_bitsets[grams], limit):
+                    doc_id = self._doc_ids[entry]
+                    if doc_id not in best:
+                        best[doc_id] = (doc_id, similarity, self._keys[entry])
+        
+        ranked = sorted(best.values(), key=lambda match: (-match[1], abs(len(match[2]) - len(key)), match[2]))
+        return [(doc_id, round(similarity, 4), match_key) for doc_id, similarity, match_key in ranked[:limit]]
+    
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._keys),
+                'trigrams': len(self._postings),
+                'dense_trigrams': len(self._bitsets),
+                'memory_bytes': self._memory_bytes
+            }
+
+class CatalogueIndex:
+    """Per-process trigram indexes of the Kepler and TESS designations.
+    
+    Built in a background thread at startup; `get` returns None for a dataset
+    until its index is ready. Every `refresh_interval` seconds the thread
+    compares each dataset's version in `dataset_meta` (bumped by
+    ingest_datasets.py) with the indexed one: after an append it indexes only
+    the documents past the highest indexed `_id`, after a replace it builds a
+    new index and swaps it in.
+    """
+    
+    def __init__(self, refresh_interval=60.0, min_similarity=0.3):
+        self.refresh_interval = refresh_interval
+        self.min_similarity = min_similarity
+        self._indexes = {}
+        self._versions = {}
+        self._build_ms = {}
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            refresh_interval=config['CATALOGUE_INDEX_REFRESH_INTERVAL'],
+            min_similarity=config['CATALOGUE_INDEX_MIN_SIMILARITY']
+        )
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='catalogue-index', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped.set()
+    
+    def get(self, dataset):
+        return self._indexes.get(dataset)
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            for dataset in DATASETS:
+                try:
+                    self.refresh(dataset)
+                except Exception as e:
+                    print(f"⚠️  Catalogue index refresh for {dataset} failed: {str(e)}")
+            self._stopped.wait(self.refresh_interval)
+    
+    def refresh(self, dataset):
+        """Bring one dataset's index up to date with its collection; returns the number of indexed documents"""
+        spec = DATASETS[dataset]
+        db = get_db()
+        meta = db.dataset_meta.find_one({'_id': spec['collection']}) or {}
+        version = meta.get('version')
+        index = self._indexes.get(dataset)
+        if index is not None and version == self._versions.get(dataset):
+            return 0
+        
+        started = time.perf_counter()
+        query = {}
+        if index is not None and meta.get('mode') == 'append' and index.max_id is not None:
+            query = {'_id': {'$gt': index.max_id}}
+        else:
+            index = TrigramIndex()
+        
+        fields = {field: 1 for field in spec['search']['names'] + list(spec['search']['labelled'])}
+        added = 0
+        for document in db[spec['collection']].find(query, fields):
+            index.add(document['_id'], search_keys(spec, document))
+            added += 1
+        index.finish()
+        
+        self._indexes[dataset] = index
+        self._versions[dataset] = version
+        self._build_ms[dataset] = round((time.perf_counter() - started) * 1000, 1)
+        return added
+    
+    def metrics(self):
+        datasets = {}
+        for dataset in DATASETS:
+            index = self._indexes.get(dataset)
+            datasets[dataset] = {
+                'ready': index is not None,
+                'version': self._versions.get(dataset),
+                'last_refresh_ms': self._build_ms.get(dataset),
+                **(index.metrics() if index is not None else {})
+            }
+        return {
+            'refresh_interval_seconds': self.refresh_interval,
+            'min_similarity': self.min_similarity,
+            'memory_bytes': sum(d.get('memory_bytes', 0) for d in datasets.values()),
+            'datasets': datasets
+        }
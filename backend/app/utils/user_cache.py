@@ -0,0 +1,11 @@
+from app.utils.cache import TTLCache
+
+# Users loaded by token_required, keyed by (user_id, token iat). Each worker
+# process has its own copy, so an update is seen by other workers only once
+# their entry expires (USER_CACHE_TTL).
+user_cache = TTLCache(max_entries=10000)
+
+def invalidate_user(user_id):
+    """Drop a user's cached entries in this process (called after User.update)"""
+    user_id = str(user_id)
+    return user_cache.delete_matching(lambda key: key[0] == user_id)
@@ -0,0 +1,144 @@
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from pymongo.errors import BulkWriteError
+from app.database import get_db
+
+class WriteBehindBuffer:
+    """Bounded in-process queue of documents flushed to MongoDB with `insert_many`.
+    
+    A background thread flushes once `batch_size` documents are queued or
+    `flush_interval` seconds after the first document of a batch arrived,
+    whichever comes first. `put` waits at most `enqueue_timeout` seconds for
+    room and returns False when the queue stays full, so callers can write
+    synchronously instead (backpressure). Documents still queued when the
+    process exits are flushed by an atexit hook; a hard kill loses them.
+    `on_written`, if given, is called from the flush thread with the list of
+    documents each flush actually wrote.
+    """
+    
+    def __init__(self, collection_name, max_queue_size=10000, batch_size=500, flush_interval=0.2,
+                 enqueue_timeout=0.05, window=256, on_written=None):
+        self.collection_name = collection_name
+        self.on_written = on_written
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+        self._flush_ms = deque(maxlen=window)
+        self._enqueued = 0
+        self._rejected = 0
+        self._flushes = 0
+        self._written = 0
+        self._failed = 0
+        self._worker = threading.Thread(target=self._run, name=f'write-behind-{collection_name}', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+    
+    @classmethod
+    def from_config(cls, collection_name, config, on_written=None):
+        return cls(
+            collection_name,
+            on_written=on_written,
+            max_queue_size=config['PREDICTION_WRITE_BEHIND_QUEUE_SIZE'],
+            batch_size=config['PREDICTION_WRITE_BEHIND_BATCH_SIZE'],
+            flush_interval=config['PREDICTION_WRITE_BEHIND_FLUSH_MS'] / 1000.0,
+            enqueue_timeout=config['PREDICTION_WRITE_BEHIND_ENQUEUE_TIMEOUT_MS'] / 1000.0
+        )
+    
+    def put(self, document):
+        """Queue a document (it must carry its own `_id`); False if it was not accepted"""
+        if self._closed.is_set():
+            return False
+        try:
+            self._queue.put(document, timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            return False
+        with self._lock:
+            self._enqueued += 1
+        return True
+    
+    def _collect(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if self._closed.is_set():
+                timeout = 0
+            elif deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                if batch or self._closed.is_set():
+                    break
+                continue
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+    
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+            elif self._closed.is_set():
+                return
+    
+    def _flush(self, batch):
+        started = time.perf_counter()
+        written = batch
+        try:
+            # Unordered: one bad document does not hold back the rest of the batch
+            get_db()[self.collection_name].insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            written = [document for i, document in enumerate(batch) if i not in failed]
+            print(f"⚠️  Write-behind flush to {self.collection_name}: {len(batch) - len(written)} of {len(batch)} documents failed")
+        except Exception as e:
+            written = []
+            print(f"❌ Write-behind flush to {self.collection_name} failed, {len(batch)} documents lost: {str(e)}")
+        with self._lock:
+            self._flushes += 1
+            self._written += len(written)
+            self._failed += len(batch) - len(written)
+            self._flush_ms.append((time.perf_counter() - started) * 1000)
+        if written and self.on_written is not None:
+            try:
+                self.on_written(written)
+            except Exception as e:
+                print(f"⚠️  Write-behind on_written hook for {self.collection_name} failed: {str(e)}")
+    
+    def close(self, timeout=10.0):
+        """Stop accepting documents and flush everything still queued"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._worker.join(timeout)
+    
+    def metrics(self):
+        with self._lock:
+            flush_ms = sorted(self._flush_ms)
+            return {
+                'collection': self.collection_name,
+                'queue_depth': self._queue.qsize(),
+                'max_queue_size': self._queue.maxsize,
+                'batch_size': self.batch_size,
+                'flush_interval_ms': self.flush_interval * 1000,
+                'enqueued': self._enqueued,
+                'rejected': self._rejected,
+                'flushes': self._flushes,
+                'written': self._written,
+                'failed': self._failed,
+                'flush_ms': {
+                    'p50': round(flush_ms[len(flush_ms) // 2], 3) if flush_ms else None,
+                    'max': round(flush_ms[-1], 3) if flush_ms else None
+                }
+            }
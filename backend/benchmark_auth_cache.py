@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark for authenticated request latency on GET /api/v1/datasets/kepler.
+Every protected request resolves its user in token_required; run this against
+the API started three ways to compare the user lookup strategies:
+
+    USER_CACHE_TTL=0 python run.py               # database lookup on every request
+    python run.py                                # per-process user cache (default)
+    AUTH_TRUST_TOKEN_CLAIMS=True python run.py   # signed token claims, no lookup
+
+Usage:
+    python benchmark_auth_cache.py [--requests 500] [--concurrency 1]
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BASE_URL = "http://127.0.0.1:8000/api/v1"
+
+def get_token(base_url):
+    """Sign up a throwaway user and return its access token"""
+    suffix = int(time.time() * 1000)
+    user = {
+        "username": f"bench_{suffix}",
+        "email": f"bench{suffix}@example.com",
+        "password": "benchpass123"
+    }
+    response = requests.post(f"{base_url}/auth/signup", json=user)
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+def run(base_url, token, total, concurrency):
+    session = requests.Session()
+    session.headers["Authorization"] = f"Bearer {token}"
+    url = f"{base_url}/datasets/kepler?limit=12"
+    
+    def timed_request(_):
+        started = time.perf_counter()
+        response = session.get(url)
+        elapsed = (time.perf_counter() - started) * 1000
+        return elapsed, response.status_code
+    
+    # Warm up connections and caches
+    for _ in range(10):
+        timed_request(None)
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_request, range(total)))
+    wall = time.perf_counter() - started
+    
+    latencies = sorted(elapsed for elapsed, _ in results)
+    errors = sum(1 for _, status in results if status != 200)
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / wall, 1),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        'max_ms': round(latencies[-1], 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark authenticated dataset requests')
+    parser.add_argument('--base-url', default=BASE_URL, help=f'API base URL (default: {BASE_URL})')
+    parser.add_argument('--requests', type=int, default=500, help='Timed requests (default: 500)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Parallel clients (default: 1)')
+    args = parser.parse_args()
+    
+    print(f"🔐 Benchmarking {args.requests} requests to /datasets/kepler with concurrency {args.concurrency}...")
+    token = get_token(args.base_url)
+    result = run(args.base_url, token, args.requests, args.concurrency)
+    for key, value in result.items():
+        print(f"   {key}: {value}")
+    
+    metrics = requests.get(f"{args.base_url}/metrics", headers={"Authorization": f"Bearer {token}"}).json()
+    print(f"📊 user_cache: {metrics.get('user_cache')}")
+    print(f"📊 trusted claims: {metrics.get('counters', {}).get('auth.trusted_claims', 0)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark for POST /api/v1/auth/login throughput, and for the latency of other
+requests while logins are running. Run it against the API started with
+bcrypt on the request threads and in the hashing pool to compare:
+
+    PASSWORD_HASH_WORKERS=0 RATE_LIMIT_LOGIN= python run.py   # bcrypt on the request thread
+    RATE_LIMIT_LOGIN= python run.py                           # dedicated hashing pool (default)
+
+(RATE_LIMIT_LOGIN= lifts the per-IP login limit, which would otherwise answer most logins with 429.)
+
+Usage:
+    python benchmark_login.py [--logins 100] [--concurrency 8]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+BASE_URL = "http://127.0.0.1:8000/api/v1"
+
+def create_user(base_url):
+    """Sign up a throwaway user and return its credentials and access token"""
+    suffix = int(time.time() * 1000)
+    user = {
+        "username": f"bench_{suffix}",
+        "email": f"bench{suffix}@example.com",
+        "password": "benchpass123"
+    }
+    response = requests.post(f"{base_url}/auth/signup", json=user)
+    response.raise_for_status()
+    return user, response.json()["access_token"]
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    if not latencies:
+        return {}
+    return {
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'p50_ms': round(latencies[len(latencies) // 2], 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'max_ms': round(latencies[-1], 2)
+    }
+
+def run(base_url, user, token, total, concurrency):
+    credentials = {'email': user['email'], 'password': user['password']}
+    
+    def timed_login(_):
+        started = time.perf_counter()
+        response = requests.post(f"{base_url}/auth/login", json=credentials)
+        return (time.perf_counter() - started) * 1000, response.status_code
+    
+    # Meanwhile one client keeps requesting a dataset page, like a user browsing during a login burst
+    probe_latencies = []
+    stopped = threading.Event()
+    
+    def probe():
+        session = requests.Session()
+        session.headers["Authorization"] = f"Bearer {token}"
+        while not stopped.is_set():
+            started = time.perf_counter()
+            session.get(f"{base_url}/datasets/kepler?limit=12")
+            probe_latencies.append((time.perf_counter() - started) * 1000)
+    
+    timed_login(None)
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_login, range(total)))
+    wall = time.perf_counter() - started
+    stopped.set()
+    prober.join()
+    
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        'logins': total,
+        'statuses': statuses,
+        'throughput_per_s': round(total / wall, 1),
+        'login': summarize(elapsed for elapsed, _ in results),
+        'dataset_requests_during_logins': {'requests': len(probe_latencies), **summarize(probe_latencies)}
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login throughput')
+    parser.add_argument('--base-url', default=BASE_URL, help=f'API base URL (default: {BASE_URL})')
+    parser.add_argument('--logins', type=int, default=100, help='Timed logins (default: 100)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Parallel clients (default: 8)')
+    args = parser.parse_args()
+    
+    print(f"🔐 Benchmarking {args.logins} logins with concurrency {args.concurrency}...")
+    user, token = create_user(args.base_url)
+    result = run(args.base_url, user, token, args.logins, args.concurrency)
+    for key, value in result.items():
+        print(f"   {key}: {value}")
+    
+    metrics = requests.get(f"{args.base_url}/metrics", headers={"Authorization": f"Bearer {token}"}).json()
+    print(f"📊 password_hasher: {metrics.get('password_hasher')}")
+
+if __name__ == "__main__":
+    main()
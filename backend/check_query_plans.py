@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Query plan check for the dataset endpoints.
+Runs explain() on every filter/sort shape that GET /api/v1/datasets/kepler and
+/tess can produce, and on the lookups behind /search, and fails if any of them
+falls back to a collection scan.
+Run it after changing DATASETS in app/utils/dataset_queries.py or the indexes
+in app/database.py.
+
+Usage:
+    python check_query_plans.py [--mongodb-url mongodb://localhost:27017/exoplanet_research]
+"""
+
+import argparse
+import sys
+from bson import ObjectId
+from pymongo import MongoClient
+from app.config import Config
+from app.database import create_dataset_indexes
+from app.utils.dataset_queries import (
+    DATASETS, build_filter, parse_sort, cursor_filter, sort_spec, encode_cursor, plan_stages
+)
+from app.utils.dataset_search import search_queries
+
+SEARCH_SAMPLES = ['Kepler-22 b', 'K00752.01', '10797460', 'TOI 700', 'TIC 50365310', '700.01']
+
+def query_shapes(spec):
+    """(description, request args) for each filter/sort combination of a dataset"""
+    disposition = 'CONFIRMED' if spec['disposition'] == 'koi_disposition' else 'PC'
+    shapes = [
+        ('default order', {}),
+        ('disposition', {'disposition': disposition}),
+        ('disposition list', {'disposition': f'{disposition},FP'})
+    ]
+    names = list(spec['fields'])
+    for name in names:
+        shapes.append((f'min_{name}', {f'min_{name}': '1'}))
+        shapes.append((f'{name} range', {f'min_{name}': '1', f'max_{name}': '100'}))
+        shapes.append((f'sort {name}', {'sort': name}))
+        shapes.append((f'sort -{name}', {'sort': f'-{name}'}))
+        shapes.append((f'disposition + min_{name}', {'disposition': disposition, f'min_{name}': '1'}))
+        shapes.append((f'disposition + sort -{name}', {'disposition': disposition, 'sort': f'-{name}'}))
+        for other in names:
+            if other != name:
+                shapes.append((f'min_{other} + sort {name}', {f'min_{other}': '1', 'sort': name}))
+    return shapes
+
+def explain(collection, spec, args, after_item=None):
+    args = dict(args)
+    sort = args.pop('sort', None)
+    query = build_filter(spec, args)
+    sort_field, direction = parse_sort(spec, sort)
+    if after_item is not None:
+        query = {'$and': [query, cursor_filter(sort_field, direction, encode_cursor(sort_field, after_item))]}
+    cursor = collection.find(query).sort(sort_spec(sort_field, direction)).limit(13)
+    return plan_stages(cursor.explain())
+
+def check_dataset(db, dataset, spec):
+    collection = db[spec['collection']]
+    failures = 0
+    sample_id = ObjectId()
+    for description, args in query_shapes(spec):
+        # Check both the first page and a later page (with the keyset cursor condition)
+        for page, after_item in (('first', None), ('next', {'_id': sample_id, **{f: 1.0 for f in spec['fields'].values()}})):
+            stages = explain(collection, spec, args, after_item)
+            if 'COLLSCAN' in stages:
+                failures += 1
+                print(f"❌ {dataset}: {description} ({page} page) -> {' > '.join(stages)}")
+            elif 'SORT' in stages:
+                print(f"⚠️  {dataset}: {description} ({page} page) uses an in-memory sort -> {' > '.join(stages)}")
+    for sample in SEARCH_SAMPLES:
+        for match, query, limit in search_queries(spec, sample, 10):
+            stages = plan_stages(collection.find(query).limit(limit).explain())
+            if 'COLLSCAN' in stages:
+                failures += 1
+                print(f"❌ {dataset}: search '{sample}' ({match}) -> {' > '.join(stages)}")
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that dataset queries are served by indexes')
+    parser.add_argument('--mongodb-url', default=Config.MONGODB_URL, help='MongoDB URL (default: MONGODB_URL)')
+    args = parser.parse_args()
+    
+    db_name = args.mongodb_url.split('/')[-1] if '/' in args.mongodb_url.split('//')[1] else 'exoplanet_research'
+    db = MongoClient(args.mongodb_url)[db_name]
+    create_dataset_indexes(db)
+    
+    failures = 0
+    for dataset, spec in DATASETS.items():
+        print(f"🔍 Checking {dataset} ({spec['collection']})...")
+        failures += check_dataset(db, dataset, spec)
+    
+    if failures:
+        print(f"❌ {failures} query shapes fall back to a collection scan")
+        sys.exit(1)
+    print("✅ Every dataset query shape uses an index")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Dataset ingest script for the Exoplanet Research Platform.
+Loads a NASA Exoplanet Archive CSV export into the Kepler or TESS collection
+and records the new document count and version in `dataset_meta`, which the
+dataset endpoints serve their totals from. Each document gets the normalised
+`search_keys` used by dataset search; --reindex-search backfills them on a
+collection loaded some other way.
+
+Usage:
+    python ingest_datasets.py kepler "../ai_model_final/data/NASA Exoplanet 2.csv" --replace
+    python ingest_datasets.py tess TOI_2024.csv --replace
+    python ingest_datasets.py kepler --reindex-search
+"""
+
+import argparse
+import csv
+import os
+import sys
+from datetime import datetime
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from app.config import Config
+from app.database import create_dataset_indexes
+from app.utils.dataset_queries import DATASETS
+from app.utils.dataset_search import search_keys
+
+COLLECTIONS = {name: spec['collection'] for name, spec in DATASETS.items()}
+
+BATCH_SIZE = 1000
+
+def parse_value(value):
+    """CSV cell -> int, float or str; empty cells become None"""
+    value = value.strip()
+    if value == '':
+        return None
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+def read_rows(csv_path):
+    """Yield one document per CSV row, skipping the archive's '#' header comments and empty cells"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        lines = (line for line in f if not line.startswith('#'))
+        for row in csv.DictReader(lines):
+            document = {}
+            for key, value in row.items():
+                value = parse_value(value or '')
+                if value is not None:
+                    document[key] = value
+            yield document
+
+def with_search_keys(dataset, rows):
+    spec = DATASETS[dataset]
+    for row in rows:
+        row['search_keys'] = search_keys(spec, row)
+        yield row
+
+def reindex_search(db, dataset):
+    """Recompute `search_keys` for every document of a dataset; returns the number of updated documents"""
+    spec = DATASETS[dataset]
+    collection = db[COLLECTIONS[dataset]]
+    fields = {field: 1 for field in spec['search']['names'] + list(spec['search']['labelled'])}
+    updated = 0
+    batch = []
+    for document in collection.find({}, fields):
+        batch.append(UpdateOne({'_id': document['_id']}, {'$set': {'search_keys': search_keys(spec, document)}}))
+        if len(batch) >= BATCH_SIZE:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
+
+def insert_rows(collection, rows):
+    """Insert rows in batches; returns the number of inserted documents"""
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+def ingest(db, dataset, csv_path, replace=False):
+    collection_name = COLLECTIONS[dataset]
+    
+    if replace:
+        # Load into a staging collection and swap it in, so readers never see a half-loaded dataset
+        staging = db[f'{collection_name}_ingest']
+        staging.drop()
+        inserted = insert_rows(staging, with_search_keys(dataset, read_rows(csv_path)))
+        # The swap replaces the target's indexes with the staging collection's
+        create_dataset_indexes(db, dataset, collection=staging)
+        staging.rename(collection_name, dropTarget=True)
+    else:
+        create_dataset_indexes(db, dataset)
+        inserted = insert_rows(db[collection_name], with_search_keys(dataset, read_rows(csv_path)))
+    
+    count = db[collection_name].count_documents({})
+    meta = db.dataset_meta.find_one_and_update(
+        {'_id': collection_name},
+        {
+            '$set': {
+                'count': count,
+                'source': os.path.basename(csv_path),
+                'mode': 'replace' if replace else 'append',
+                'updated_at': datetime.utcnow()
+            },
+            '$inc': {'version': 1}
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return inserted, count, meta['version']
+
+def main():
+    parser = argparse.ArgumentParser(description='Load a NASA Exoplanet Archive CSV into MongoDB')
+    parser.add_argument('dataset', choices=sorted(COLLECTIONS), help='Dataset to load')
+    parser.add_argument('csv_path', nargs='?', help='CSV export from the NASA Exoplanet Archive')
+    parser.add_argument('--replace', action='store_true', help='Replace the collection instead of appending')
+    parser.add_argument('--reindex-search', action='store_true', help='Only recompute search keys of the loaded collection')
+    parser.add_argument('--mongodb-url', default=Config.MONGODB_URL, help='MongoDB URL (default: MONGODB_URL)')
+    args = parser.parse_args()
+    
+    db_name = args.mongodb_url.split('/')[-1] if '/' in args.mongodb_url.split('//')[1] else 'exoplanet_research'
+    db = MongoClient(args.mongodb_url)[db_name]
+    
+    if args.reindex_search:
+        create_dataset_indexes(db, args.dataset)
+        print(f"🔄 Recomputing search keys of {COLLECTIONS[args.dataset]}...")
+        updated = reindex_search(db, args.dataset)
+        print(f"✅ Updated search keys of {updated} documents")
+        return
+    
+    if not args.csv_path:
+        parser.error('csv_path is required unless --reindex-search is given')
+    if not os.path.exists(args.csv_path):
+        print(f"❌ File not found: {args.csv_path}")
+        sys.exit(1)
+    
+    print(f"📥 Loading {args.csv_path} into {COLLECTIONS[args.dataset]} ({'replace' if args.replace else 'append'})...")
+    inserted, count, version = ingest(db, args.dataset, args.csv_path, replace=args.replace)
+    print(f"✅ Inserted {inserted} documents; collection now has {count} (dataset version {version})")
+
+if __name__ == "__main__":
+    main()
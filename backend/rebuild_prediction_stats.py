@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Rebuild the per-user prediction stats rollups for the Exoplanet Research Platform.
+Recomputes every `prediction_stats` document (or one user's) from the
+predictions collection. Run it once after deploying rollups on a database with
+existing history, and whenever the counters are suspected to have drifted
+(e.g. after a write-behind flush failed). Until then, users with older
+history get their stats aggregated on every request. Run it while writes are
+quiet: rollups updated during the rebuild are rebuilt again, but a prediction
+stored during the rebuild may still be counted twice.
+
+Usage:
+    python rebuild_prediction_stats.py
+    python rebuild_prediction_stats.py --user-id 68e18c2e25da28f5a61d2d81
+"""
+
+import argparse
+from flask import Flask
+from app.config import Config
+from app.database import init_db
+from app.models.prediction_stats import PredictionStats
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild per-user prediction stats from prediction history')
+    parser.add_argument('--user-id', help='Only rebuild this user')
+    args = parser.parse_args()
+    
+    # Only the database connection is needed, not the API's background workers
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    init_db(app)
+    
+    print(f"🔄 Rebuilding prediction stats for {'user ' + args.user_id if args.user_id else 'all users'}...")
+    rebuilt = PredictionStats.rebuild(args.user_id)
+    print(f"✅ Rebuilt stats for {rebuilt} users")
+
+if __name__ == "__main__":
+    main()
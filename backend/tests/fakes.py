@@ -0,0 +1,75 @@
+import operator
+import re
+
+# In-memory stand-in for the few pymongo collection calls the models make, with
+# MongoDB's rules where they matter to keyset pagination and search: null/missing
+# sorts before any value, equality with None also matches a missing field, range
+# operators never match null, and a condition on an array field matches if any
+# element matches.
+
+RANGE_OPERATORS = {'$gt': operator.gt, '$gte': operator.ge, '$lt': operator.lt, '$lte': operator.le}
+
+def matches(document, query):
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(document, clause) for clause in condition):
+                return False
+            continue
+        value = document.get(key)
+        values = value if isinstance(value, list) else [value]
+        if not any(matches_value(element, condition) for element in values):
+            return False
+    return True
+
+def matches_value(value, condition):
+    if not (isinstance(condition, dict) and all(name.startswith('$') for name in condition)):
+        return value == condition
+    for name, operand in condition.items():
+        if name == '$ne':
+            ok = value != operand
+        elif name == '$in':
+            ok = value in operand
+        elif name == '$regex':
+            ok = isinstance(value, str) and re.search(operand, value) is not None
+        else:
+            ok = value is not None and RANGE_OPERATORS[name](value, operand)
+        if not ok:
+            return False
+    return True
+
+def sort_key(value):
+    return (0, 0) if value is None else (1, value)
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = documents
+    
+    def sort(self, spec):
+        # Stable sorts from the last key to the first give a compound sort
+        for field, direction in reversed(spec):
+            self._documents.sort(key=lambda document: sort_key(document.get(field)), reverse=direction == -1)
+        return self
+    
+    def skip(self, n):
+        self._documents = self._documents[n:]
+        return self
+    
+    def limit(self, n):
+        self._documents = self._documents[:n]
+        return self
+    
+    def __iter__(self):
+        return iter(self._documents)
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = [dict(document) for document in documents]
+    
+    def insert_many(self, documents, ordered=True):
+        self.documents.extend(dict(document) for document in documents)
+    
+    def find(self, query=None, projection=None):
+        return FakeCursor([dict(document) for document in self.documents if matches(document, query or {})])
+    
+    def count_documents(self, query):
+        return sum(1 for document in self.documents if matches(document, query))
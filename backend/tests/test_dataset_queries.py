@@ -0,0 +1,108 @@
+import base64
+import json
+
+import pytest
+from bson import ObjectId
+
+from app.utils.dataset_queries import (
+    DATASETS, DatasetQueryError, build_filter, cursor_filter, encode_cursor, parse_sort, sort_spec
+)
+from fakes import FakeCollection, sort_key
+
+KEPLER = DATASETS['kepler']
+
+def test_build_filter_accepts_short_and_column_names():
+    query = build_filter(KEPLER, {'min_period': '10', 'max_koi_period': '20.5', 'max_radius': '2'})
+    
+    assert query == {'koi_period': {'$gte': 10.0, '$lte': 20.5}, 'koi_prad': {'$lte': 2.0}}
+
+def test_build_filter_normalises_dispositions():
+    assert build_filter(KEPLER, {'disposition': 'confirmed'}) == {'koi_disposition': 'CONFIRMED'}
+    assert build_filter(KEPLER, {'koi_disposition': 'confirmed, candidate,'}) == {
+        'koi_disposition': {'$in': ['CONFIRMED', 'CANDIDATE']}
+    }
+
+def test_build_filter_ignores_other_parameters():
+    assert build_filter(KEPLER, {'q': 'kepler', 'minimum': '3'}) == {}
+
+@pytest.mark.parametrize('args, param', [
+    ({'min_mass': '1'}, 'min_mass'),
+    ({'min_score': 'high'}, 'min_score'),
+    ({'max_koi_steff': '6000'}, 'max_koi_steff'),
+])
+def test_build_filter_rejects_unknown_fields_and_non_numbers(args, param):
+    with pytest.raises(DatasetQueryError) as error:
+        build_filter(KEPLER, args)
+    assert list(error.value.errors) == [param]
+
+def test_parse_sort():
+    assert parse_sort(KEPLER, None) == ('_id', 1)
+    assert parse_sort(KEPLER, 'radius') == ('koi_prad', 1)
+    assert parse_sort(KEPLER, '-koi_period') == ('koi_period', -1)
+    with pytest.raises(DatasetQueryError):
+        parse_sort(KEPLER, '-koi_steff')
+
+@pytest.fixture
+def collection():
+    # Ties and items without a value (null or missing) exercise the _id tie-break and null ordering
+    values = [3.0, None, 1.0, 3.0, 'missing', 2.0, None, 1.0, 'missing', 3.0]
+    documents = []
+    for value in values:
+        document = {'_id': ObjectId()}
+        if value != 'missing':
+            document['koi_prad'] = value
+        documents.append(document)
+    return FakeCollection(documents)
+
+def walk(collection, sort_field, direction, limit):
+    """All pages of `collection`, following next cursors like paginate_dataset does"""
+    seen = []
+    after = None
+    while True:
+        query = cursor_filter(sort_field, direction, after) if after else {}
+        items = list(collection.find(query).sort(sort_spec(sort_field, direction)).limit(limit + 1))
+        seen.extend(items[:limit])
+        if len(items) <= limit:
+            return seen
+        after = encode_cursor(sort_field, items[limit - 1])
+
+def expected_order(collection, sort_field, direction):
+    return sorted(
+        collection.documents,
+        key=lambda document: (sort_key(document.get(sort_field)), document['_id']),
+        reverse=direction == -1
+    )
+
+@pytest.mark.parametrize('limit', [1, 2, 3])
+@pytest.mark.parametrize('direction', [1, -1])
+def test_cursor_pages_visit_every_document_once_in_order(collection, direction, limit):
+    pages = walk(collection, 'koi_prad', direction, limit)
+    
+    assert [item['_id'] for item in pages] == [item['_id'] for item in expected_order(collection, 'koi_prad', direction)]
+
+def test_ascending_walks_items_without_a_value_first_and_descending_last(collection):
+    ascending = [item.get('koi_prad') for item in walk(collection, 'koi_prad', 1, limit=2)]
+    descending = [item.get('koi_prad') for item in walk(collection, 'koi_prad', -1, limit=2)]
+    
+    assert ascending == [None] * 4 + [1.0, 1.0, 2.0, 3.0, 3.0, 3.0]
+    assert descending == [3.0, 3.0, 3.0, 2.0, 1.0, 1.0] + [None] * 4
+
+def test_default_order_pages_by_id(collection):
+    pages = walk(collection, '_id', 1, limit=3)
+    
+    assert [item['_id'] for item in pages] == sorted(document['_id'] for document in collection.documents)
+
+def b64_json(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+@pytest.mark.parametrize('sort_field, cursor', [
+    ('_id', 'not-an-object-id'),
+    ('koi_prad', 'not base64 json'),
+    ('koi_prad', b64_json({'v': 1.0})),
+    ('koi_prad', b64_json({'v': 1.0, 'i': 'not-an-object-id'})),
+    ('koi_prad', b64_json([1.0, str(ObjectId())])),
+])
+def test_malformed_cursor_is_a_query_error(sort_field, cursor):
+    with pytest.raises(DatasetQueryError) as error:
+        cursor_filter(sort_field, 1, cursor)
+    assert error.value.errors == {'after': ['Invalid cursor']}
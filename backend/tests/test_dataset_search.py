@@ -0,0 +1,82 @@
+import pytest
+from bson import ObjectId
+
+from app.utils.dataset_queries import DATASETS
+from app.utils.dataset_search import _id_clauses, normalize, search_dataset, search_keys
+from fakes import FakeCollection
+
+KEPLER = DATASETS['kepler']
+TESS = DATASETS['tess']
+
+def test_normalize():
+    assert normalize('Kepler-227 b') == 'kepler227b'
+    assert normalize('  K00752.01 ') == 'k00752.01'
+    assert normalize('TOI 700.') == 'toi700'
+    assert normalize('--') == ''
+
+def test_search_keys_for_kepler():
+    document = {'kepoi_name': 'K00752.01', 'kepler_name': 'Kepler-227 b', 'kepid': 10797460}
+    
+    assert search_keys(KEPLER, document) == ['k00752.01', 'k752.01', 'kepler227b', 'kic10797460']
+
+def test_search_keys_for_tess_skip_missing_names():
+    document = {'ctoi_alias': None, 'toi': 700.01, 'tid': 50365310}
+    
+    assert search_keys(TESS, document) == ['tic50365310', 'toi700.01']
+    assert search_keys(TESS, {'toi': 700.0, 'tid': True}) == ['toi700']
+
+@pytest.mark.parametrize('spec, key, clauses', [
+    (KEPLER, '10797460', [{'kepid': 10797460}]),
+    (KEPLER, 'kic10797460', [{'kepid': 10797460}]),
+    (KEPLER, 'tic10797460', []),
+    (KEPLER, '752.01', []),
+    (KEPLER, 'kepler227b', []),
+    (TESS, 'toi700', [{'toi': {'$gte': 700.0, '$lt': 701.0}}]),
+    (TESS, 'toi700.01', [{'toi': 700.01}]),
+    (TESS, 'tic50365310', [{'tid': 50365310}]),
+    (TESS, '700', [{'toi': {'$gte': 700.0, '$lt': 701.0}}, {'tid': 700}]),
+    (TESS, '700.01', [{'toi': 700.01}]),
+])
+def test_id_clauses(spec, key, clauses):
+    assert _id_clauses(spec, key) == clauses
+
+@pytest.fixture
+def kepler_collection():
+    documents = [
+        {'kepoi_name': 'K00752.01', 'kepler_name': 'Kepler-227 b', 'kepid': 10797460},
+        {'kepoi_name': 'K00752.02', 'kepler_name': 'Kepler-227 c', 'kepid': 10797460},
+        {'kepoi_name': 'K07520.01', 'kepler_name': None, 'kepid': 7520},
+        {'kepoi_name': 'K00075.01', 'kepler_name': None, 'kepid': 752},
+    ]
+    for document in documents:
+        document['_id'] = ObjectId()
+        document['search_keys'] = search_keys(KEPLER, document)
+    return FakeCollection(documents)
+
+def names(results):
+    return [result['kepoi_name'] for result in results]
+
+def test_search_ranks_id_then_exact_then_shortest_prefix(kepler_collection):
+    results = search_dataset(kepler_collection, KEPLER, '752')
+    
+    assert names(results) == ['K00075.01']
+    assert [result['_match'] for result in results] == ['id']
+    
+    results = search_dataset(kepler_collection, KEPLER, 'K752')
+    assert names(results) == ['K00752.01', 'K00752.02', 'K07520.01']
+    assert {result['_match'] for result in results} == {'prefix'}
+    
+    results = search_dataset(kepler_collection, KEPLER, 'kepler-227 C')
+    assert names(results) == ['K00752.02']
+    assert results[0]['_match'] == 'exact'
+
+def test_search_finds_both_planets_of_a_star_by_kic(kepler_collection):
+    results = search_dataset(kepler_collection, KEPLER, 'KIC 10797460')
+    
+    assert names(results) == ['K00752.01', 'K00752.02']
+    assert all('search_keys' not in result for result in results)
+
+def test_search_respects_limit_and_empty_queries(kepler_collection):
+    assert names(search_dataset(kepler_collection, KEPLER, 'k', limit=2)) == ['K00075.01', 'K00752.01']
+    assert search_dataset(kepler_collection, KEPLER, ' - ') == []
+    assert search_dataset(kepler_collection, KEPLER, 'kepler-9') == []
@@ -0,0 +1,110 @@
+import pytest
+from flask import Flask
+
+from app.models.user import User
+from app.routes import auth
+from app.utils import passwords
+from app.utils.passwords import PasswordHasher, PasswordHasherBusy, hash_cost
+
+# The lowest cost bcrypt accepts, so hashing stays fast
+ROUNDS = 4
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(rounds=ROUNDS, workers=0)
+
+def test_hash_cost_reads_the_cost_factor(hasher):
+    assert hash_cost(hasher.hash('secret123')) == ROUNDS
+    assert hash_cost('$2b$12$' + 'a' * 53) == 12
+
+@pytest.mark.parametrize('password_hash', [None, '', 'plain-text', '$2b$', '$2b$xx$abc'])
+def test_hash_cost_is_none_for_unreadable_hashes(password_hash):
+    assert hash_cost(password_hash) is None
+
+def test_needs_rehash_only_when_the_cost_differs(hasher):
+    password_hash = hasher.hash('secret123')
+    assert not hasher.needs_rehash(password_hash)
+    
+    hasher.configure(rounds=ROUNDS + 1)
+    assert hasher.needs_rehash(password_hash)
+    # Anything that is not a readable bcrypt hash is replaced too
+    assert hasher.needs_rehash('plain-text')
+
+def test_inline_hash_and_verify(hasher):
+    password_hash = hasher.hash('secret123')
+    assert hasher.verify('secret123', password_hash)
+    assert not hasher.verify('wrong', password_hash)
+    assert hasher.metrics()['completed'] == 3
+
+def test_full_pool_raises_busy_after_the_queue_timeout():
+    hasher = PasswordHasher(rounds=ROUNDS, workers=1, max_pending=1, queue_timeout=0.01)
+    # Hold the only admission slot, as a hash in flight would
+    assert hasher._slots.acquire(timeout=0)
+    try:
+        with pytest.raises(PasswordHasherBusy) as excinfo:
+            hasher.hash('secret123')
+    finally:
+        hasher._slots.release()
+    
+    # Never asks clients to retry sooner than a second
+    assert excinfo.value.retry_after == 1.0
+    assert hasher.metrics()['rejected'] == 1
+    assert hasher.metrics()['started'] is False
+
+@pytest.fixture
+def client(monkeypatch):
+    app = Flask(__name__)
+    app.config.update(JWT_SECRET_KEY='test-secret', JWT_ACCESS_TOKEN_EXPIRES_IN=60)
+    app.register_blueprint(auth.auth_bp, url_prefix='/api/v1/auth')
+    monkeypatch.setattr(passwords, 'password_hasher', PasswordHasher(rounds=ROUNDS, workers=0))
+    return app.test_client()
+
+def raise_busy(*args):
+    raise PasswordHasherBusy(2.5)
+
+def test_signup_returns_503_with_retry_after_when_the_pool_is_busy(client, monkeypatch):
+    monkeypatch.setattr(passwords.password_hasher, 'hash', raise_busy)
+    
+    response = client.post('/api/v1/auth/signup', json={
+        'username': 'vera', 'email': 'vera@example.com', 'password': 'secret123'
+    })
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert 'retry' in response.get_json()['message']
+
+def test_login_returns_503_with_retry_after_when_the_pool_is_busy(client, monkeypatch):
+    user = User('vera', 'vera@example.com', passwords.password_hasher.hash('secret123'), _id='u1')
+    monkeypatch.setattr(User, 'find_by_email', staticmethod(lambda email: user))
+    monkeypatch.setattr(passwords.password_hasher, 'verify', raise_busy)
+    
+    response = client.post('/api/v1/auth/login', json={'email': 'vera@example.com', 'password': 'secret123'})
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+
+def test_login_rehashes_a_hash_made_with_another_cost(client, monkeypatch):
+    old_hash = PasswordHasher(rounds=ROUNDS + 1, workers=0).hash('secret123')
+    user = User('vera', 'vera@example.com', old_hash, _id='u1')
+    updates = []
+    monkeypatch.setattr(User, 'find_by_email', staticmethod(lambda email: user))
+    monkeypatch.setattr(User, 'update', lambda self, fields=None: updates.append(fields) or True)
+    
+    response = client.post('/api/v1/auth/login', json={'email': 'vera@example.com', 'password': 'secret123'})
+    
+    assert response.status_code == 200
+    assert len(updates) == 1
+    new_hash = updates[0]['password_hash']
+    assert hash_cost(new_hash) == ROUNDS
+    assert passwords.password_hasher.verify('secret123', new_hash)
+
+def test_login_keeps_a_hash_at_the_configured_cost(client, monkeypatch):
+    user = User('vera', 'vera@example.com', passwords.password_hasher.hash('secret123'), _id='u1')
+    updates = []
+    monkeypatch.setattr(User, 'find_by_email', staticmethod(lambda email: user))
+    monkeypatch.setattr(User, 'update', lambda self, fields=None: updates.append(fields) or True)
+    
+    response = client.post('/api/v1/auth/login', json={'email': 'vera@example.com', 'password': 'secret123'})
+    
+    assert response.status_code == 200
+    assert updates == []
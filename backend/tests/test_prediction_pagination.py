@@ -0,0 +1,96 @@
+import base64
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.models import prediction as prediction_module
+from app.models.prediction import Prediction
+from fakes import FakeCollection
+
+def b64(raw):
+    raw = raw.encode('utf-8') if isinstance(raw, str) else raw
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def test_cursor_round_trips():
+    created_at = datetime(2024, 1, 15, 10, 30, 0, 123456)
+    prediction_id = ObjectId()
+    
+    cursor = Prediction.encode_cursor(created_at, prediction_id)
+    
+    assert '=' not in cursor
+    assert Prediction.decode_cursor(cursor) == (created_at, prediction_id)
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    'not a cursor!',
+    b64('2024-01-15T10:30:00'),
+    b64(f'2024-01-15T10:30:00|{ObjectId()}|extra'),
+    b64(f'yesterday|{ObjectId()}'),
+    b64('2024-01-15T10:30:00|not-an-object-id'),
+    b64(b'\xff\xfe|\xff'),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        Prediction.decode_cursor(cursor)
+
+@pytest.fixture
+def predictions(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(prediction_module, 'get_db', lambda: SimpleNamespace(predictions=collection))
+    return collection
+
+def add_predictions(collection, user_id, timestamps):
+    documents = [
+        {'_id': ObjectId(), 'user_id': user_id, 'request_data': {}, 'response_data': {}, 'created_at': created_at}
+        for created_at in timestamps
+    ]
+    collection.insert_many(documents)
+    return documents
+
+def walk_pages(user_id, limit):
+    pages = []
+    after = None
+    while True:
+        page, after = Prediction.find_page_by_user_id(user_id, limit=limit, after=after)
+        pages.append([prediction._id for prediction in page])
+        if after is None:
+            return pages
+
+def test_pages_walk_newest_first_with_id_tie_break(predictions):
+    user_id = ObjectId()
+    start = datetime(2024, 1, 1)
+    # Several predictions share a timestamp, so pages must break ties on _id
+    timestamps = [start, start + timedelta(seconds=1)] * 3 + [start + timedelta(seconds=2)]
+    documents = add_predictions(predictions, user_id, timestamps)
+    add_predictions(predictions, ObjectId(), [start + timedelta(seconds=1)] * 3)
+    
+    pages = walk_pages(user_id, limit=2)
+    
+    expected = [document['_id'] for document in sorted(
+        documents, key=lambda document: (document['created_at'], document['_id']), reverse=True
+    )]
+    assert pages == [expected[0:2], expected[2:4], expected[4:6], expected[6:7]]
+
+def test_last_full_page_has_no_next_cursor(predictions):
+    user_id = ObjectId()
+    add_predictions(predictions, user_id, [datetime(2024, 1, 1)] * 4)
+    
+    first, after = Prediction.find_page_by_user_id(user_id, limit=2)
+    second, after_second = Prediction.find_page_by_user_id(user_id, limit=2, after=after)
+    
+    assert len(first) == len(second) == 2
+    assert after is not None
+    assert after_second is None
+
+def test_page_after_a_cursor_skips_predictions_inserted_above_it(predictions):
+    user_id = ObjectId()
+    start = datetime(2024, 1, 1)
+    add_predictions(predictions, user_id, [start + timedelta(seconds=i) for i in range(4)])
+    
+    first, after = Prediction.find_page_by_user_id(user_id, limit=2)
+    add_predictions(predictions, user_id, [start + timedelta(seconds=10)])
+    second, _ = Prediction.find_page_by_user_id(user_id, limit=2, after=after)
+    
+    assert [p.created_at for p in first + second] == [start + timedelta(seconds=i) for i in (3, 2, 1, 0)]
@@ -0,0 +1,242 @@
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, g
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app.utils.rate_limit import MemoryBucketStore, RateLimit, RateLimiter, RateLimitResult, rate_limit
+
+@pytest.mark.parametrize('text, limit, period, burst', [
+    ('30/minute', 30, 60, 30),
+    ('60/minute,burst=20', 60, 60, 20),
+    (' 5 / Second ', 5, 1, 5),
+    ('10000/hour, burst = 5000', 10000, 3600, 5000),
+    ('2/day', 2, 86400, 2),
+])
+def test_parse(text, limit, period, burst):
+    rule = RateLimit.parse(text)
+    assert (rule.limit, rule.period, rule.burst) == (limit, period, burst)
+    assert rule.rate == limit / period
+
+@pytest.mark.parametrize('text', [None, '', '  ', '0'])
+def test_parse_disabled(text):
+    assert RateLimit.parse(text) is None
+
+@pytest.mark.parametrize('text', ['30/fortnight', '30', '30/minute,max=5', 'many/minute', '30/minute,burst=lots'])
+def test_parse_rejects_invalid_rules(text):
+    with pytest.raises(ValueError):
+        RateLimit.parse(text)
+
+@pytest.mark.parametrize('text', ['30/minute', '60/minute,burst=20'])
+def test_str_round_trips(text):
+    assert str(RateLimit.parse(text)) == text
+
+def test_bucket_starts_full_and_refills_at_the_rate(clock):
+    store = MemoryBucketStore()
+    # 1 token a second, up to 3
+    assert [store.take('k', 1.0, 3)[0] for _ in range(4)] == [True, True, True, False]
+    
+    clock.advance(0.5)
+    allowed, tokens = store.take('k', 1.0, 3)
+    assert not allowed and tokens == pytest.approx(0.5)
+    
+    clock.advance(0.5)
+    allowed, tokens = store.take('k', 1.0, 3)
+    assert allowed and tokens == pytest.approx(0.0)
+
+def test_bucket_refill_is_capped_at_the_burst(clock):
+    store = MemoryBucketStore()
+    store.take('k', 1.0, 3, cost=3)
+    
+    clock.advance(3600)
+    assert store.take('k', 1.0, 3) == (True, 2)
+
+def test_rejected_take_spends_nothing(clock):
+    store = MemoryBucketStore()
+    store.take('k', 1.0, 3, cost=2)
+    
+    assert store.take('k', 1.0, 3, cost=2) == (False, 1)
+    assert store.take('k', 1.0, 3, cost=1) == (True, 0)
+
+def test_buckets_are_per_key(clock):
+    store = MemoryBucketStore()
+    store.take('a', 1.0, 1)
+    
+    assert store.take('a', 1.0, 1)[0] is False
+    assert store.take('b', 1.0, 1)[0] is True
+
+def test_least_recently_used_buckets_are_dropped(clock):
+    store = MemoryBucketStore(max_entries=2)
+    store.take('a', 1.0, 1)
+    store.take('b', 1.0, 1)
+    store.take('a', 1.0, 1)
+    store.take('c', 1.0, 1)
+    
+    assert store.metrics() == {'buckets': 2, 'max_entries': 2}
+    # 'a' is still empty; 'b' was evicted, so it starts over with a full bucket
+    assert store.take('a', 1.0, 1)[0] is False
+    assert store.take('b', 1.0, 1)[0] is True
+
+def make_limiter(store=None, **limits):
+    return RateLimiter(store or MemoryBucketStore(), {name: RateLimit.parse(text) for name, text in limits.items()})
+
+def test_hit_allows_within_the_burst_then_rejects(clock):
+    limiter = make_limiter(login='6/minute,burst=2')
+    
+    assert limiter.hit('login', 'ip:1').allowed
+    assert limiter.hit('login', 'ip:1').allowed
+    result = limiter.hit('login', 'ip:1')
+    
+    assert not result.allowed
+    # An empty bucket refills one token in 60 / 6 seconds
+    assert result.retry_after == pytest.approx(10.0)
+    assert limiter.metrics()['limits']['login'] == {'rule': '6/minute,burst=2', 'allowed': 2, 'rejected': 1}
+
+def test_retry_after_counts_the_missing_tokens(clock):
+    limiter = make_limiter(jobs='1/second,burst=10')
+    limiter.hit('jobs', 'user:1', cost=8)
+    
+    result = limiter.hit('jobs', 'user:1', cost=5)
+    assert not result.allowed
+    assert result.remaining == pytest.approx(2)
+    assert result.retry_after == pytest.approx(3.0)
+
+def test_cost_above_the_burst_is_charged_as_the_whole_burst(clock):
+    limiter = make_limiter(jobs='1/second,burst=10')
+    
+    result = limiter.hit('jobs', 'user:1', cost=50)
+    assert result.allowed and result.cost == 10 and result.remaining == 0
+    
+    clock.advance(5)
+    result = limiter.hit('jobs', 'user:1', cost=50)
+    assert not result.allowed and result.retry_after == pytest.approx(5.0)
+
+def test_unconfigured_or_disabled_limits_are_not_counted(clock):
+    limiter = make_limiter(login='10/minute', search='')
+    
+    assert limiter.hit('search', 'user:1') is None
+    assert limiter.hit('predict', 'user:1') is None
+    assert set(limiter.metrics()['limits']) == {'login'}
+
+class BrokenStore:
+    name = 'broken'
+    
+    def take(self, key, rate, capacity, cost=1):
+        raise ConnectionError('store unreachable')
+    
+    def metrics(self):
+        return {}
+
+def test_store_failure_lets_the_request_through():
+    limiter = make_limiter(BrokenStore(), login='1/minute')
+    
+    assert limiter.hit('login', 'ip:1') is None
+    assert limiter.hit('login', 'ip:1') is None
+    assert limiter.metrics()['store_errors'] == 2
+
+def test_retry_after_is_zero_when_allowed():
+    rule = RateLimit.parse('1/minute')
+    assert RateLimitResult('login', rule, True, 0).retry_after == 0.0
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    
+    @app.route('/login', methods=['POST'])
+    @rate_limit('login')
+    def login():
+        return {'ok': True}
+    
+    @app.route('/jobs', methods=['POST'])
+    @rate_limit('jobs', cost=lambda: 4)
+    def jobs():
+        return {'ok': True}
+    
+    @app.route('/me', methods=['GET'])
+    def me():
+        g.current_user = SimpleNamespace(_id='u1')
+        return limited_as_user()
+    
+    @rate_limit('login')
+    def limited_as_user():
+        return {'ok': True}
+    
+    app.extensions['rate_limiter'] = make_limiter(login='6/minute,burst=2', jobs='1/second,burst=6')
+    return app
+
+def test_rejected_request_gets_429_with_rate_limit_headers(app, clock):
+    client = app.test_client()
+    assert client.post('/login').status_code == 200
+    assert client.post('/login').status_code == 200
+    
+    clock.advance(4)
+    response = client.post('/login')
+    
+    assert response.status_code == 429
+    # 0.4 of a token is back; the other 0.6 takes 6 seconds, rounded up to whole seconds
+    assert response.headers['Retry-After'] == '6'
+    assert response.headers['X-RateLimit-Limit'] == '6'
+    assert response.headers['X-RateLimit-Remaining'] == '0'
+    assert response.get_json() == {
+        'message': 'Too many requests, please slow down',
+        'limit': '6/minute,burst=2',
+        'retry_after': 6
+    }
+
+def test_retry_after_header_rounds_up_to_whole_seconds(app, clock):
+    client = app.test_client()
+    assert client.post('/jobs').status_code == 200
+    
+    response = client.post('/jobs')
+    # 2 of the 4 tokens left, 2 short at 1 a second
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '2'
+    
+    clock.advance(1.9)
+    response = client.post('/jobs')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    
+    clock.advance(0.1)
+    assert client.post('/jobs').status_code == 200
+
+def test_no_limiter_means_no_limiting(app):
+    del app.extensions['rate_limiter']
+    client = app.test_client()
+    
+    assert all(client.post('/login').status_code == 200 for _ in range(5))
+
+def test_requests_are_counted_per_client_ip(app, clock):
+    client = app.test_client()
+    for _ in range(2):
+        client.post('/login', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    
+    assert client.post('/login', environ_base={'REMOTE_ADDR': '10.0.0.1'}).status_code == 429
+    assert client.post('/login', environ_base={'REMOTE_ADDR': '10.0.0.2'}).status_code == 200
+
+def test_loaded_user_is_counted_instead_of_the_ip(app, clock):
+    client = app.test_client()
+    for _ in range(2):
+        assert client.get('/me').status_code == 200
+    assert client.get('/me').status_code == 429
+    
+    # The user's bucket is empty, the IP's is untouched
+    assert client.post('/login').status_code == 200
+
+def test_forwarded_for_is_ignored_without_trusted_proxies(app, clock):
+    client = app.test_client()
+    for ip in ['203.0.113.1', '203.0.113.2']:
+        client.post('/login', headers={'X-Forwarded-For': ip})
+    
+    assert client.post('/login', headers={'X-Forwarded-For': '203.0.113.3'}).status_code == 429
+
+def test_trusted_proxy_forwarded_for_separates_clients(app, clock):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1)
+    client = app.test_client()
+    for _ in range(2):
+        client.post('/login', headers={'X-Forwarded-For': '203.0.113.1'})
+    
+    assert client.post('/login', headers={'X-Forwarded-For': '203.0.113.1'}).status_code == 429
+    assert client.post('/login', headers={'X-Forwarded-For': '203.0.113.2'}).status_code == 200
+    # Only the address the trusted proxy appended counts, not one the client made up
+    assert client.post('/login', headers={'X-Forwarded-For': '198.51.100.9, 203.0.113.1'}).status_code == 429
@@ -0,0 +1,175 @@
+import random
+
+import pytest
+
+from app.utils import resilience
+from app.utils.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, retry_call
+
+def make_breaker(**kwargs):
+    options = dict(error_rate_threshold=0.5, min_requests=4, window_seconds=10.0, reset_timeout=5.0)
+    options.update(kwargs)
+    return CircuitBreaker('test', **options)
+
+def call(breaker, ok):
+    breaker.before_call()
+    if ok:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+
+def test_breaker_stays_closed_below_min_requests(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        call(breaker, ok=False)
+    
+    assert breaker.metrics()['state'] == CircuitBreaker.CLOSED
+
+def test_breaker_opens_at_the_error_rate_threshold(clock):
+    breaker = make_breaker()
+    for ok in (True, True, False, False):
+        call(breaker, ok)
+    
+    assert breaker.metrics()['state'] == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(5.0)
+    assert breaker.metrics()['rejected'] == 1
+
+def test_breaker_forgets_outcomes_outside_the_window(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        call(breaker, ok=False)
+    clock.advance(11)
+    call(breaker, ok=False)
+    
+    assert breaker.metrics()['state'] == CircuitBreaker.CLOSED
+    assert breaker.metrics()['window_requests'] == 1
+
+def open_breaker(breaker):
+    for _ in range(breaker.min_requests):
+        call(breaker, ok=False)
+    assert breaker.metrics()['state'] == CircuitBreaker.OPEN
+
+def test_breaker_half_opens_after_reset_timeout_and_closes_on_success(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    
+    clock.advance(4.9)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    clock.advance(0.1)
+    breaker.before_call()
+    assert breaker.metrics()['state'] == CircuitBreaker.HALF_OPEN
+    breaker.record_success()
+    
+    metrics = breaker.metrics()
+    assert metrics['state'] == CircuitBreaker.CLOSED
+    assert metrics['window_requests'] == 0
+    assert metrics['transitions'] == {'closed_to_open': 1, 'open_to_half_open': 1, 'half_open_to_closed': 1}
+
+def test_breaker_reopens_when_the_probe_fails(clock):
+    breaker = make_breaker()
+    open_breaker(breaker)
+    clock.advance(5)
+    breaker.before_call()
+    breaker.record_failure()
+    
+    assert breaker.metrics()['state'] == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before_call()
+    assert error.value.retry_after == pytest.approx(5.0)
+    assert breaker.metrics()['transitions']['half_open_to_open'] == 1
+
+def test_breaker_lets_only_half_open_max_calls_probe(clock):
+    breaker = make_breaker(half_open_max_calls=2)
+    open_breaker(breaker)
+    clock.advance(5)
+    
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    # A probe that fails re-opens the breaker; the next half-open period gets fresh slots
+    breaker.record_failure()
+    clock.advance(5)
+    breaker.before_call()
+    breaker.before_call()
+    assert breaker.metrics()['state'] == CircuitBreaker.HALF_OPEN
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(resilience.time, 'sleep', sleeps.append)
+    return sleeps
+
+class Flaky:
+    def __init__(self, failures, error=ConnectionError):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error(f'failure {self.calls}')
+        return 'ok'
+
+def test_retry_call_retries_until_success(sleeps):
+    fn = Flaky(failures=2)
+    
+    assert retry_call(fn, max_retries=2, base_delay=0.1) == 'ok'
+    assert fn.calls == 3
+    assert len(sleeps) == 2
+
+def test_retry_call_gives_up_after_max_retries(sleeps):
+    fn = Flaky(failures=5)
+    
+    with pytest.raises(ConnectionError, match='failure 3'):
+        retry_call(fn, max_retries=2, base_delay=0.1)
+    assert fn.calls == 3
+    assert len(sleeps) == 2
+
+def test_retry_call_does_not_retry_non_retryable_errors(sleeps):
+    fn = Flaky(failures=1, error=ValueError)
+    
+    with pytest.raises(ValueError):
+        retry_call(fn, max_retries=2, is_retryable=lambda e: isinstance(e, ConnectionError))
+    assert fn.calls == 1
+    assert sleeps == []
+
+def test_retry_call_jitters_within_capped_exponential_bounds(sleeps, monkeypatch):
+    bounds = []
+    
+    def uniform(low, high):
+        bounds.append((low, high))
+        return random.Random(len(bounds)).uniform(low, high)
+    
+    monkeypatch.setattr(resilience.random, 'uniform', uniform)
+    with pytest.raises(ConnectionError):
+        retry_call(Flaky(failures=10), max_retries=5, base_delay=0.1, max_delay=1.0)
+    
+    assert bounds == [(0, 0.1), (0, 0.2), (0, 0.4), (0, 0.8), (0, 1.0)]
+    assert all(low <= delay <= high for delay, (low, high) in zip(sleeps, bounds))
+
+def test_latency_tracker_waits_for_min_samples():
+    tracker = LatencyTracker(window=100, min_samples=20)
+    for i in range(19):
+        tracker.record(i / 1000)
+    
+    assert tracker.percentile(95) is None
+    tracker.record(0.019)
+    assert tracker.percentile(95) == 0.019
+
+def test_latency_tracker_p95_over_the_rolling_window():
+    tracker = LatencyTracker(window=100, min_samples=20)
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+    
+    assert tracker.percentile(95) == 0.096
+    assert tracker.percentile(50) == 0.051
+    
+    # Older samples fall out of the window
+    for _ in range(100):
+        tracker.record(0.5)
+    assert tracker.percentile(95) == 0.5
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from app.utils.singleflight import SingleFlight, payload_key
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out waiting for condition'
+        time.sleep(0.005)
+
+def run_concurrently(group, key, fn, n_callers):
+    """Start `n_callers` threads calling group.do(key, fn); returns (threads, outcomes)"""
+    outcomes = [None] * n_callers
+    
+    def run(i):
+        try:
+            outcomes[i] = group.do(key, fn)
+        except Exception as e:
+            outcomes[i] = e
+    
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_callers)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_identical_calls_run_once():
+    group = SingleFlight('test')
+    release = threading.Event()
+    calls = []
+    
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return {'confidence': 0.9}
+    
+    threads, outcomes = run_concurrently(group, 'key', fn, n_callers=8)
+    # Every follower has joined the leader's call before it finishes
+    wait_until(lambda: group.metrics()['coalesced'] == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert all(result is outcomes[0][0] for result, _ in outcomes)
+    assert sorted(shared for _, shared in outcomes) == [False] + [True] * 7
+    assert group.metrics() == {'in_flight': 0, 'executions': 1, 'coalesced': 7}
+
+def test_leader_exception_reaches_every_waiter():
+    group = SingleFlight('test')
+    release = threading.Event()
+    error = ConnectionError('ML API unreachable')
+    
+    def fn():
+        release.wait(5)
+        raise error
+    
+    threads, outcomes = run_concurrently(group, 'key', fn, n_callers=5)
+    wait_until(lambda: group.metrics()['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    
+    assert all(outcome is error for outcome in outcomes)
+    assert group.metrics()['in_flight'] == 0
+
+def test_calls_are_not_cached_after_they_finish():
+    group = SingleFlight('test')
+    calls = []
+    
+    def fn():
+        calls.append(1)
+        return len(calls)
+    
+    assert group.do('key', fn) == (1, False)
+    assert group.do('key', fn) == (2, False)
+    assert group.do('other', fn) == (3, False)
+
+def test_failed_call_does_not_poison_the_key():
+    group = SingleFlight('test')
+    
+    with pytest.raises(ValueError):
+        group.do('key', lambda: int('abc'))
+    assert group.do('key', lambda: 42) == (42, False)
+
+def test_payload_key_ignores_key_order_number_spelling_and_excluded_fields():
+    a = {'koi_period': 10, 'koi_prad': 2.5, 'customIdentifier': 'a'}
+    b = {'customIdentifier': 'b', 'koi_prad': 2.5, 'koi_period': 10.0}
+    
+    assert payload_key(a, exclude=('customIdentifier',)) == payload_key(b, exclude=('customIdentifier',))
+    assert payload_key(a) != payload_key(b)
+    assert payload_key({'flag': True}) != payload_key({'flag': 1.0})
@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from app.utils import trigram_index
+from app.utils.dataset_search import normalize
+from app.utils.trigram_index import TrigramIndex, trigrams
+
+def build_corpus(n_docs=600, seed=7):
+    """Kepler-style designations; enough entries that common trigrams get dense bitsets"""
+    rng = random.Random(seed)
+    corpus = {}
+    for doc_id in range(n_docs):
+        star = rng.randrange(1, 3000)
+        planet = rng.randrange(1, 4)
+        keys = {f'k{star:05d}.0{planet}', f'k{star}.0{planet}'}
+        if rng.random() < 0.5:
+            keys.add(f'kepler{rng.randrange(1, 2000)}{"bcdef"[planet]}')
+        if rng.random() < 0.3:
+            keys.add(f'kic{rng.randrange(10 ** 6, 10 ** 7)}')
+        corpus[doc_id] = sorted(keys)
+    return corpus
+
+@pytest.fixture(scope='module')
+def corpus():
+    return build_corpus()
+
+@pytest.fixture(scope='module')
+def index(corpus):
+    index = TrigramIndex()
+    for doc_id, keys in corpus.items():
+        index.add(doc_id, keys)
+    index.finish()
+    return index
+
+def brute_force(corpus, query, min_similarity):
+    """Every document's best trigram Jaccard similarity to `query`, if it reaches min_similarity"""
+    query_grams = trigrams(normalize(query))
+    best = {}
+    for doc_id, keys in corpus.items():
+        for key in keys:
+            grams = trigrams(key)
+            similarity = len(query_grams & grams) / len(query_grams | grams)
+            if similarity >= min_similarity and similarity > best.get(doc_id, 0):
+                best[doc_id] = similarity
+    return best
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams('k752') == {'  k', ' k7', 'k75', '752', '52 '}
+
+def test_index_has_dense_and_sparse_postings(index):
+    metrics = index.metrics()
+    
+    assert 0 < metrics['dense_trigrams'] < metrics['trigrams']
+    assert len(index) == sum(len(keys) for keys in build_corpus().values())
+
+@pytest.mark.parametrize('query', [
+    'K00752.01', 'k752.01', 'kepler227b', 'keplr 227 b', 'kepelr-1024c', 'K0752', 'k123.02', 'kic 1234567', 'k1.01',
+])
+@pytest.mark.parametrize('min_similarity', [0.2, 0.3, 0.5])
+def test_search_matches_brute_force_jaccard(corpus, index, query, min_similarity):
+    expected = brute_force(corpus, query, min_similarity)
+    
+    # A limit above the number of matches returns every one of them
+    everything = index.search(query, limit=len(corpus), min_similarity=min_similarity)
+    assert {doc_id: score for doc_id, score, _ in everything} == {
+        doc_id: round(similarity, 4) for doc_id, similarity in expected.items()
+    }
+    assert [score for _, score, _ in everything] == sorted((score for _, score, _ in everything), reverse=True)
+    
+    # With a small limit, the top scores are the same as the brute-force ones
+    top = index.search(query, limit=5, min_similarity=min_similarity)
+    expected_top = sorted((round(similarity, 4) for similarity in expected.values()), reverse=True)[:5]
+    assert [score for _, score, _ in top] == expected_top
+    assert all(round(expected[doc_id], 4) == score for doc_id, score, _ in top)
+
+def test_exact_designation_scores_one_and_reports_its_key(index, corpus):
+    owners = {}
+    for doc_id, keys in corpus.items():
+        for key in keys:
+            owners.setdefault(key, []).append(doc_id)
+    key, (doc_id,) = next((key, ids) for key, ids in sorted(owners.items()) if key.startswith('kepler') and len(ids) == 1)
+    
+    assert index.search(key.upper(), limit=1) == [(doc_id, 1.0, key)]
+
+def test_misspelled_designation_ranks_the_intended_one_first():
+    index = TrigramIndex()
+    index.add('kepler-227', ['k00752.01', 'k752.01', 'kepler227b'])
+    index.add('kepler-22', ['k00087.01', 'k87.01', 'kepler22b'])
+    index.add('kepler-1227', ['k02227.01', 'k2227.01', 'kepler1227b'])
+    index.finish()
+    
+    assert [doc_id for doc_id, _, _ in index.search('keplr 227b', limit=3, min_similarity=0.2)][0] == 'kepler-227'
+    assert index.search('kepler 22 b', limit=1)[0][:2] == ('kepler-22', 1.0)
+
+def test_min_similarity_cuts_off_weak_matches():
+    index = TrigramIndex()
+    index.add(1, ['kepler227b'])
+    index.finish()
+    similarity = index.search('kepler', limit=1, min_similarity=0)[0][1]
+    
+    assert index.search('kepler', limit=1, min_similarity=similarity)[0][0] == 1
+    assert index.search('kepler', limit=1, min_similarity=similarity + 0.01) == []
+    assert index.search('zzz', limit=5, min_similarity=0) == []
+
+def test_appended_entries_are_found_after_finish(corpus):
+    appended = TrigramIndex()
+    for doc_id, keys in corpus.items():
+        appended.add(doc_id, keys)
+    appended.finish()
+    assert appended.search('kepler9999z', limit=1, min_similarity=0.9) == []
+    
+    appended.add(len(corpus), ['kepler9999z'])
+    appended.finish()
+    
+    assert appended.search('kepler9999z', limit=1) == [(len(corpus), 1.0, 'kepler9999z')]
+    assert appended.max_id == len(corpus)
+
+def test_search_without_dense_postings_gives_the_same_results(corpus, index, monkeypatch):
+    monkeypatch.setattr(trigram_index, 'DENSE_POSTINGS', 10 ** 9)
+    sparse = TrigramIndex()
+    for doc_id, keys in corpus.items():
+        sparse.add(doc_id, keys)
+    sparse.finish()
+    
+    assert sparse.metrics()['dense_trigrams'] == 0
+    for query in ('k752.01', 'keplr 227 b', 'kic 1234567'):
+        assert sparse.search(query, limit=len(corpus)) == index.search(query, limit=len(corpus))
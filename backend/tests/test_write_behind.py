@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from app.utils import write_behind
+from app.utils.write_behind import WriteBehindBuffer
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, 'timed out waiting for condition'
+        time.sleep(0.005)
+
+class FakeCollection:
+    """Records insert_many batches; `gate`, if set, holds each insert until it is released"""
+    
+    def __init__(self):
+        self.batches = []
+        self.gate = None
+        self.fail_indexes = ()
+    
+    def insert_many(self, documents, ordered=True):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.batches.append(list(documents))
+        if self.fail_indexes:
+            raise BulkWriteError({'writeErrors': [{'index': i} for i in self.fail_indexes]})
+    
+    @property
+    def documents(self):
+        return [document for batch in self.batches for document in batch]
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(write_behind, 'get_db', lambda: {'predictions': collection})
+    return collection
+
+@pytest.fixture
+def make_buffer():
+    buffers = []
+    
+    def make(**kwargs):
+        buffer = WriteBehindBuffer('predictions', **kwargs)
+        buffers.append(buffer)
+        return buffer
+    
+    yield make
+    for buffer in buffers:
+        buffer.close()
+
+def docs(n, start=0):
+    return [{'_id': i} for i in range(start, start + n)]
+
+def test_flushes_when_a_batch_is_full(collection, make_buffer):
+    buffer = make_buffer(batch_size=3, flush_interval=1.0)
+    started = time.monotonic()
+    for document in docs(3):
+        assert buffer.put(document)
+    
+    wait_until(lambda: collection.batches)
+    assert time.monotonic() - started < 1.0
+    assert collection.batches == [docs(3)]
+
+def test_flushes_a_partial_batch_after_the_interval(collection, make_buffer):
+    buffer = make_buffer(batch_size=100, flush_interval=0.05)
+    started = time.monotonic()
+    buffer.put({'_id': 1})
+    buffer.put({'_id': 2})
+    
+    wait_until(lambda: collection.batches)
+    assert time.monotonic() - started >= 0.05
+    assert collection.batches == [[{'_id': 1}, {'_id': 2}]]
+    assert buffer.metrics()['flushes'] == 1
+
+def test_close_flushes_everything_queued(collection, make_buffer):
+    buffer = make_buffer(batch_size=100, flush_interval=1.0)
+    for document in docs(5):
+        buffer.put(document)
+    buffer.close()
+    
+    assert collection.documents == docs(5)
+    assert not buffer.put({'_id': 99})
+    assert buffer.metrics()['written'] == 5
+
+def test_full_queue_rejects_puts_after_the_enqueue_timeout(collection, make_buffer):
+    collection.gate = threading.Event()
+    buffer = make_buffer(max_queue_size=2, batch_size=1, flush_interval=1.0, enqueue_timeout=0.01)
+    # The first document is taken by the flush thread, which then blocks in insert_many
+    buffer.put({'_id': 0})
+    wait_until(lambda: buffer.metrics()['queue_depth'] == 0)
+    assert buffer.put({'_id': 1})
+    assert buffer.put({'_id': 2})
+    
+    started = time.monotonic()
+    assert not buffer.put({'_id': 3})
+    assert time.monotonic() - started >= 0.01
+    assert buffer.metrics()['rejected'] == 1
+    
+    collection.gate.set()
+    wait_until(lambda: len(collection.documents) == 3)
+    assert buffer.put({'_id': 4})
+
+def test_on_written_gets_each_flushed_batch(collection, make_buffer):
+    written = []
+    buffer = make_buffer(batch_size=2, flush_interval=1.0, on_written=written.append)
+    for document in docs(4):
+        buffer.put(document)
+    
+    wait_until(lambda: len(written) == 2)
+    assert written == [docs(2), docs(2, start=2)]
+
+def test_on_written_skips_documents_that_failed_to_insert(collection, make_buffer):
+    collection.fail_indexes = (1,)
+    written = []
+    buffer = make_buffer(batch_size=3, flush_interval=1.0, on_written=written.append)
+    for document in docs(3):
+        buffer.put(document)
+    
+    wait_until(lambda: written)
+    assert written == [[{'_id': 0}, {'_id': 2}]]
+    metrics = buffer.metrics()
+    assert (metrics['written'], metrics['failed']) == (2, 1)
+
+def test_failing_on_written_hook_does_not_stop_the_buffer(collection, make_buffer):
+    def on_written(documents):
+        raise RuntimeError('rollup update failed')
+    
+    buffer = make_buffer(batch_size=1, flush_interval=1.0, on_written=on_written)
+    buffer.put({'_id': 1})
+    buffer.put({'_id': 2})
+    
+    wait_until(lambda: len(collection.batches) == 2)